@@ -7,11 +7,14 @@ from flask import Flask, render_template, send_from_directory, redirect, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 import os
+import time
+from app.utils.replica import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def create_app(config_name='development'):
     """Application factory function"""
+    started = time.perf_counter()
     app = Flask(__name__, static_folder='static', static_url_path='/static', instance_relative_config=True)
     
     # Ensure instance folder exists
@@ -20,15 +23,16 @@ def create_app(config_name='development'):
     except OSError:
         pass
     
-    # Load configuration
-    if config_name == 'production':
-        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///' + os.path.join(app.instance_path, 'lostnfound.db'))
-    else:
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(app.instance_path, 'lostnfound.db')
+    # Load configuration: the class for config_name, then environment overrides
+    from config import config, env_overrides, validate_config
+    config_class = config.get(config_name, config['default'])
+    app.config.from_object(config_class)
+    app.config.update(env_overrides(config_class))
+    validate_config(app.config)
     
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
-    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
+    from app.utils.database import engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    app.logger.setLevel(str(app.config['LOG_LEVEL']).upper())
     
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -37,12 +41,60 @@ def create_app(config_name='development'):
     db.init_app(app)
     CORS(app)
     
+    # WAL, page cache, busy and statement timeouts for SQLite, set on every new connection
+    from app.utils.database import configure_engine
+    with app.app_context():
+        configure_engine(db.engine, app.config)
+    
+    # Browse, item detail and stats read from the replica; clients that just wrote stay on the primary
+    from app.utils.database import create_replica_engine
+    from app.utils.replica import remember_writes
+    replica = create_replica_engine(app.config, app.instance_path)
+    if replica is not None:
+        app.extensions['db_replica'] = replica
+        app.after_request(remember_writes)
+    
+    # Query counts and timings per request, the slow query log and N+1 warnings
+    from app.utils.queries import instrument_engine, start_query_stats, finish_query_stats
+    with app.app_context():
+        instrument_engine(db.engine, app.config)
+    if replica is not None:
+        instrument_engine(replica, app.config)
+    app.before_request(start_query_stats)
+    app.after_request(finish_query_stats)
+    
+    # Latency, status and size metrics at /metrics; hooked in before compression so its after_request sees the sent size
+    if app.config['METRICS_ENABLED']:
+        from app.utils.metrics import RequestMetrics
+        metrics = RequestMetrics(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_SECONDS'])
+        app.extensions['metrics'] = metrics
+        app.before_request(metrics.before_request)
+        app.after_request(metrics.after_request)
+        app.teardown_request(metrics.teardown_request)
+        app.add_url_rule('/metrics', 'metrics', metrics.view)
+    
+    # gzip/Brotli for JSON responses above COMPRESS_MIN_BYTES
+    from app.utils.compression import compress_response
+    app.after_request(compress_response)
+    
+    # Rate limit counters, shared between workers when RATELIMIT_STORAGE_URI is not memory://
+    from app.utils.security import RateLimiter
+    app.extensions['rate_limiter'] = RateLimiter.from_config(app.config)
+    
+    # Keep the admin statistics counters in step with item and claim writes
+    from app.utils.stats import register_stats_listeners
+    register_stats_listeners(db.session)
+    
     # Register blueprints
     from app.routes import auth_bp, items_bp, admin_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(items_bp)
     app.register_blueprint(admin_bp)
     
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Helper function to check admin from token
     def get_user_from_token():
         """Extract user info from auth token"""
@@ -61,69 +113,59 @@ def create_app(config_name='development'):
                 return None
         return None
     
-    # Frontend routes - serve HTML pages
+    # Frontend routes - serve HTML pages, from the hashed and compressed build once `flask assets build` has run
+    from app.utils.assets import send_asset, send_page, ASSETS_DIR, IMMUTABLE
+    
+    @app.route('/assets/<path:filename>')
+    def assets(filename):
+        return send_asset(os.path.join(app.config['ASSET_BUILD_FOLDER'], ASSETS_DIR), filename, IMMUTABLE)
+    
     @app.route('/')
     def index():
-        return send_from_directory(app.static_folder, 'index.html')
+        return send_page('index.html')
     
     @app.route('/login')
     def login():
-        return send_from_directory(app.static_folder, 'login.html')
+        return send_page('login.html')
     
     @app.route('/register')
     def register():
-        return send_from_directory(app.static_folder, 'register.html')
+        return send_page('register.html')
     
     @app.route('/browse')
     def browse():
-        return send_from_directory(app.static_folder, 'browse.html')
+        return send_page('browse.html')
     
     @app.route('/report')
     def report():
-        return send_from_directory(app.static_folder, 'report.html')
+        return send_page('report.html')
     
     @app.route('/dashboard')
     def dashboard():
-        return send_from_directory(app.static_folder, 'dashboard.html')
+        return send_page('dashboard.html')
     
     @app.route('/my-dashboard')
     def my_dashboard():
-        return send_from_directory(app.static_folder, 'my-dashboard.html')
+        return send_page('my-dashboard.html')
     
     @app.route('/browse-lost')
     def browse_lost():
-        return send_from_directory(app.static_folder, 'browse-lost.html')
+        return send_page('browse-lost.html')
     
     @app.route('/browse-found')
     def browse_found():
-        return send_from_directory(app.static_folder, 'browse-found.html')
+        return send_page('browse-found.html')
     
     @app.route('/admin-dashboard')
     def admin_dashboard():
-        return send_from_directory(app.static_folder, 'admin-dashboard.html')
+        return send_page('admin-dashboard.html')
     
     @app.route('/test-login')
     def test_login_page():
-        return send_from_directory(app.static_folder, 'test-login.html')
+        return send_page('test-login.html')
     
-    # Create database tables and initialize default data
-    with app.app_context():
-        db.create_all()
-        
-        # Skip admin initialization during testing
-        if not os.getenv('SKIP_ADMIN_INIT'):
-            # Initialize default admin user if it doesn't exist
-            from app.models import User
-            admin = User.query.filter_by(email='admin@strathmore.ac.ke').first()
-            if not admin:
-                admin_user = User(
-                    name='Admin User',
-                    email='admin@strathmore.ac.ke',
-                    role='admin'
-                )
-                admin_user.set_password('Admin123')
-                db.session.add(admin_user)
-                db.session.commit()
-                print("✓ Admin user created: admin@strathmore.ac.ke")
+    # No database work here: `flask init-db` creates the schema and the admin account once per deployment
+    app.extensions['startup_seconds'] = time.perf_counter() - started
+    app.logger.info(f"App created in {app.extensions['startup_seconds'] * 1000:.0f} ms")
     
     return app
@@ -0,0 +1,289 @@
+"""Flask CLI commands for maintenance tasks"""
+
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+uploads_cli = AppGroup('uploads', help='Maintenance commands for the uploads folder.')
+stats_cli = AppGroup('stats', help='Maintenance commands for the admin statistics.')
+archive_cli = AppGroup('archive', help='Move finished items out of the live tables.')
+lifecycle_cli = AppGroup('lifecycle', help='Scheduled item status transitions.')
+assets_cli = AppGroup('assets', help='Fingerprinted, precompressed static files.')
+
+
+@uploads_cli.command('normalize-report')
+@click.option('--apply', is_flag=True, help='Rewrite files that shrink instead of only reporting.')
+@click.option('--verbose', is_flag=True, help='Print a line per file.')
+def normalize_report_command(apply, verbose):
+    """Show the bytes saved by normalizing existing uploads"""
+    from app.utils.images import normalization_report
+
+    report = normalization_report(
+        current_app.config['UPLOAD_FOLDER'],
+        max_edge=current_app.config['IMAGE_MAX_EDGE'],
+        quality=current_app.config['IMAGE_QUALITY'],
+        apply=apply
+    )
+
+    if verbose:
+        for entry in report['files']:
+            if 'error' in entry:
+                click.echo(f"  {entry['name']}: skipped ({entry['error']})")
+            else:
+                click.echo(f"  {entry['name']}: {entry['bytes_before']} -> {entry['bytes_after']} bytes")
+
+    totals = report['totals']
+    percent = (totals['bytes_saved'] / totals['bytes_before'] * 100) if totals['bytes_before'] else 0
+    action = 'Saved' if apply else 'Would save'
+    click.echo(f"Files: {totals['files']} (skipped {totals['skipped']})")
+    click.echo(f"Before: {totals['bytes_before']} bytes, after: {totals['bytes_after']} bytes")
+    click.echo(f"{action}: {totals['bytes_saved']} bytes ({percent:.1f}%)")
+
+
+@uploads_cli.command('rehash')
+@click.option('--batch-size', default=500, show_default=True, help='Rows processed per commit.')
+def rehash_command(batch_size):
+    """Backfill item_photos rows and perceptual hashes for existing photos"""
+    from datetime import datetime
+    from app import db
+    from app.models import Item, ItemPhoto
+    from app.utils.phash import image_hash
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    counts = {'backfilled': 0, 'hashed': 0, 'missing': 0}
+
+    def hash_file(photo_path):
+        path = os.path.join(upload_folder, os.path.basename(photo_path))
+        if not os.path.exists(path):
+            counts['missing'] += 1
+            return None
+        with open(path, 'rb') as f:
+            photo_hash = image_hash(f.read())
+        if photo_hash:
+            counts['hashed'] += 1
+        return photo_hash
+
+    # Items reported before item_photos existed get their cover as photo 0
+    last_id = 0
+    while True:
+        items = (Item.query
+                 .filter(Item.item_id > last_id, Item.photo_path.isnot(None), ~Item.photos.any())
+                 .order_by(Item.item_id)
+                 .limit(batch_size)
+                 .all())
+        if not items:
+            break
+        for item in items:
+            last_id = item.item_id
+            if not item.photo_hash:
+                item.photo_hash = hash_file(item.photo_path)
+            db.session.add(ItemPhoto(item_id=item.item_id, path=item.photo_path,
+                                     photo_hash=item.photo_hash, position=0))
+            # Rollups and other readers of the updated_at watermark must see the change
+            item.updated_at = datetime.utcnow()
+            counts['backfilled'] += 1
+        db.session.commit()
+
+    # Photos stored without a hash
+    last_id = 0
+    while True:
+        photos = (ItemPhoto.query
+                  .filter(ItemPhoto.photo_id > last_id, ItemPhoto.photo_hash.is_(None))
+                  .order_by(ItemPhoto.photo_id)
+                  .limit(batch_size)
+                  .all())
+        if not photos:
+            break
+        hashed_items = set()
+        for photo in photos:
+            last_id = photo.photo_id
+            photo.photo_hash = hash_file(photo.path)
+            if photo.photo_hash:
+                hashed_items.add(photo.item_id)
+                if photo.position == 0:
+                    photo.item.photo_hash = photo.photo_hash
+        if hashed_items:
+            db.session.execute(
+                db.update(Item).where(Item.item_id.in_(hashed_items)).values(updated_at=datetime.utcnow()),
+                execution_options={'synchronize_session': False}
+            )
+        db.session.commit()
+
+    click.echo(f"Backfilled {counts['backfilled']} cover photos, hashed {counts['hashed']} photos "
+               f"({counts['missing']} files missing)")
+
+
+@uploads_cli.command('reconcile')
+@click.option('--action', type=click.Choice(['report', 'quarantine', 'delete']), default='report',
+              show_default=True, help='What to do with orphaned files.')
+@click.option('--grace-hours', default=24.0, show_default=True,
+              help='Leave orphans younger than this alone; they may belong to an upload in progress.')
+@click.option('--purge-quarantine-days', type=float, default=None,
+              help='Also delete quarantined files older than this many days.')
+@click.option('--partitions', default=64, show_default=True, help='Spill buckets; more means less memory.')
+@click.option('--verbose', is_flag=True, help='Print every orphaned file.')
+def reconcile_command(action, grace_hours, purge_quarantine_days, partitions, verbose):
+    """Find files no item references and items whose photo file is gone"""
+    import time
+    from app import db
+    from app.models import Item, ItemPhoto, ItemArchive, ItemPhotoArchive
+    from app.utils.storage import reconcile, quarantine_file, purge_quarantine
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    cutoff = time.time() - grace_hours * 3600
+    counts = {'orphan': 0, 'recent': 0, 'handled': 0, 'missing': 0}
+
+    def references():
+        # Cover paths are also in item_photos, except for items not yet backfilled.
+        # Archived items keep their files, so their photos count as referenced too.
+        for item_model, photo_model in ((Item, ItemPhoto), (ItemArchive, ItemPhotoArchive)):
+            for item_id, photo_path in (db.session.query(item_model.item_id, item_model.photo_path)
+                                        .filter(item_model.photo_path.isnot(None))
+                                        .yield_per(10000)):
+                yield os.path.basename(photo_path), item_id
+            for item_id, path in db.session.query(photo_model.item_id, photo_model.path).yield_per(10000):
+                yield os.path.basename(path), item_id
+
+    for kind, name, detail in reconcile(upload_folder, references(), partitions=partitions):
+        if kind == 'missing':
+            counts['missing'] += 1
+            click.echo(f"  missing: {name} (item {detail})")
+            continue
+
+        counts['orphan'] += 1
+        if detail > cutoff:
+            counts['recent'] += 1
+            continue
+        if verbose:
+            click.echo(f"  orphan: {name}")
+        if action == 'quarantine':
+            quarantine_file(upload_folder, name)
+            counts['handled'] += 1
+        elif action == 'delete':
+            os.remove(os.path.join(upload_folder, name))
+            counts['handled'] += 1
+
+    click.echo(f"Orphaned files: {counts['orphan']} ({counts['recent']} within the {grace_hours:g}h grace period)")
+    if action != 'report':
+        verb = 'Quarantined' if action == 'quarantine' else 'Deleted'
+        click.echo(f"{verb}: {counts['handled']}")
+    click.echo(f"Items with missing photo files: {counts['missing']}")
+
+    if purge_quarantine_days is not None:
+        removed = purge_quarantine(upload_folder, purge_quarantine_days * 86400)
+        click.echo(f"Purged from quarantine: {removed}")
+
+
+@stats_cli.command('rebuild')
+def stats_rebuild_command():
+    """Recompute the statistics counters from the items and claims tables"""
+    from app.utils.stats import rebuild_counters
+
+    counters = rebuild_counters()
+    click.echo(f"Rebuilt {counters} counters")
+
+
+@stats_cli.command('rollup')
+@click.option('--full', is_flag=True, help='Rebuild every day instead of only days changed since the last run.')
+def stats_rollup_command(full):
+    """Refresh the daily rollups behind /api/admin/timeseries; run it from cron"""
+    from app.utils.rollups import refresh_rollups
+
+    rolled = refresh_rollups(full=full)
+    for name, days in rolled.items():
+        click.echo(f"{name}: rolled up {days} days")
+
+
+@archive_cli.command('run')
+@click.option('--older-than-days', type=int, default=None, help='Defaults to ARCHIVE_AFTER_DAYS.')
+@click.option('--batch-size', type=int, default=None, help='Defaults to ARCHIVE_BATCH_SIZE.')
+@click.option('--dry-run', is_flag=True, help='Only count the items that would be archived.')
+def archive_run_command(older_than_days, batch_size, dry_run):
+    """Archive items in a final status that haven't changed for a while"""
+    from app.utils.archive import archive_items
+
+    config = current_app.config
+    older_than_days = config['ARCHIVE_AFTER_DAYS'] if older_than_days is None else older_than_days
+    statuses = config['ARCHIVE_STATUSES']
+
+    count = archive_items(older_than_days, statuses,
+                          batch_size=batch_size or config['ARCHIVE_BATCH_SIZE'], dry_run=dry_run)
+    verb = 'Would archive' if dry_run else 'Archived'
+    click.echo(f"{verb} {count} items ({', '.join(statuses)}, unchanged for {older_than_days} days)")
+
+
+@lifecycle_cli.command('run')
+@click.option('--batch-size', type=int, default=None, help='Defaults to LIFECYCLE_BATCH_SIZE.')
+@click.option('--dry-run', is_flag=True, help='Only count the items each rule would move.')
+def lifecycle_run_command(batch_size, dry_run):
+    """Expire stale items according to LIFECYCLE_RULES; run it from cron"""
+    from app.utils.lifecycle import run_lifecycle, parse_rules, DEFAULT_RULES
+
+    config = current_app.config
+    rules, error = parse_rules(config['LIFECYCLE_RULES'] or DEFAULT_RULES)
+    if error:
+        raise click.ClickException(error)
+
+    counts = run_lifecycle(rules, batch_size=batch_size or config['LIFECYCLE_BATCH_SIZE'], dry_run=dry_run)
+    verb = 'would move' if dry_run else 'moved'
+    for rule, moved in counts:
+        scope = ' '.join(rule[key] for key in ('category', 'item_type') if key in rule) or 'all'
+        click.echo(f"{rule['status']} -> {rule['to']} ({scope}, {rule['after_days']} days): {verb} {moved}")
+    click.echo(f"Total {verb}: {sum(moved for _, moved in counts)}")
+
+
+@assets_cli.command('build')
+def assets_build_command():
+    """Hash, compress and rewrite app/static into ASSET_BUILD_FOLDER; run once per release"""
+    from app.utils.assets import build_assets, HAS_BROTLI
+
+    target = current_app.config['ASSET_BUILD_FOLDER']
+    totals = build_assets(current_app.static_folder, target)
+    click.echo(f"Built {totals['files']} files ({totals['bytes']} bytes) into {target}")
+    click.echo(f"gzip: {totals['gzip']} bytes")
+    click.echo(f"brotli: {totals['br']} bytes" if HAS_BROTLI else "brotli: skipped (pip install Brotli)")
+
+
+@click.command('init-db')
+@click.option('--admin-email', default='admin@strathmore.ac.ke', show_default=True)
+@click.option('--admin-password', envvar='ADMIN_PASSWORD', default='Admin123', show_default=True,
+              help='Only used when the admin account is created. Also read from ADMIN_PASSWORD.')
+def init_db_command(admin_email, admin_password):
+    """Create or upgrade the database and the default admin account; run once per deployment"""
+    from app.utils.migrations import ensure_admin
+
+    _apply_migrations()
+    if ensure_admin(admin_email, admin_password):
+        click.echo(f"Admin user created: {admin_email}")
+    else:
+        click.echo(f"Admin user already exists: {admin_email}")
+
+
+@click.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations"""
+    _apply_migrations()
+
+
+def _apply_migrations():
+    from app import db
+    from app.utils.migrations import migrate, current_version
+
+    for version, description, added in migrate():
+        click.echo(f"Applied {version}: {description}")
+        if added:
+            click.echo(f"  added {', '.join(added)}")
+    with db.engine.connect() as connection:
+        click.echo(f"Schema version: {current_version(connection)}")
+
+
+def register_commands(app):
+    """Attach CLI command groups to the app"""
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(uploads_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(lifecycle_cli)
+    app.cli.add_command(assets_cli)
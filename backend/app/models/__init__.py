@@ -2,6 +2,15 @@
 
 from app.models.user import User
 from app.models.item import Item
+from app.models.photo import ItemPhoto
 from app.models.claim import Claim
+from app.models.upload import PhotoUpload
+from app.models.archive import ItemArchive, ClaimArchive, ItemPhotoArchive
+from app.models.stats import StatCounter, DailyItemRollup, DailyClaimRollup, RollupWatermark
+from app.models.search import SavedSearch, SearchAlert
+from app.models.event import Event
+from app.models.schema import SchemaVersion
 
-__all__ = ['User', 'Item', 'Claim']
+__all__ = ['User', 'Item', 'ItemPhoto', 'Claim', 'PhotoUpload', 'ItemArchive', 'ClaimArchive',
+           'ItemPhotoArchive', 'StatCounter', 'DailyItemRollup', 'DailyClaimRollup', 'RollupWatermark',
+           'SavedSearch', 'SearchAlert', 'Event', 'SchemaVersion']
@@ -0,0 +1,98 @@
+"""Archive tables for items that reached a final status, with their claims and photos"""
+
+from app import db
+from datetime import datetime
+
+class ItemArchive(db.Model):
+    __tablename__ = 'items_archive'
+    
+    item_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Same id as in items
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    item_type = db.Column(db.String(50), nullable=False)
+    photo_path = db.Column(db.String(500), nullable=True)
+    photo_hash = db.Column(db.String(16), nullable=True)
+    status = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.DateTime, nullable=False)
+    location = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False, index=True)
+    is_verified = db.Column(db.Boolean, default=False)
+    verified_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    reporter = db.relationship('User', viewonly=True)
+    
+    def to_dict(self):
+        return {
+            'item_id': self.item_id,
+            'title': self.title,
+            'description': self.description,
+            'category': self.category,
+            'item_type': self.item_type,
+            'photo_path': self.photo_path,
+            'photo_hash': self.photo_hash,
+            'status': self.status,
+            'date': self.date.isoformat(),
+            'location': self.location,
+            'user_id': self.user_id,
+            'is_verified': self.is_verified,
+            'created_at': self.created_at.isoformat(),
+            'archived': True,
+            'archived_at': self.archived_at.isoformat()
+        }
+
+
+class ClaimArchive(db.Model):
+    __tablename__ = 'claims_archive'
+    
+    claim_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Same id as in claims
+    item_id = db.Column(db.Integer, nullable=False, index=True)  # References items_archive
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False, index=True)
+    claim_date = db.Column(db.DateTime)
+    status = db.Column(db.String(50), nullable=False)
+    notes = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    item = db.relationship('ItemArchive', primaryjoin='ClaimArchive.item_id == ItemArchive.item_id',
+                           foreign_keys='ClaimArchive.item_id', viewonly=True)
+    user = db.relationship('User', viewonly=True)
+    
+    def to_dict(self):
+        return {
+            'claim_id': self.claim_id,
+            'item_id': self.item_id,
+            'user_id': self.user_id,
+            'claim_date': self.claim_date.isoformat(),
+            'status': self.status,
+            'notes': self.notes,
+            'version': self.version,
+            'created_at': self.created_at.isoformat(),
+            'archived': True
+        }
+
+
+class ItemPhotoArchive(db.Model):
+    __tablename__ = 'item_photos_archive'
+    
+    photo_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Same id as in item_photos
+    item_id = db.Column(db.Integer, nullable=False, index=True)  # References items_archive
+    path = db.Column(db.String(500), nullable=False)
+    photo_hash = db.Column(db.String(16), nullable=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'photo_id': self.photo_id,
+            'item_id': self.item_id,
+            'photo_path': self.path,
+            'photo_hash': self.photo_hash,
+            'position': self.position
+        }
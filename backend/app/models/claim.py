@@ -5,6 +5,7 @@ from datetime import datetime
 
 class Claim(db.Model):
     __tablename__ = 'claims'
+    __table_args__ = {'sqlite_autoincrement': True}  # Never reuse the ids of archived rows
     
     claim_id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.Integer, db.ForeignKey('items.item_id'), nullable=False)
@@ -12,8 +13,11 @@ class Claim(db.Model):
     claim_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(50), default='pending')  # 'pending', 'approved', 'rejected'
     notes = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    version = db.Column(db.Integer, nullable=False, default=1)  # Optimistic lock, bumped on every update
+    
+    __mapper_args__ = {'version_id_col': version}
     
     def to_dict(self):
         return {
@@ -23,5 +27,6 @@ class Claim(db.Model):
             'claim_date': self.claim_date.isoformat(),
             'status': self.status,
             'notes': self.notes,
+            'version': self.version,
             'created_at': self.created_at.isoformat()
         }
@@ -0,0 +1,14 @@
+"""Change table that carries server-sent events between workers"""
+
+from app import db
+from datetime import datetime
+
+class Event(db.Model):
+    __tablename__ = 'events'
+    __table_args__ = {'sqlite_autoincrement': True}  # Ids are stream positions, never reuse them
+    
+    event_id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # 'item_verified', 'claim_updated'
+    user_id = db.Column(db.Integer, nullable=True)  # Recipient of claim events; None for public events
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
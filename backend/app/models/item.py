@@ -5,23 +5,45 @@ from datetime import datetime
 
 class Item(db.Model):
     __tablename__ = 'items'
+    __table_args__ = (
+        db.Index('ix_items_status_created', 'status', 'created_at', 'item_id'),  # Moderation queue order
+        db.Index('ix_items_status_date', 'status', 'date'),  # Lifecycle scans for stale items
+        {'sqlite_autoincrement': True},  # Never reuse the ids of archived rows
+    )
+    
+    STATUSES = ('pending', 'verified', 'claimed', 'returned', 'rejected', 'expired')
     
     item_id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(100), nullable=False)
     item_type = db.Column(db.String(50), nullable=False)  # 'lost' or 'found'
-    photo_path = db.Column(db.String(500), nullable=True)
-    status = db.Column(db.String(50), default='pending')  # 'pending', 'verified', 'claimed', 'rejected'
+    photo_path = db.Column(db.String(500), nullable=True)  # Cover photo, copied from item_photos position 0
+    photo_hash = db.Column(db.String(16), nullable=True, index=True)  # Perceptual dHash of the cover, hex
+    status = db.Column(db.String(50), default='pending')  # One of STATUSES
     date = db.Column(db.DateTime, nullable=False)
     location = db.Column(db.String(255), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     is_verified = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    verified_at = db.Column(db.DateTime, nullable=True)  # First approval by an admin
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Moderation lease: the admin working on a pending item, until it expires
+    lease_owner = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=True)
+    lease_token = db.Column(db.String(32), nullable=True, index=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
     claims = db.relationship('Claim', backref='item', lazy=True, cascade='all, delete-orphan')
+    photos = db.relationship('ItemPhoto', backref='item', lazy=True, order_by='ItemPhoto.position',
+                             cascade='all, delete-orphan')
+    
+    def leased_by_other(self, user_id, now=None):
+        """True if another admin holds an unexpired moderation lease on this item"""
+        now = now or datetime.utcnow()
+        return (self.lease_owner is not None and self.lease_owner != user_id
+                and self.lease_expires_at is not None and self.lease_expires_at > now)
     
     def to_dict(self):
         return {
@@ -31,6 +53,7 @@ class Item(db.Model):
             'category': self.category,
             'item_type': self.item_type,
             'photo_path': self.photo_path,
+            'photo_hash': self.photo_hash,
             'status': self.status,
             'date': self.date.isoformat(),
             'location': self.location,
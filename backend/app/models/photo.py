@@ -0,0 +1,27 @@
+"""Photo model for the pictures attached to an item"""
+
+from app import db
+from datetime import datetime
+
+class ItemPhoto(db.Model):
+    __tablename__ = 'item_photos'
+    __table_args__ = (
+        db.Index('ix_item_photos_item_position', 'item_id', 'position'),
+        {'sqlite_autoincrement': True},  # Never reuse the ids of archived rows
+    )
+    
+    photo_id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.item_id'), nullable=False)
+    path = db.Column(db.String(500), nullable=False)
+    photo_hash = db.Column(db.String(16), nullable=True, index=True)  # Perceptual dHash, hex
+    position = db.Column(db.Integer, nullable=False, default=0)  # 0 is the cover photo
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'photo_id': self.photo_id,
+            'item_id': self.item_id,
+            'photo_path': self.path,
+            'photo_hash': self.photo_hash,
+            'position': self.position
+        }
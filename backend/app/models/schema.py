@@ -0,0 +1,11 @@
+"""Record of the schema migrations applied to the database"""
+
+from app import db
+from datetime import datetime
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
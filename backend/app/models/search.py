@@ -0,0 +1,57 @@
+"""Saved search and alert models"""
+
+from app import db
+from datetime import datetime
+
+class SavedSearch(db.Model):
+    __tablename__ = 'saved_searches'
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    search_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=True)
+    keywords = db.Column(db.String(200), nullable=False, default='')  # Every word must appear in the item
+    category = db.Column(db.String(100), nullable=True)  # None matches any category
+    item_type = db.Column(db.String(50), nullable=True)  # None matches lost and found
+    is_active = db.Column(db.Boolean, default=True, nullable=False)  # Deleted searches are deactivated
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'search_id': self.search_id,
+            'name': self.name,
+            'query': self.keywords,
+            'category': self.category,
+            'item_type': self.item_type,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class SearchAlert(db.Model):
+    __tablename__ = 'search_alerts'
+    __table_args__ = (
+        db.UniqueConstraint('search_id', 'item_id'),
+        db.Index('ix_search_alerts_user_alert', 'user_id', 'alert_id'),
+        {'sqlite_autoincrement': True},
+    )
+    
+    alert_id = db.Column(db.Integer, primary_key=True)
+    search_id = db.Column(db.Integer, db.ForeignKey('saved_searches.search_id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.item_id'), nullable=False, index=True)
+    seen = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    item = db.relationship('Item', lazy='joined')
+    search = db.relationship('SavedSearch', lazy='joined')
+    
+    def to_dict(self):
+        return {
+            'alert_id': self.alert_id,
+            'search_id': self.search_id,
+            'search_name': self.search.name if self.search else None,
+            'item': self.item.to_dict() if self.item else None,
+            'seen': self.seen,
+            'created_at': self.created_at.isoformat()
+        }
@@ -0,0 +1,56 @@
+"""Counter model backing the admin statistics"""
+
+from app import db
+
+class StatCounter(db.Model):
+    __tablename__ = 'stat_counters'
+    
+    name = db.Column(db.String(150), primary_key=True)  # e.g. 'items:status:pending', 'claims:approved:2024-05-01'
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'value': self.value
+        }
+
+
+class DailyItemRollup(db.Model):
+    __tablename__ = 'daily_item_rollups'
+    
+    day = db.Column(db.Date, primary_key=True)  # Day the items were reported (created_at)
+    category = db.Column(db.String(100), primary_key=True)
+    item_type = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)  # Current status of those items
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'category': self.category,
+            'item_type': self.item_type,
+            'status': self.status,
+            'count': self.count
+        }
+
+
+class DailyClaimRollup(db.Model):
+    __tablename__ = 'daily_claim_rollups'
+    
+    day = db.Column(db.Date, primary_key=True)  # Day the claims were made (created_at)
+    status = db.Column(db.String(50), primary_key=True)  # Current status of those claims
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'status': self.status,
+            'count': self.count
+        }
+
+
+class RollupWatermark(db.Model):
+    __tablename__ = 'rollup_watermarks'
+    
+    name = db.Column(db.String(50), primary_key=True)  # Source table
+    updated_at = db.Column(db.DateTime, nullable=False)  # Rows changed after this are not rolled up yet
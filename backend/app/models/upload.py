@@ -0,0 +1,26 @@
+"""Upload session model for resumable chunked photo uploads"""
+
+from app import db
+from datetime import datetime
+
+class PhotoUpload(db.Model):
+    __tablename__ = 'photo_uploads'
+    
+    upload_id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.Integer, nullable=False)
+    received_size = db.Column(db.Integer, default=0, nullable=False)
+    status = db.Column(db.String(50), default='uploading')  # 'uploading', 'complete'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'received_size': self.received_size,
+            'status': self.status,
+            'created_at': self.created_at.isoformat()
+        }
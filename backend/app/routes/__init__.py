@@ -8,4 +8,4 @@ items_bp = Blueprint('items', __name__, url_prefix='/api/items')
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
 # Import route handlers
-from app.routes import auth_routes, item_routes, admin_routes
+from app.routes import auth_routes, item_routes, upload_routes, search_routes, event_routes, admin_routes
@@ -1,10 +1,38 @@
 """Admin endpoints"""
 
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response, stream_with_context
 from app.routes import admin_bp
-from app.models import Item, User, Claim
+from app.models import Item, User, Claim, ItemArchive, ClaimArchive
 from app import db
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
 from app.utils import require_auth
+from app.utils.phash import get_photo_index
+from app.utils.stats import apply_deltas, status_change, record_verification, record_approval, read_stats
+from app.utils.rollups import report_series, claim_series
+from app.utils.percolator import alert_saved_searches
+from app.utils.events import record_item_events, record_claim_events
+from app.utils.replica import use_replica
+from collections import Counter
+from datetime import datetime, timedelta
+import csv
+import io
+import secrets
+
+BULK_MAX_IDS = 1000  # Ids accepted per bulk request
+IN_CLAUSE_CHUNK = 500  # Stay below SQLite's bound-parameter limit
+QUEUE_PAGE_SIZE = 50
+QUEUE_MAX_PAGE_SIZE = 200
+LEASE_MAX_BATCH = 50
+EXPORT_FLUSH_SIZE = 64 * 1024  # Bytes of CSV buffered before a chunk is sent
+
+# Columns of each CSV export; rows come from the live table, then its archive
+EXPORTS = {
+    'items': (Item, ItemArchive, ['item_id', 'title', 'category', 'item_type', 'status', 'location', 'date',
+                                  'user_id', 'is_verified', 'created_at', 'verified_at']),
+    'claims': (Claim, ClaimArchive, ['claim_id', 'item_id', 'user_id', 'status', 'claim_date', 'created_at',
+                                     'updated_at']),
+}
 
 def require_admin(f):
     """Decorator to require admin role"""
@@ -21,16 +49,418 @@ def require_admin(f):
     
     return decorated_function
 
+def chunked(ids, size=IN_CLAUSE_CHUNK):
+    """Split a list of ids into IN-clause sized slices"""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def parse_bulk_ids(data, key):
+    """Read a de-duplicated list of integer ids from a bulk request body"""
+    ids = data.get(key)
+    
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return None, f'{key} must be a non-empty list of ids'
+    
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > BULK_MAX_IDS:
+        return None, f'At most {BULK_MAX_IDS} ids per request'
+    
+    return ids, None
+
+def items_verified(item_ids):
+    """Alert saved searches and stream subscribers about newly verified items; the caller commits"""
+    alert_saved_searches(item_ids)
+    record_item_events(item_ids)
+
+def approve_claims(claim_ids, expected_versions=None):
+    """
+    Approve pending claims with guarded, set-based UPDATEs; the caller commits.
+    
+    A claim is approved only if it is still pending (and at the expected
+    version, when one is given) and its item is not claimed yet. At most one
+    claim per item wins; every other pending claim on an approved item is
+    rejected. Returns {claim_id: result} where result has an `outcome` of
+    updated, superseded, conflict or not_found. Statistics counters are
+    updated in the same transaction.
+    """
+    expected_versions = expected_versions or {}
+    deltas = Counter()
+    now = datetime.utcnow()
+    results = {claim_id: {'claim_id': claim_id, 'outcome': 'not_found'} for claim_id in claim_ids}
+    winners = {}  # item_id -> claim_id
+    
+    for chunk in chunked(claim_ids):
+        rows = (db.session.query(Claim.claim_id, Claim.item_id, Claim.status, Claim.version, Item.status)
+                .join(Item, Item.item_id == Claim.item_id)
+                .filter(Claim.claim_id.in_(chunk))
+                .all())
+        for claim_id, item_id, status, version, item_status in rows:
+            expected = expected_versions.get(claim_id)
+            result = results[claim_id]
+            if status != 'pending':
+                result.update(outcome='conflict', status=status, error=f'Claim is already {status}')
+            elif expected is not None and expected != version:
+                result.update(outcome='conflict', status=status,
+                              error='Claim was changed by another admin, reload and try again')
+            elif item_status == 'claimed':
+                result.update(outcome='conflict', status=status, error='Item has already been claimed')
+            elif item_id in winners:
+                result.update(outcome='superseded', status='rejected', winner=winners[item_id])
+            else:
+                winners[item_id] = claim_id
+                result.update(outcome='updated', status='approved', rejected_claims=[],
+                              version=version, item_status=item_status)
+    
+    for item_id, claim_id in list(winners.items()):
+        result = results[claim_id]
+        # The guards make a concurrent approval lose here instead of double-approving
+        claimed = db.session.execute(
+            db.update(Item)
+            .where(Item.item_id == item_id, Item.status == result['item_status'])
+            .values(status='claimed', updated_at=now),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        approved = claimed and db.session.execute(
+            db.update(Claim)
+            .where(Claim.claim_id == claim_id, Claim.status == 'pending', Claim.version == result['version'])
+            .values(status='approved', version=Claim.version + 1, updated_at=now),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        if not approved:
+            if claimed:
+                # This transaction holds the write lock, so nobody changed the item since
+                db.session.execute(
+                    db.update(Item).where(Item.item_id == item_id).values(status=result['item_status']),
+                    execution_options={'synchronize_session': False}
+                )
+            result.update(outcome='conflict', status='pending',
+                          error='Claim was changed by another admin, reload and try again')
+            del winners[item_id]
+            continue
+        status_change(deltas, 'items', result['item_status'], 'claimed')
+        status_change(deltas, 'claims', 'pending', 'approved')
+        record_approval(deltas, now)
+    
+    for chunk in chunked(list(winners)):
+        competing = (Claim.item_id.in_(chunk), Claim.status == 'pending',
+                     Claim.claim_id.notin_([winners[item_id] for item_id in chunk]))
+        for claim_id, item_id in db.session.query(Claim.claim_id, Claim.item_id).filter(*competing):
+            results[winners[item_id]]['rejected_claims'].append(claim_id)
+            status_change(deltas, 'claims', 'pending', 'rejected')
+        db.session.execute(
+            db.update(Claim).where(*competing).values(status='rejected', version=Claim.version + 1, updated_at=now),
+            execution_options={'synchronize_session': False}
+        )
+    
+    apply_deltas(db.session.connection(), deltas)
+    changed = list(winners.values())
+    for claim_id in winners.values():
+        changed += results[claim_id]['rejected_claims']
+    record_claim_events(changed)
+    
+    for result in results.values():
+        result.pop('version', None)
+        result.pop('item_status', None)
+        winner = result.pop('winner', None)
+        if winner and results[winner]['outcome'] != 'updated':
+            result.update(outcome='conflict', status='pending',
+                          error='Another claim on this item could not be approved, retry on its own')
+    
+    return results
+
+def reject_pending_claims(claim_ids):
+    """Reject pending claims with one UPDATE per chunk; the caller commits"""
+    now = datetime.utcnow()
+    deltas = Counter()
+    results = {claim_id: {'claim_id': claim_id, 'outcome': 'not_found'} for claim_id in claim_ids}
+    
+    for chunk in chunked(claim_ids):
+        to_update = []
+        for claim_id, status in db.session.query(Claim.claim_id, Claim.status).filter(Claim.claim_id.in_(chunk)):
+            if status == 'pending':
+                results[claim_id].update(outcome='updated', status='rejected')
+                to_update.append(claim_id)
+            else:
+                results[claim_id].update(outcome='conflict', status=status, error=f'Claim is already {status}')
+        
+        if to_update:
+            rejected = db.session.execute(
+                db.update(Claim)
+                .where(Claim.claim_id.in_(to_update), Claim.status == 'pending')
+                .values(status='rejected', version=Claim.version + 1, updated_at=now),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            deltas['claims:status:pending'] -= rejected
+            deltas['claims:status:rejected'] += rejected
+            record_claim_events(to_update)
+    
+    apply_deltas(db.session.connection(), deltas)
+    return results
+
+def lease_available(user_id, now):
+    """SQL condition: the item is not leased by another admin"""
+    return db.or_(Item.lease_owner.is_(None), Item.lease_owner == user_id,
+                  Item.lease_expires_at.is_(None), Item.lease_expires_at <= now)
+
+def changed_by_update(item_ids, new_status, now, user_id, results):
+    """
+    Ids among `item_ids` that a bulk UPDATE stamped, for when its rowcount fell short.
+    
+    The others changed between the SELECT and the UPDATE; their results say what they are now.
+    """
+    changed = []
+    rows = (db.session.query(Item.item_id, Item.status, Item.updated_at)
+            .filter(Item.item_id.in_(item_ids))
+            .add_columns(lease_available(user_id, now)))
+    for item_id, status, updated_at, available in rows:
+        if status == new_status and updated_at == now:
+            changed.append(item_id)
+        elif not available:
+            results[item_id].update(outcome='leased', status=status)
+        else:
+            results[item_id].update(outcome='unchanged', status=status)
+    return changed
+
+def queue_filters(args):
+    """Category/type filters shared by the queue listing and leasing"""
+    filters = [Item.status == 'pending']
+    if args.get('category'):
+        filters.append(Item.category == args['category'])
+    if args.get('item_type'):
+        filters.append(Item.item_type == args['item_type'])
+    return filters
+
+def queue_entry(item):
+    """Item dict with the lease it is under, for the moderation queue"""
+    entry = item.to_dict()
+    entry['lease_owner'] = item.lease_owner
+    entry['lease_expires_at'] = item.lease_expires_at.isoformat() if item.lease_expires_at else None
+    return entry
+
+@admin_bp.route('/queue', methods=['GET'])
 @admin_bp.route('/items/pending', methods=['GET'])
 @require_auth
 @require_admin
 def get_pending_items(current_user_id):
-    """Get pending items for verification"""
-    items = Item.query.filter_by(status='pending').all()
+    """
+    Get pending items for verification, oldest first, one page at a time.
+    
+    Pages are keyset paginated over the (status, created_at, item_id)
+    index: pass the returned `next_cursor` as `cursor` to get the next page.
+    With `available=1`, items leased by other admins are left out.
+    """
+    limit = max(1, min(request.args.get('limit', QUEUE_PAGE_SIZE, type=int), QUEUE_MAX_PAGE_SIZE))
+    now = datetime.utcnow()
+    filters = queue_filters(request.args)
+    if request.args.get('available', '').lower() in ('1', 'true', 'yes'):
+        filters.append(lease_available(current_user_id, now))
+    
+    query = Item.query.filter(*filters)
+    total = query.count()
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            created_at, item_id = cursor.rsplit('_', 1)
+            created_at, item_id = datetime.fromisoformat(created_at), int(item_id)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(db.or_(
+            Item.created_at > created_at,
+            db.and_(Item.created_at == created_at, Item.item_id > item_id)
+        ))
+    
+    items = query.order_by(Item.created_at, Item.item_id).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = f'{items[-1].created_at.isoformat()}_{items[-1].item_id}'
+    
+    return jsonify({
+        'total': total,
+        'items': [queue_entry(item) for item in items],
+        'next_cursor': next_cursor
+    }), 200
+
+@admin_bp.route('/queue/lease', methods=['POST'])
+@require_auth
+@require_admin
+def lease_queue_items(current_user_id):
+    """
+    Reserve the oldest available pending items for the current admin.
+    
+    Request: {"count": 10, "category": "...", "item_type": "..."}
+    One guarded UPDATE takes the items, so admins leasing at the same time
+    always get disjoint batches. Leases expire after MODERATION_LEASE_SECONDS.
+    """
+    data = request.get_json(silent=True) or {}
+    count = data.get('count', 10)
+    if not isinstance(count, int) or not 1 <= count <= LEASE_MAX_BATCH:
+        return jsonify({'error': f'count must be between 1 and {LEASE_MAX_BATCH}'}), 400
+    
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=current_app.config['MODERATION_LEASE_SECONDS'])
+    token = secrets.token_hex(16)
+    free = db.or_(Item.lease_expires_at.is_(None), Item.lease_expires_at <= now)
+    filters = queue_filters(data) + [free]
+    
+    candidates = (db.select(Item.item_id)
+                  .where(*filters)
+                  .order_by(Item.created_at, Item.item_id)
+                  .limit(count))
+    db.session.execute(
+        db.update(Item)
+        .where(Item.item_id.in_(candidates), Item.status == 'pending', free)
+        .values(lease_owner=current_user_id, lease_token=token, lease_expires_at=expires_at),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    
+    items = Item.query.filter_by(lease_token=token).order_by(Item.created_at, Item.item_id).all()
+    
+    return jsonify({
+        'lease_token': token,
+        'expires_at': expires_at.isoformat(),
+        'items': [queue_entry(item) for item in items]
+    }), 200
+
+@admin_bp.route('/queue/release', methods=['POST'])
+@require_auth
+@require_admin
+def release_queue_items(current_user_id):
+    """
+    Give back leased items so other admins can pick them up.
+    
+    Request: {"item_ids": [...]} or {"lease_token": "..."}; with neither,
+    every lease held by the current admin is released.
+    """
+    data = request.get_json(silent=True) or {}
+    filters = [Item.lease_owner == current_user_id]
+    
+    if 'item_ids' in data:
+        item_ids, error = parse_bulk_ids(data, 'item_ids')
+        if error:
+            return jsonify({'error': error}), 400
+        filters.append(Item.item_id.in_(item_ids))
+    elif data.get('lease_token'):
+        filters.append(Item.lease_token == data['lease_token'])
+    
+    released = db.session.execute(
+        db.update(Item).where(*filters).values(lease_owner=None, lease_token=None, lease_expires_at=None),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    
+    return jsonify({'message': f'{released} items released', 'released': released}), 200
+
+@admin_bp.route('/stats', methods=['GET'])
+@require_auth
+@require_admin
+@use_replica
+def get_stats(current_user_id):
+    """Dashboard statistics, read from counters kept up to date on every write"""
+    days = max(1, min(request.args.get('days', 30, type=int), 366))
+    
+    return jsonify(read_stats(days)), 200
+
+@admin_bp.route('/timeseries', methods=['GET'])
+@require_auth
+@require_admin
+@use_replica
+def get_timeseries(current_user_id):
+    """
+    Daily trends for charts, read from the rollup tables.
+    
+    metric=reports gives items reported per day, split by `group_by`
+    (item_type, category or status); metric=claims gives claims per day by
+    outcome with the approval rate. Rollups are refreshed by `flask stats rollup`.
+    """
+    metric = request.args.get('metric', 'reports')
+    group_by = request.args.get('group_by', 'item_type')
+    
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') \
+            else datetime.utcnow().date()
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') \
+            else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    if start > end or (end - start).days >= 366:
+        return jsonify({'error': 'Date range must be between 1 and 366 days'}), 400
+    
+    if metric == 'reports':
+        if group_by not in ('item_type', 'category', 'status'):
+            return jsonify({'error': 'group_by must be item_type, category or status'}), 400
+        data = report_series(start, end, group_by=group_by,
+                             category=request.args.get('category'), item_type=request.args.get('item_type'))
+    elif metric == 'claims':
+        data = claim_series(start, end)
+    else:
+        return jsonify({'error': 'metric must be reports or claims'}), 400
+    
+    data['metric'] = metric
+    return jsonify(data), 200
+
+@admin_bp.route('/export/<kind>', methods=['GET'])
+@require_auth
+@require_admin
+def export_records(kind, current_user_id):
+    """Stream every item or claim, live and archived, as CSV"""
+    if kind not in EXPORTS:
+        return jsonify({'error': 'Unknown export'}), 404
+    
+    live, archive, columns = EXPORTS[kind]
+    status = request.args.get('status')
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns + ['archived'])
+        for model, archived in ((live, 0), (archive, 1)):
+            query = db.session.query(*[getattr(model, name) for name in columns]).order_by(getattr(model, columns[0]))
+            if status:
+                query = query.filter(model.status == status)
+            for row in query.yield_per(1000):
+                writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row]
+                                + [archived])
+                if buffer.tell() > EXPORT_FLUSH_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue()
+    
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={kind}.csv'})
+
+@admin_bp.route('/items/duplicates', methods=['GET'])
+@require_auth
+@require_admin
+def get_duplicate_candidates(current_user_id):
+    """List pairs of items whose photos are perceptually near-identical"""
+    radius = min(request.args.get('radius', current_app.config['PHOTO_HASH_RADIUS'], type=int), 16)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 500))
+    after_id = request.args.get('after_id', 0, type=int)
+    
+    pairs, next_after_id = get_photo_index().candidate_pairs(radius=radius, after_id=after_id, limit=limit)
+    
+    item_ids = {item_id for _, a, b in pairs for item_id in (a, b)}
+    items = {item.item_id: item for item in Item.query.filter(Item.item_id.in_(item_ids)).all()} if item_ids else {}
+    
+    pairs_data = []
+    for distance, a, b in pairs:
+        if a in items and b in items:
+            pairs_data.append({
+                'distance': distance,
+                'same_type': items[a].item_type == items[b].item_type,
+                'items': [items[a].to_dict(), items[b].to_dict()]
+            })
     
     return jsonify({
-        'total': len(items),
-        'items': [item.to_dict() for item in items]
+        'total': len(pairs_data),
+        'radius': radius,
+        'next_after_id': next_after_id,
+        'pairs': pairs_data
     }), 200
 
 @admin_bp.route('/items/<int:item_id>/verify', methods=['PUT'])
@@ -43,17 +473,25 @@ def verify_item(item_id, current_user_id):
     if not item:
         return jsonify({'error': 'Item not found'}), 404
     
+    if item.leased_by_other(current_user_id):
+        return jsonify({'error': 'Item is being moderated by another admin'}), 409
+    
     data = request.get_json() or {}
     action = data.get('action')  # 'approve' or 'reject'
     
+    newly_verified = action == 'approve' and item.status != 'verified'
     if action == 'approve':
         item.is_verified = True
         item.status = 'verified'
+        item.verified_at = item.verified_at or datetime.utcnow()
     elif action == 'reject':
         item.status = 'rejected'
     else:
         return jsonify({'error': 'Invalid action'}), 400
     
+    item.lease_owner = item.lease_token = item.lease_expires_at = None
+    if newly_verified:
+        items_verified([item.item_id])
     db.session.commit()
     
     return jsonify({
@@ -66,14 +504,27 @@ def verify_item(item_id, current_user_id):
 @require_admin
 def update_item_status(item_id, current_user_id):
     """Update item status"""
+    data = request.get_json() or {}
+    new_status = data.get('status')
+    # Anything else would also leave a stray items:status counter behind
+    if new_status not in Item.STATUSES:
+        return jsonify({'error': f'Status must be one of: {", ".join(Item.STATUSES)}'}), 400
+    
     item = Item.query.get(item_id)
     
     if not item:
         return jsonify({'error': 'Item not found'}), 404
     
-    data = request.get_json() or {}
-    new_status = data.get('status')
+    if item.leased_by_other(current_user_id):
+        return jsonify({'error': 'Item is being moderated by another admin'}), 409
+    
+    newly_verified = new_status == 'verified' and item.status != 'verified'
     item.status = new_status
+    if new_status == 'verified':
+        item.verified_at = item.verified_at or datetime.utcnow()
+    item.lease_owner = item.lease_token = item.lease_expires_at = None
+    if newly_verified:
+        items_verified([item.item_id])
     
     db.session.commit()
     
@@ -82,14 +533,97 @@ def update_item_status(item_id, current_user_id):
         'item': item.to_dict()
     }), 200
 
+@admin_bp.route('/items/bulk', methods=['POST'])
+@require_auth
+@require_admin
+def bulk_moderate_items(current_user_id):
+    """
+    Approve, reject or set the status of many items in one transaction.
+    
+    Request: {"item_ids": [...], "action": "approve" | "reject" | "status", "status": "..."}
+    Each chunk of ids is written with a single UPDATE ... WHERE item_id IN (...).
+    """
+    data = request.get_json() or {}
+    item_ids, error = parse_bulk_ids(data, 'item_ids')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    action = data.get('action')
+    now = datetime.utcnow()
+    if action == 'approve':
+        values = {'status': 'verified', 'is_verified': True}
+    elif action == 'reject':
+        values = {'status': 'rejected'}
+    elif action == 'status' and data.get('status') in Item.STATUSES:
+        values = {'status': data['status']}
+    else:
+        return jsonify({'error': 'Invalid action'}), 400
+    values.update(updated_at=now, lease_owner=None, lease_token=None, lease_expires_at=None)
+    if values['status'] == 'verified':
+        values['verified_at'] = db.func.coalesce(Item.verified_at, now)
+    
+    results = {item_id: {'item_id': item_id, 'outcome': 'not_found'} for item_id in item_ids}
+    deltas = Counter()
+    updated = 0
+    
+    for chunk in chunked(item_ids):
+        current = (db.session.query(Item.item_id, Item.status, Item.created_at)
+                   .filter(Item.item_id.in_(chunk))
+                   .add_columns(lease_available(current_user_id, now))
+                   .all())
+        to_update = {}  # Old status -> {item_id: created_at}
+        for item_id, status, created_at, available in current:
+            if not available:
+                results[item_id].update(outcome='leased', status=status)
+            elif status == values['status']:
+                results[item_id].update(outcome='unchanged', status=status)
+            else:
+                to_update.setdefault(status, {})[item_id] = created_at
+        
+        changed = []
+        for status, created in to_update.items():
+            # Guarded on the old status, so the counters only move for rows this UPDATE changed
+            count = db.session.execute(
+                db.update(Item)
+                .where(Item.item_id.in_(created), Item.status == status, lease_available(current_user_id, now))
+                .values(**values),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            ids = list(created) if count == len(created) else changed_by_update(
+                created, values['status'], now, current_user_id, results)
+            for item_id in ids:
+                results[item_id].update(outcome='updated', status=values['status'])
+                status_change(deltas, 'items', status, values['status'])
+                if status == 'pending' and values['status'] == 'verified':
+                    record_verification(deltas, created[item_id], now)
+            changed += ids
+        
+        updated += len(changed)
+        if changed and values['status'] == 'verified':
+            items_verified(changed)
+    
+    apply_deltas(db.session.connection(), deltas)
+    db.session.commit()
+    
+    return jsonify({
+        'message': f'{updated} items updated',
+        'updated': updated,
+        'results': list(results.values())
+    }), 200
+
 # ============== CLAIMS MANAGEMENT ENDPOINTS ==============
 
+def with_claim_details(query, claim_model, item_model):
+    """Load each claim's item, the item's reporter and the claimer in the claims SELECT instead of per claim"""
+    return query.options(joinedload(claim_model.item).joinedload(item_model.reporter),
+                         joinedload(claim_model.user))
+
 @admin_bp.route('/claims/pending', methods=['GET'])
 @require_auth
 @require_admin
 def get_pending_claims(current_user_id):
     """Get all pending claims awaiting admin review"""
-    claims = Claim.query.filter_by(status='pending').all()
+    claims = with_claim_details(Claim.query.filter_by(status='pending'), Claim, Item).all()
     
     # Include item and user details
     claims_data = []
@@ -109,22 +643,22 @@ def get_pending_claims(current_user_id):
 @require_auth
 @require_admin
 def get_all_claims(current_user_id):
-    """Get all claims (all statuses)"""
+    """Get all claims (all statuses), archived ones included unless include_archived=0"""
     status = request.args.get('status')  # Optional filter by status
+    include_archived = request.args.get('include_archived', '1').lower() not in ('0', 'false', 'no')
     
-    if status:
-        claims = Claim.query.filter_by(status=status).all()
-    else:
-        claims = Claim.query.all()
+    models = [(Claim, Item), (ClaimArchive, ItemArchive)] if include_archived else [(Claim, Item)]
     
     # Include item and user details
     claims_data = []
-    for claim in claims:
-        claim_dict = claim.to_dict()
-        claim_dict['item'] = claim.item.to_dict() if claim.item else None
-        claim_dict['claimer'] = claim.user.to_dict() if claim.user else None
-        claim_dict['item_reporter'] = claim.item.reporter.to_dict() if claim.item and claim.item.reporter else None
-        claims_data.append(claim_dict)
+    for model, item_model in models:
+        query = model.query.filter_by(status=status) if status else model.query
+        for claim in with_claim_details(query, model, item_model).all():
+            claim_dict = claim.to_dict()
+            claim_dict['item'] = claim.item.to_dict() if claim.item else None
+            claim_dict['claimer'] = claim.user.to_dict() if claim.user else None
+            claim_dict['item_reporter'] = claim.item.reporter.to_dict() if claim.item and claim.item.reporter else None
+            claims_data.append(claim_dict)
     
     return jsonify({
         'total': len(claims_data),
@@ -135,23 +669,34 @@ def get_all_claims(current_user_id):
 @require_auth
 @require_admin
 def approve_claim(claim_id, current_user_id):
-    """Approve a claim - mark item as claimed and transfer ownership"""
+    """
+    Approve a claim - mark item as claimed and transfer ownership.
+    
+    Runs as one transaction of guarded UPDATEs: the claim must still be
+    pending (and at the `version` the admin loaded, if given) and the item
+    must not be claimed yet, so two admins can never both approve. Every
+    other pending claim on the item is rejected in the same transaction.
+    """
     claim = Claim.query.get(claim_id)
     
     if not claim:
         return jsonify({'error': 'Claim not found'}), 404
     
-    claim.status = 'approved'
+    data = request.get_json(silent=True) or {}
+    outcome = approve_claims([claim_id], expected_versions={claim_id: data.get('version')})[claim_id]
     
-    # Mark item as claimed
-    if claim.item:
-        claim.item.status = 'claimed'
+    if outcome['outcome'] != 'updated':
+        db.session.rollback()
+        # not_found: deleted between the lookup above and the guarded UPDATE
+        code = 404 if outcome['outcome'] == 'not_found' else 409
+        return jsonify({'error': outcome.get('error', 'Claim not found')}), code
     
     db.session.commit()
     
     return jsonify({
         'message': 'Claim approved successfully',
-        'claim': claim.to_dict()
+        'claim': claim.to_dict(),
+        'rejected_claims': outcome['rejected_claims']
     }), 200
 
 @admin_bp.route('/claims/<int:claim_id>/reject', methods=['PUT'])
@@ -166,13 +711,56 @@ def reject_claim(claim_id, current_user_id):
     
     claim.status = 'rejected'
     
-    db.session.commit()
+    try:
+        db.session.flush()
+        record_claim_events([claim.claim_id])
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': 'Claim was changed by another admin, reload and try again'}), 409
     
     return jsonify({
         'message': 'Claim rejected',
         'claim': claim.to_dict()
     }), 200
 
+@admin_bp.route('/claims/bulk', methods=['POST'])
+@require_auth
+@require_admin
+def bulk_moderate_claims(current_user_id):
+    """
+    Approve or reject many pending claims in one transaction.
+    
+    Request: {"claim_ids": [...], "action": "approve" | "reject"}
+    Only pending claims are moderated. Approval follows the same rules as
+    approving a single claim, so when several claims in the request target
+    the same item the first one wins and the others are rejected.
+    """
+    data = request.get_json() or {}
+    claim_ids, error = parse_bulk_ids(data, 'claim_ids')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    action = data.get('action')
+    if action == 'approve':
+        results = approve_claims(claim_ids)
+    elif action == 'reject':
+        results = reject_pending_claims(claim_ids)
+    else:
+        return jsonify({'error': 'Invalid action'}), 400
+    
+    db.session.commit()
+    
+    updated = sum(1 for result in results.values() if result['outcome'] == 'updated')
+    return jsonify({
+        'message': f'{updated} claims updated',
+        'updated': updated,
+        'results': [
+            {key: value for key, value in result.items() if key != 'rejected_claims'}
+            for result in results.values()
+        ]
+    }), 200
+
 @admin_bp.route('/claims/<int:claim_id>/notes', methods=['PUT'])
 @require_auth
 @require_admin
@@ -0,0 +1,67 @@
+"""Server-sent events stream replacing polling for claim status and new items"""
+
+from flask import request, jsonify, current_app, Response, stream_with_context
+from app import db
+from app.routes import items_bp
+from app.utils.auth import verify_token
+from app.utils.events import get_event_broker, get_event_bridge, replay_events, format_event
+
+@items_bp.route('/events', methods=['GET'])
+def stream_events():
+    """
+    Stream newly verified items and, for a signed-in user, their claim status changes.
+    
+    EventSource can't send headers, so the token may come as ?token=. Items
+    can be narrowed with repeated ?category= and ?item_type= parameters.
+    A reconnecting client's Last-Event-ID header replays what it missed.
+    The stream holds no database connection while it waits, but it does
+    keep one of the worker's request threads for as long as it is open.
+    """
+    user_id = None
+    token = request.args.get('token') or request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if token:
+        user_id = verify_token(token)
+        if not user_id:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+    
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id', ''))
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+    heartbeat = current_app.config['EVENTS_HEARTBEAT_SECONDS']
+    
+    get_event_bridge().start()
+    broker = get_event_broker()
+    # Subscribe before replaying so nothing falls between the two; duplicates are skipped by id
+    subscriber = broker.subscribe(user_id=user_id,
+                                  categories=request.args.getlist('category'),
+                                  item_types=request.args.getlist('item_type'))
+    
+    def generate():
+        try:
+            yield f'retry: {current_app.config["EVENTS_RETRY_MS"]}\n\n'
+            sent = 0
+            if last_event_id is not None:
+                sent = last_event_id
+                for event_id, kind, event_user_id, payload in replay_events(last_event_id, user_id):
+                    if subscriber.wants(kind, event_user_id, payload):
+                        yield format_event(event_id, kind, payload)
+                    sent = event_id
+            # The stream may stay open for hours; give its pooled connection back before waiting
+            db.session.remove()
+            
+            while True:
+                events = subscriber.wait(heartbeat)
+                if not events:
+                    # Comment line; keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                for event_id, kind, payload in events:
+                    if event_id > sent:
+                        yield format_event(event_id, kind, payload)
+                        sent = event_id
+        finally:
+            broker.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop nginx from buffering the stream
+    })
@@ -2,13 +2,20 @@
 
 from flask import request, jsonify, send_file, current_app
 from app.routes import items_bp
-from app.models import Item, User
+from app.models import Item, ItemPhoto, User, PhotoUpload
 from app import db
 from app.utils import require_auth
 from app.utils.validators import validate_image, secure_upload_filename, validate_item_data, sanitize_text_input, validate_search_query
 from app.utils.security import rate_limit, log_security_event, detect_suspicious_activity
+from app.utils.replica import use_replica
+from app.utils.images import store_upload, get_photo_executor, ORIGINALS_DIR
+from app.utils.phash import get_photo_index
+from app.utils.matching import get_match_index, match_query
+from app.routes.upload_routes import open_completed_upload, remove_partial_upload
+from concurrent.futures import wait
 from datetime import datetime
 import os
+import secrets
 
 @items_bp.route('/report', methods=['POST'])
 @require_auth
@@ -22,19 +29,40 @@ def report_item(current_user_id):
         print(f"[REPORT] Suspicious activity detected for user {current_user_id}")
         log_security_event('suspicious_upload', f'User {current_user_id} making rapid uploads')
     
-    # Validate photo upload
-    if 'photo' not in request.files:
+    # Photos come with the form ('photos', or 'photo' from older clients)
+    # and/or as finalized chunked uploads
+    files = request.files.getlist('photos') + request.files.getlist('photo')
+    upload_ids = request.form.getlist('upload_id')
+    
+    if not files and not upload_ids:
         print(f"[REPORT] No photo uploaded")
         return jsonify({'error': 'No photo uploaded'}), 400
     
-    file = request.files['photo']
-    print(f"[REPORT] Photo received: {file.filename}")
-    is_valid, message = validate_image(file)
-    
-    if not is_valid:
-        print(f"[REPORT] Invalid image: {message}")
-        log_security_event('invalid_image_upload', f'Invalid image: {message}')
-        return jsonify({'error': message}), 400
+    max_photos = current_app.config['MAX_PHOTOS_PER_ITEM']
+    if len(files) + len(set(upload_ids)) > max_photos:
+        return jsonify({'error': f'At most {max_photos} photos can be attached to an item'}), 400
+    
+    uploads = []
+    if upload_ids:
+        found = {upload.upload_id: upload for upload in PhotoUpload.query.filter(
+            PhotoUpload.upload_id.in_(upload_ids),
+            PhotoUpload.user_id == current_user_id,
+            PhotoUpload.status == 'complete'
+        ).all()}
+        if len(found) != len(set(upload_ids)):
+            print(f"[REPORT] Unknown or unfinished upload in {upload_ids}")
+            return jsonify({'error': 'Upload not found or not finalized'}), 400
+        uploads = [found[upload_id] for upload_id in dict.fromkeys(upload_ids)]
+        print(f"[REPORT] Using chunked uploads: {[upload.filename for upload in uploads]}")
+    
+    # Validate form photos in parallel; chunked uploads were validated when finalized
+    executor = get_photo_executor()
+    print(f"[REPORT] Photos received: {[file.filename for file in files]}")
+    for is_valid, message in executor.map(validate_image, files):
+        if not is_valid:
+            print(f"[REPORT] Invalid image: {message}")
+            log_security_event('invalid_image_upload', f'Invalid image: {message}')
+            return jsonify({'error': message}), 400
     
     # Validate and sanitize form data
     form_data = {
@@ -53,15 +81,34 @@ def report_item(current_user_id):
         print(f"[REPORT] Validation errors: {errors}")
         return jsonify({'error': 'Validation failed', 'details': errors}), 400
     
-    # Save file with secure filename
-    filename = secure_upload_filename(file.filename)
+    opened = [open_completed_upload(upload) for upload in uploads]
+    sources = files + opened
+    consumed_upload_ids = [upload.upload_id for upload in uploads]
+    
+    # Save files with secure, unique filenames; the first photo is the cover
     timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S_')
-    filename = timestamp + filename
+    filenames = [f'{timestamp}{secrets.token_hex(4)}_{secure_upload_filename(source.filename)}'
+                 for source in sources]
     
-    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    written_paths = [os.path.join(upload_folder, folder, filename)
+                     for filename in filenames for folder in ('', ORIGINALS_DIR)]
     
     try:
-        file.save(filepath)
+        # Re-encode without metadata and capped in size instead of storing the bytes as received
+        futures = [executor.submit(
+            store_upload,
+            source,
+            upload_folder,
+            filename,
+            max_edge=current_app.config['IMAGE_MAX_EDGE'],
+            quality=current_app.config['IMAGE_QUALITY'],
+            keep_original=current_app.config['KEEP_ORIGINAL_UPLOADS']
+        ) for source, filename in zip(sources, filenames)]
+        wait(futures)
+        stored = [future.result() for future in futures]
+        print(f"[REPORT] Photos normalized: {sum(s.original_size for s in stored)} -> "
+              f"{sum(s.stored_size for s in stored)} bytes")
         
         # Create item record with sanitized data
         item = Item(
@@ -69,31 +116,136 @@ def report_item(current_user_id):
             description=sanitized['description'],
             category=sanitized['category'],
             item_type=sanitized['item_type'],
-            photo_path=f'uploads/{filename}',
+            photo_path=f'uploads/{filenames[0]}',
+            photo_hash=stored[0].photo_hash,
             date=sanitized['date'],
             location=sanitized['location'],
             user_id=current_user_id
         )
+        item.photos = [
+            ItemPhoto(path=f'uploads/{filename}', photo_hash=result.photo_hash, position=position)
+            for position, (filename, result) in enumerate(zip(filenames, stored))
+        ]
         
         db.session.add(item)
+        for upload in uploads:
+            db.session.delete(upload)
+        # Read what the response and the match lookups need before the commit expires the item,
+        # instead of loading it and its photos back afterwards
+        db.session.flush()
+        item_data = item.to_dict()
+        item_data['photos'] = [photo.to_dict() for photo in item.photos]
+        photo_hashes = [photo.photo_hash for photo in item.photos if photo.photo_hash]
+        query = match_query(item)
         db.session.commit()
         
-        log_security_event('item_reported', f'Item reported by user {current_user_id}: {item.title}')
-        
-        return jsonify({
-            'message': 'Item reported successfully',
-            'item': item.to_dict()
-        }), 201
-        
     except Exception as e:
         db.session.rollback()
         log_security_event('item_upload_error', f'Error saving item: {str(e)}')
         
-        # Clean up uploaded file if database save failed
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        # Clean up uploaded files if database save failed
+        for path in written_paths:
+            if os.path.exists(path):
+                os.remove(path)
         
         return jsonify({'error': 'Failed to save item. Please try again.'}), 500
+    
+    finally:
+        for source in opened:
+            source.close()
+    
+    for upload_id in consumed_upload_ids:
+        remove_partial_upload(upload_id)
+    
+    log_security_event('item_reported', f"Item reported by user {current_user_id}: {item_data['title']}")
+    
+    duplicates, matches = find_similar_items(item_data['item_id'], item_data['item_type'], photo_hashes)
+    if duplicates:
+        print(f"[REPORT] Possible duplicate of items {[d['item_id'] for d in duplicates]}")
+    suggested = find_text_matches(query)
+    
+    return jsonify({
+        'message': 'Item reported successfully',
+        'item': item_data,
+        'possible_duplicates': duplicates,
+        'possible_matches': matches,
+        'suggested_matches': suggested
+    }), 201
+
+def find_similar_items(item_id, item_type, hashes, limit=5):
+    """
+    Find items with a photo perceptually close to one of an item's photo hashes.
+    
+    Returns (duplicates, matches): reports of the same type are likely
+    duplicates, reports of the opposite type are possible lost/found matches.
+    """
+    if not hashes:
+        return [], []
+    
+    radius = current_app.config['PHOTO_HASH_RADIUS']
+    index = get_photo_index()
+    closest = {}
+    for photo_hash in hashes:
+        for distance, other_id in index.search(photo_hash, radius):
+            if other_id != item_id and distance < closest.get(other_id, radius + 1):
+                closest[other_id] = distance
+    hits = sorted((distance, other_id) for other_id, distance in closest.items())
+    if not hits:
+        return [], []
+    
+    # The index may hold ids of deleted items; only keep rows that still exist
+    candidates = Item.query.filter(
+        Item.item_id.in_([other_id for _, other_id in hits]),
+        Item.status != 'rejected'
+    ).all()
+    by_id = {candidate.item_id: candidate for candidate in candidates}
+    
+    duplicates, matches = [], []
+    for distance, other_id in hits:
+        other = by_id.get(other_id)
+        if not other:
+            continue
+        entry = {
+            'item_id': other.item_id,
+            'title': other.title,
+            'item_type': other.item_type,
+            'status': other.status,
+            'distance': distance
+        }
+        if other.item_type == item_type:
+            duplicates.append(entry)
+        else:
+            matches.append(entry)
+    
+    return duplicates[:limit], matches[:limit]
+
+def find_text_matches(query, limit=5):
+    """
+    Verified reports of the opposite type whose text is closest to the
+    item's match_query, in the same category and date window, best first.
+    """
+    window = current_app.config['MATCH_WINDOW_DAYS']
+    # Ask for extra candidates; some may have been claimed or removed since they were indexed
+    hits = get_match_index().matches_for(query, window=window, limit=limit * 4)
+    if not hits:
+        return []
+    
+    candidates = Item.query.filter(
+        Item.item_id.in_([item_id for _, item_id in hits]),
+        Item.status == 'verified'
+    ).all()
+    by_id = {candidate.item_id: candidate for candidate in candidates}
+    
+    matches = []
+    for score, item_id in hits:
+        other = by_id.get(item_id)
+        if not other:
+            continue
+        entry = other.to_dict()
+        entry['score'] = round(score, 3)
+        matches.append(entry)
+    
+    return matches[:limit]
 
 @items_bp.route('/my-items', methods=['GET'])
 @require_auth
@@ -108,6 +260,7 @@ def get_my_items(current_user_id):
 
 @items_bp.route('', methods=['GET'])
 @rate_limit('default')
+@use_replica
 def get_items():
     """Enhanced item browsing with advanced search and filtering"""
     # Get query parameters
@@ -128,8 +281,8 @@ def get_items():
         if error:
             return jsonify({'error': error}), 400
     
-    # Build base query
-    query = Item.query.filter_by(is_verified=True)
+    # Build base query; expired items stay out of browse
+    query = Item.query.filter(Item.is_verified.is_(True), Item.status != 'expired')
     
     # Apply filters
     if category:
@@ -208,6 +361,7 @@ def get_items():
     }), 200
 
 @items_bp.route('/<int:item_id>', methods=['GET'])
+@use_replica
 def get_item(item_id):
     """Get item details"""
     item = Item.query.get(item_id)
@@ -215,11 +369,42 @@ def get_item(item_id):
     if not item:
         return jsonify({'error': 'Item not found'}), 404
     
-    return jsonify(item.to_dict()), 200
+    item_data = item.to_dict()
+    item_data['photos'] = [photo.to_dict() for photo in item.photos]
+    
+    # Items reported before item_photos existed only have their cover photo
+    if not item_data['photos'] and item.photo_path:
+        item_data['photos'] = [{
+            'photo_id': None,
+            'item_id': item.item_id,
+            'photo_path': item.photo_path,
+            'photo_hash': item.photo_hash,
+            'position': 0
+        }]
+    
+    return jsonify(item_data), 200
+
+@items_bp.route('/<int:item_id>/matches', methods=['GET'])
+@rate_limit('default')
+@use_replica
+def get_item_matches(item_id):
+    """Get likely lost/found counterparts of an item by text similarity"""
+    item = Item.query.get(item_id)
+    
+    if not item:
+        return jsonify({'error': 'Item not found'}), 404
+    
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    
+    return jsonify({
+        'item_id': item_id,
+        'window_days': current_app.config['MATCH_WINDOW_DAYS'],
+        'matches': find_text_matches(match_query(item), limit=limit)
+    }), 200
 
 @items_bp.route('/<int:item_id>/photo', methods=['GET'])
 def get_photo(item_id):
-    """Get item photo"""
+    """Get item cover photo"""
     item = Item.query.get(item_id)
     
     if not item or not item.photo_path:
@@ -232,6 +417,21 @@ def get_photo(item_id):
     
     return send_file(filepath), 200
 
+@items_bp.route('/<int:item_id>/photos/<int:photo_id>', methods=['GET'])
+def get_item_photo(item_id, photo_id):
+    """Get one of an item's photos"""
+    photo = ItemPhoto.query.filter_by(photo_id=photo_id, item_id=item_id).first()
+    
+    if not photo:
+        return jsonify({'error': 'Photo not found'}), 404
+    
+    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], os.path.basename(photo.path))
+    
+    if not os.path.exists(filepath):
+        return jsonify({'error': 'Photo file not found'}), 404
+    
+    return send_file(filepath), 200
+
 @items_bp.route('/<int:item_id>/claim', methods=['POST'])
 @require_auth
 def claim_item(item_id, current_user_id):
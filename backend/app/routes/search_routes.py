@@ -0,0 +1,132 @@
+"""Saved search and alert endpoints"""
+
+from flask import request, jsonify, current_app
+from app.routes import items_bp
+from app.models import SavedSearch, SearchAlert
+from app import db
+from app.utils import require_auth
+from app.utils.validators import validate_search_query, sanitize_text_input
+from app.utils.percolator import compile_terms
+
+ALERTS_PAGE_SIZE = 50
+ALERTS_MAX_PAGE_SIZE = 200
+
+@items_bp.route('/searches', methods=['GET'])
+@require_auth
+def get_saved_searches(current_user_id):
+    """Get current user's saved searches"""
+    searches = (SavedSearch.query
+                .filter_by(user_id=current_user_id, is_active=True)
+                .order_by(SavedSearch.search_id)
+                .all())
+    
+    return jsonify({
+        'total': len(searches),
+        'searches': [search.to_dict() for search in searches]
+    }), 200
+
+@items_bp.route('/searches', methods=['POST'])
+@require_auth
+def create_saved_search(current_user_id):
+    """Save a search; newly verified items that match it create alerts"""
+    data = request.get_json() or {}
+    query = data.get('query') or ''
+    category = data.get('category') or None
+    item_type = data.get('item_type') or None
+    
+    if query:
+        query, error = validate_search_query(query)
+        if error:
+            return jsonify({'error': error}), 400
+    
+    valid_categories = ['electronics', 'documents', 'clothing', 'accessories', 'books', 'others']
+    if category is not None and category not in valid_categories:
+        return jsonify({'error': f'Category must be one of: {", ".join(valid_categories)}'}), 400
+    if item_type is not None and item_type not in ['lost', 'found']:
+        return jsonify({'error': 'Item type must be either "lost" or "found"'}), 400
+    
+    # A search without words or filters would alert on every item
+    if not compile_terms(query) and not category and not item_type:
+        return jsonify({'error': 'A saved search needs search words, a category or an item type'}), 400
+    
+    max_searches = current_app.config['MAX_SAVED_SEARCHES']
+    if SavedSearch.query.filter_by(user_id=current_user_id, is_active=True).count() >= max_searches:
+        return jsonify({'error': f'At most {max_searches} saved searches are allowed'}), 400
+    
+    search = SavedSearch(
+        user_id=current_user_id,
+        name=sanitize_text_input(data.get('name') or '', max_length=100) or None,
+        keywords=query,
+        category=category,
+        item_type=item_type
+    )
+    db.session.add(search)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Search saved',
+        'search': search.to_dict()
+    }), 201
+
+@items_bp.route('/searches/<int:search_id>', methods=['DELETE'])
+@require_auth
+def delete_saved_search(search_id, current_user_id):
+    """Delete one of the current user's saved searches"""
+    search = SavedSearch.query.filter_by(search_id=search_id, user_id=current_user_id, is_active=True).first()
+    
+    if not search:
+        return jsonify({'error': 'Saved search not found'}), 404
+    
+    # Deactivated rather than deleted so every worker's index sees the change
+    search.is_active = False
+    db.session.commit()
+    
+    return jsonify({'message': 'Saved search deleted'}), 200
+
+@items_bp.route('/alerts', methods=['GET'])
+@require_auth
+def get_alerts(current_user_id):
+    """
+    Get newly verified items matching the current user's saved searches, newest first.
+    
+    Pages are keyed by alert id: pass the previous `next_before_id` as `before_id`.
+    """
+    limit = min(max(request.args.get('limit', ALERTS_PAGE_SIZE, type=int), 1), ALERTS_MAX_PAGE_SIZE)
+    before_id = request.args.get('before_id', type=int)
+    unseen_only = request.args.get('unseen', '0') in ('1', 'true', 'yes')
+    
+    query = SearchAlert.query.filter(SearchAlert.user_id == current_user_id)
+    if before_id:
+        query = query.filter(SearchAlert.alert_id < before_id)
+    if unseen_only:
+        query = query.filter(SearchAlert.seen.is_(False))
+    alerts = query.order_by(SearchAlert.alert_id.desc()).limit(limit).all()
+    
+    unseen = SearchAlert.query.filter_by(user_id=current_user_id, seen=False).count()
+    
+    return jsonify({
+        'alerts': [alert.to_dict() for alert in alerts],
+        'unseen': unseen,
+        'next_before_id': alerts[-1].alert_id if len(alerts) == limit else None
+    }), 200
+
+@items_bp.route('/alerts/seen', methods=['POST'])
+@require_auth
+def mark_alerts_seen(current_user_id):
+    """Mark the current user's alerts up to and including `up_to_id` as seen"""
+    data = request.get_json() or {}
+    up_to_id = data.get('up_to_id')
+    
+    if not isinstance(up_to_id, int):
+        return jsonify({'error': 'up_to_id must be an alert id'}), 400
+    
+    marked = db.session.execute(
+        db.update(SearchAlert)
+        .where(SearchAlert.user_id == current_user_id, SearchAlert.alert_id <= up_to_id,
+               SearchAlert.seen.is_(False))
+        .values(seen=True),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    
+    return jsonify({'message': f'{marked} alerts marked as seen', 'marked': marked}), 200
@@ -0,0 +1,180 @@
+"""Resumable chunked photo upload endpoints"""
+
+from flask import request, jsonify, current_app
+from werkzeug.datastructures import FileStorage
+from app.routes import items_bp
+from app.models import PhotoUpload
+from app import db
+from app.utils import require_auth
+from app.utils.validators import allowed_file, validate_image, secure_upload_filename, MAX_FILE_SIZE
+from app.utils.security import rate_limit, log_security_event
+from app.utils.storage import partial_upload_path, write_chunk
+from datetime import datetime, timedelta
+import os
+import re
+import secrets
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+def purge_expired_uploads():
+    """Drop upload sessions (and their bytes) older than UPLOAD_SESSION_TTL_HOURS"""
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config['UPLOAD_SESSION_TTL_HOURS'])
+    expired = PhotoUpload.query.filter(PhotoUpload.created_at < cutoff).limit(100).all()
+    
+    for upload in expired:
+        remove_partial_upload(upload.upload_id)
+        db.session.delete(upload)
+    if expired:
+        db.session.commit()
+        print(f"[UPLOAD] Purged {len(expired)} expired upload sessions")
+
+def remove_partial_upload(upload_id):
+    """Delete the bytes received for an upload session"""
+    path = partial_upload_path(current_app.config['UPLOAD_FOLDER'], upload_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+def open_completed_upload(upload):
+    """Wrap the bytes of a finalized upload so it can be handled like a form file"""
+    path = partial_upload_path(current_app.config['UPLOAD_FOLDER'], upload.upload_id)
+    return FileStorage(stream=open(path, 'rb'), filename=upload.filename)
+
+def get_user_upload(upload_id, user_id):
+    """Load an upload session owned by the user, or None"""
+    return PhotoUpload.query.filter_by(upload_id=upload_id, user_id=user_id).first()
+
+@items_bp.route('/uploads', methods=['POST'])
+@require_auth
+@rate_limit('upload')
+def initiate_upload(current_user_id):
+    """Start a chunked photo upload"""
+    data = request.get_json() or {}
+    filename = secure_upload_filename(data.get('filename'))
+    size = data.get('size')
+    
+    if not allowed_file(filename):
+        return jsonify({'error': 'Only png, jpg, jpeg, gif files are allowed'}), 400
+    
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({'error': 'File size is required'}), 400
+    
+    if size > MAX_FILE_SIZE:
+        return jsonify({'error': f'File size exceeds {MAX_FILE_SIZE / 1024 / 1024}MB limit'}), 400
+    
+    purge_expired_uploads()
+    
+    upload = PhotoUpload(
+        upload_id=secrets.token_hex(16),
+        user_id=current_user_id,
+        filename=filename,
+        total_size=size
+    )
+    
+    path = partial_upload_path(current_app.config['UPLOAD_FOLDER'], upload.upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    
+    db.session.add(upload)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Upload started',
+        'upload': upload.to_dict(),
+        'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE']
+    }), 201
+
+@items_bp.route('/uploads/<upload_id>', methods=['GET'])
+@require_auth
+def get_upload(upload_id, current_user_id):
+    """Get upload progress, used to resume after a dropped connection"""
+    upload = get_user_upload(upload_id, current_user_id)
+    
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    return jsonify({'upload': upload.to_dict()}), 200
+
+@items_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@require_auth
+@rate_limit('upload')
+def upload_chunk(upload_id, current_user_id):
+    """
+    Write one byte range of the photo.
+    
+    The body is the raw bytes and Content-Range says where they go
+    ("bytes start-end/total"). A chunk may overlap what was already received
+    (a retried chunk) but must not leave a gap.
+    """
+    upload = get_user_upload(upload_id, current_user_id)
+    
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    if upload.status != 'uploading':
+        return jsonify({'error': 'Upload already finalized'}), 400
+    
+    match = CONTENT_RANGE_PATTERN.match(request.headers.get('Content-Range', ''))
+    if not match:
+        return jsonify({'error': 'Content-Range header required (bytes start-end/total)'}), 400
+    
+    start, end, total = (int(value) for value in match.groups())
+    length = end - start + 1
+    
+    if total != upload.total_size or end < start or end >= total:
+        return jsonify({'error': 'Invalid byte range'}), 416
+    
+    if start > upload.received_size:
+        return jsonify({
+            'error': 'Chunk leaves a gap; resume from received_size',
+            'upload': upload.to_dict()
+        }), 416
+    
+    if request.content_length is not None and request.content_length != length:
+        return jsonify({'error': 'Body length does not match Content-Range'}), 400
+    
+    path = partial_upload_path(current_app.config['UPLOAD_FOLDER'], upload.upload_id)
+    written = write_chunk(path, start, request.stream, length)
+    
+    if written != length:
+        # Client went away mid-chunk; keep only what is contiguous
+        upload.received_size = max(upload.received_size, start + written)
+        db.session.commit()
+        return jsonify({'error': 'Incomplete chunk', 'upload': upload.to_dict()}), 400
+    
+    upload.received_size = max(upload.received_size, end + 1)
+    db.session.commit()
+    
+    return jsonify({'upload': upload.to_dict()}), 200
+
+@items_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@require_auth
+def finalize_upload(upload_id, current_user_id):
+    """Validate the assembled photo once all bytes are in"""
+    upload = get_user_upload(upload_id, current_user_id)
+    
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    if upload.status == 'complete':
+        return jsonify({'message': 'Upload complete', 'upload': upload.to_dict()}), 200
+    
+    if upload.received_size < upload.total_size:
+        return jsonify({'error': 'Upload is incomplete', 'upload': upload.to_dict()}), 400
+    
+    file = open_completed_upload(upload)
+    try:
+        is_valid, message = validate_image(file)
+    finally:
+        file.close()
+    
+    if not is_valid:
+        log_security_event('invalid_image_upload', f'Invalid chunked upload: {message}')
+        remove_partial_upload(upload.upload_id)
+        db.session.delete(upload)
+        db.session.commit()
+        return jsonify({'error': message}), 400
+    
+    upload.status = 'complete'
+    db.session.commit()
+    
+    return jsonify({'message': 'Upload complete', 'upload': upload.to_dict()}), 200
@@ -39,6 +39,7 @@ document.addEventListener('DOMContentLoaded', async () => {
         console.log('admin-dashboard.js: User is admin, loading content');
         // User is admin, load content
         loadPendingItems();
+        loadStats();
     } catch (error) {
         console.error('admin-dashboard.js: Error checking admin access:', error);
         showMessage('Error verifying admin access: ' + error.message, 'error');
@@ -80,11 +81,33 @@ function switchTab(tabName) {
     else if (tabName === 'rejected') loadRejectedItems();
 }
 
+async function loadStats() {
+    try {
+        const stats = await apiClient.getAdminStats();
+        const byStatus = stats.items.by_status;
+        document.getElementById('pendingCount').textContent = byStatus.pending || 0;
+        document.getElementById('verifiedCount').textContent = byStatus.verified || 0;
+        document.getElementById('claimedCount').textContent = byStatus.claimed || 0;
+        document.getElementById('rejectedCount').textContent = byStatus.rejected || 0;
+        document.getElementById('claimsCount').textContent = stats.claims.pending;
+        
+        const approvedThisMonth = Object.values(stats.claims.approved_per_day).reduce((sum, n) => sum + n, 0);
+        const medianSeconds = stats.median_time_to_verify_seconds;
+        const median = medianSeconds === null ? 'n/a'
+            : medianSeconds < 3600 ? `${Math.round(medianSeconds / 60)} min`
+            : `${(medianSeconds / 3600).toFixed(1)} h`;
+        document.getElementById('adminStatsSummary').textContent =
+            `${stats.items.total} items reported · ${approvedThisMonth} claims approved in the last 30 days · median time to verify: ${median}`;
+    } catch (error) {
+        console.error('Error loading stats:', error);
+    }
+}
+
 async function loadPendingItems() {
     try {
         const response = await apiClient.getPendingItems();
         displayPendingItems(response.items || []);
-        document.getElementById('pendingCount').textContent = response.items?.length || 0;
+        document.getElementById('pendingCount').textContent = response.total ?? response.items?.length ?? 0;
     } catch (error) {
         console.error('Error loading pending items:', error);
         document.getElementById('pendingItemsList').innerHTML = `<p class="error">Error loading items: ${error.message}</p>`;
@@ -201,7 +224,7 @@ function displayPendingClaims(claims) {
                     <p>${new Date(claim.claim_date).toLocaleString()}</p>
                 </div>
                 <div class="admin-claim-actions">
-                    <button class="btn btn-success" onclick="approveClaim(${claim.claim_id})">✅ Approve Claim</button>
+                    <button class="btn btn-success" onclick="approveClaim(${claim.claim_id}, ${claim.version})">✅ Approve Claim</button>
                     <button class="btn btn-danger" onclick="rejectClaim(${claim.claim_id})">❌ Reject Claim</button>
                     <button class="btn btn-secondary" onclick="viewClaimDetails(${claim.claim_id})">👁️ View Item Photo</button>
                 </div>
@@ -297,6 +320,7 @@ async function verifyItem(itemId) {
             await apiClient.verifyItem(itemId, 'approve');
             alert('✅ Item approved and is now visible to users!');
             loadPendingItems();
+            loadStats();
         } catch (error) {
             alert('Error: ' + error.message);
         }
@@ -310,6 +334,7 @@ async function rejectItem(itemId) {
             await apiClient.verifyItem(itemId, 'reject');
             alert('❌ Item rejected. User will be notified.');
             loadPendingItems();
+            loadStats();
         } catch (error) {
             alert('Error: ' + error.message);
         }
@@ -322,6 +347,7 @@ async function changeStatus(itemId, newStatus) {
         alert('✅ Status updated');
         loadPendingItems();
         loadVerifiedItems();
+        loadStats();
     } catch (error) {
         alert('Error: ' + error.message);
     }
@@ -333,6 +359,7 @@ async function markAsReturned(itemId) {
             await apiClient.updateItemStatus(itemId, 'returned');
             alert('✅ Item marked as returned!');
             loadClaimedItems();
+            loadStats();
         } catch (error) {
             alert('Error: ' + error.message);
         }
@@ -386,12 +413,13 @@ function closeModal() {
     document.getElementById('itemModal').style.display = 'none';
 }
 
-async function approveClaim(claimId) {
-    if (confirm('Approve this claim? The item will be marked as claimed.')) {
+async function approveClaim(claimId, version = null) {
+    if (confirm('Approve this claim? The item will be marked as claimed and other pending claims on it rejected.')) {
         try {
-            await apiClient.approveClaim(claimId);
+            await apiClient.approveClaim(claimId, version);
             alert('✅ Claim approved! Item status updated to claimed.');
             loadPendingClaims();
+            loadStats();
         } catch (error) {
             alert('Error: ' + error.message);
         }
@@ -405,6 +433,7 @@ async function rejectClaim(claimId) {
             await apiClient.rejectClaim(claimId);
             alert('❌ Claim rejected. Claimant will be notified.');
             loadPendingClaims();
+            loadStats();
         } catch (error) {
             alert('Error: ' + error.message);
         }
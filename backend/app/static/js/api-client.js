@@ -82,6 +82,49 @@ class APIClient {
     }
 
     // Item endpoints
+    /**
+     * Upload a photo in chunks so a dropped connection only costs one chunk.
+     * Resolves to the upload id to send with reportItem as `upload_id`.
+     */
+    async uploadPhoto(file, maxRetries = 5) {
+        const started = await this.request('/items/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        const uploadId = started.upload.upload_id;
+        const chunkSize = started.chunk_size;
+        let offset = 0;
+        let retries = 0;
+
+        while (offset < file.size) {
+            const end = Math.min(offset + chunkSize, file.size);
+            try {
+                const result = await this.request(`/items/uploads/${uploadId}`, {
+                    method: 'PUT',
+                    headers: {
+                        'Content-Type': 'application/octet-stream',
+                        'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`
+                    },
+                    body: file.slice(offset, end)
+                });
+                offset = result.upload.received_size;
+                retries = 0;
+            } catch (error) {
+                if (++retries > maxRetries) {
+                    throw error;
+                }
+                // Ask the server how much it has and resume from there
+                await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                const status = await this.request(`/items/uploads/${uploadId}`, { method: 'GET' });
+                offset = status.upload.received_size;
+            }
+        }
+
+        await this.request(`/items/uploads/${uploadId}/finalize`, { method: 'POST' });
+        return uploadId;
+    }
+
     async reportItem(formData) {
         const url = `${API_BASE_URL}/items/report`;
         const token = this.getToken();
@@ -152,13 +195,108 @@ class APIClient {
         });
     }
 
+    // Server-sent events: claim status changes for the signed-in user and newly
+    // verified items (optionally only some categories/types). EventSource
+    // reconnects on its own and resumes from the last event it received.
+    subscribeEvents(handlers = {}, filters = {}) {
+        const params = new URLSearchParams();
+        const token = this.getToken();
+        if (token) params.append('token', token);
+        (filters.categories || []).forEach(category => params.append('category', category));
+        (filters.itemTypes || []).forEach(itemType => params.append('item_type', itemType));
+
+        const source = new EventSource(`${API_BASE_URL}/items/events?${params}`);
+        if (handlers.onClaimUpdated) {
+            source.addEventListener('claim_updated', e => handlers.onClaimUpdated(JSON.parse(e.data)));
+        }
+        if (handlers.onItemVerified) {
+            source.addEventListener('item_verified', e => handlers.onItemVerified(JSON.parse(e.data)));
+        }
+        return source;
+    }
+
+    async getSavedSearches() {
+        return this.request('/items/searches', {
+            method: 'GET'
+        });
+    }
+
+    async createSavedSearch(search) {
+        return this.request('/items/searches', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(search)
+        });
+    }
+
+    async deleteSavedSearch(searchId) {
+        return this.request(`/items/searches/${searchId}`, {
+            method: 'DELETE'
+        });
+    }
+
+    async getAlerts(unseenOnly = false, beforeId = null) {
+        const params = new URLSearchParams();
+        if (unseenOnly) params.append('unseen', '1');
+        if (beforeId) params.append('before_id', beforeId);
+        return this.request(`/items/alerts?${params}`, {
+            method: 'GET'
+        });
+    }
+
+    async markAlertsSeen(upToId) {
+        return this.request('/items/alerts/seen', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ up_to_id: upToId })
+        });
+    }
+
     // Admin endpoints
+    async getAdminStats(days = 30) {
+        return this.request(`/admin/stats?days=${days}`, {
+            method: 'GET'
+        });
+    }
+
+    async getTimeseries(metric = 'reports', params = {}) {
+        const query = new URLSearchParams({ metric, ...params });
+        return this.request(`/admin/timeseries?${query}`, {
+            method: 'GET'
+        });
+    }
+
     async getPendingItems() {
         return this.request('/admin/items/pending', {
             method: 'GET'
         });
     }
 
+    async getModerationQueue(cursor = '', limit = 50) {
+        let endpoint = `/admin/queue?limit=${limit}`;
+        if (cursor) endpoint += `&cursor=${encodeURIComponent(cursor)}`;
+        
+        return this.request(endpoint, {
+            method: 'GET'
+        });
+    }
+
+    async leaseQueueItems(count = 10) {
+        return this.request('/admin/queue/lease', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ count })
+        });
+    }
+
+    async releaseQueueItems(leaseToken) {
+        return this.request('/admin/queue/release', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ lease_token: leaseToken })
+        });
+    }
+
     async verifyItem(itemId, action) {
         return this.request(`/admin/items/${itemId}/verify`, {
             method: 'PUT',
@@ -175,6 +313,14 @@ class APIClient {
         });
     }
 
+    async bulkModerateItems(itemIds, action, status = null) {
+        return this.request('/admin/items/bulk', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ item_ids: itemIds, action, status })
+        });
+    }
+
     // Claims management endpoints
     async getPendingClaims() {
         return this.request('/admin/claims/pending', {
@@ -191,11 +337,11 @@ class APIClient {
         });
     }
 
-    async approveClaim(claimId) {
+    async approveClaim(claimId, version = null) {
         return this.request(`/admin/claims/${claimId}/approve`, {
             method: 'PUT',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({})
+            body: JSON.stringify(version === null ? {} : { version })
         });
     }
 
@@ -207,6 +353,14 @@ class APIClient {
         });
     }
 
+    async bulkModerateClaims(claimIds, action) {
+        return this.request('/admin/claims/bulk', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ claim_ids: claimIds, action })
+        });
+    }
+
     async updateClaimNotes(claimId, notes) {
         return this.request(`/admin/claims/${claimId}/notes`, {
             method: 'PUT',
@@ -29,6 +29,13 @@ document.addEventListener('DOMContentLoaded', async () => {
         document.getElementById('welcomeMessage').textContent = `Welcome back, ${profile.name}!`;
         
         loadMyItems();
+        
+        // Refresh claims when an admin acts on one instead of polling
+        apiClient.subscribeEvents({
+            onClaimUpdated: () => {
+                if (currentDashboardTab === 'my-claims') loadMyClaims();
+            }
+        });
     } catch (error) {
         console.error('my-dashboard.js: Error loading profile:', error);
         showMessage('Error loading profile: ' + error.message, 'error');
@@ -22,9 +22,13 @@ if (document.getElementById('reportForm')) {
         formData.append('item_type', document.getElementById('itemType').value);
         formData.append('date', document.getElementById('date').value);
         formData.append('location', document.getElementById('location').value);
-        formData.append('photo', document.getElementById('photo').files[0]);
         
         try {
+            // The first photo becomes the cover
+            const photos = Array.from(document.getElementById('photo').files);
+            const uploadIds = await Promise.all(photos.map(photo => apiClient.uploadPhoto(photo)));
+            uploadIds.forEach(uploadId => formData.append('upload_id', uploadId));
+            
             const response = await apiClient.reportItem(formData);
             showMessage('Item reported successfully! An admin will verify it shortly.', 'success');
             
@@ -0,0 +1,108 @@
+"""Move finished items, with their claims and photos, out of the live tables"""
+
+from datetime import datetime, timedelta
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _archive_pairs():
+    """(live model, archive model) in the order rows must be copied and deleted"""
+    from app.models import Item, Claim, ItemPhoto, ItemArchive, ClaimArchive, ItemPhotoArchive
+
+    return [(ItemPhoto, ItemPhotoArchive), (Claim, ClaimArchive), (Item, ItemArchive)]
+
+
+def _copy_rows(live, archive, item_ids, archived_at):
+    """INSERT INTO archive SELECT ... FROM live for the rows of the given items"""
+    from app import db
+
+    live_columns = live.__table__.c
+    columns = [column.name for column in archive.__table__.c if column.name in live_columns]
+    rows = (db.select(*[live_columns[name] for name in columns], db.literal(archived_at, db.DateTime))
+            .where(live.item_id.in_(item_ids)))
+    db.session.execute(db.insert(archive).from_select(columns + ['archived_at'], rows))
+
+
+def _already_archived(item_ids):
+    """Items whose own id, or the id of one of their claims or photos, is already taken in the archive"""
+    from app import db
+
+    taken = set()
+    for live, archive in _archive_pairs():
+        key = live.__mapper__.primary_key[0].name
+        rows = (db.session.query(live.item_id)
+                .join(archive, getattr(archive, key) == getattr(live, key))
+                .filter(live.item_id.in_(item_ids)))
+        taken.update(item_id for (item_id,) in rows)
+    return taken
+
+
+def archive_items(older_than_days, statuses, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Archive items in one of `statuses` not updated for `older_than_days`.
+
+    Each batch of items is copied to the archive tables together with its
+    claims and photo rows and then deleted from the live tables, in one
+    transaction per batch, so a failure never leaves a half-moved item and
+    the write lock is only held briefly. Photo files stay where they are;
+    saved-search alerts for the items are dropped. Items that would collide
+    with ids already in the archive, possible in databases from before
+    `flask migrate` version 2, are left in place with a warning.
+    Returns the number of items archived (or that would be, with dry_run).
+    """
+    from app import db
+    from app.models import Item, SearchAlert
+
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    candidates = (db.session.query(Item.item_id)
+                  .filter(Item.status.in_(statuses), Item.updated_at < cutoff)
+                  .order_by(Item.item_id))
+    if dry_run:
+        return candidates.count()
+
+    archived = 0
+    skipped = set()
+    while True:
+        batch = candidates.filter(Item.item_id.notin_(skipped)) if skipped else candidates
+        item_ids = [item_id for (item_id,) in batch.limit(batch_size)]
+        if not item_ids:
+            break
+        taken = _already_archived(item_ids)
+        if taken:
+            print(f"[ARCHIVE] Skipped items {sorted(taken)}: their ids are already archived")
+            skipped |= taken
+            item_ids = [item_id for item_id in item_ids if item_id not in taken]
+            if not item_ids:
+                continue
+
+        archived_at = datetime.utcnow()
+        pairs = _archive_pairs()
+        for live, archive in pairs:
+            _copy_rows(live, archive, item_ids, archived_at)
+        # Saved-search alerts only point at live items
+        for live in [SearchAlert] + [live for live, _ in pairs]:
+            db.session.execute(db.delete(live).where(live.item_id.in_(item_ids)),
+                               execution_options={'synchronize_session': False})
+        db.session.commit()
+        archived += len(item_ids)
+        print(f"[ARCHIVE] Archived {archived} items")
+
+    return archived
+
+
+def with_archive(live, archive, columns, where=None):
+    """
+    UNION ALL of the same columns from a live table and its archive, as a subquery.
+
+    `where`, if given, is called with each model and returns the condition
+    for its half, so both halves can use their own indexes.
+    """
+    from app import db
+
+    selects = []
+    for model in (live, archive):
+        select = db.select(*[getattr(model, name) for name in columns])
+        if where is not None:
+            select = select.where(where(model))
+        selects.append(select)
+    return db.union_all(*selects).subquery()
@@ -0,0 +1,139 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`flask assets build` copies app/static into ASSET_BUILD_FOLDER: every
+asset gets a content hash in its name under assets/, references to
+/static/... in the HTML, CSS and JS are rewritten to those /assets/ URLs,
+and text files get .gz (and, with Brotli installed, .br) siblings. A hashed
+file never changes, so browsers may keep it for a year; the HTML shells
+keep their names and are cached briefly. Without a build, pages and
+/static are served from app/static as before.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from importlib.util import find_spec
+
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+HAS_BROTLI = find_spec('brotli') is not None
+
+MANIFEST = 'manifest.json'
+ASSETS_DIR = 'assets'  # Hashed files, served at /assets/
+IMMUTABLE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE = ('.html', '.css', '.js', '.svg', '.json', '.txt')
+MIN_COMPRESS_BYTES = 256  # Smaller files gain nothing once headers are counted
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # In order of preference
+STATIC_REF = re.compile(r'/static/([\w./-]+)')
+
+# Files whose references must already be rewritten come later: images, then stylesheets, scripts, pages
+_BUILD_ORDER = {'.css': 1, '.js': 2, '.html': 3}
+
+
+def fingerprint(name, data):
+    """'js/app.js' -> 'js/app.1a2b3c4d5e.js' from the SHA-256 of the content"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _compress(path, data):
+    """Write the .gz and .br siblings that are smaller than the file; returns {encoding: bytes}"""
+    sizes = {}
+    if len(data) < MIN_COMPRESS_BYTES or not path.endswith(COMPRESSIBLE):
+        return sizes
+
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if HAS_BROTLI:
+        import brotli
+        variants['br'] = brotli.compress(data, quality=11)
+
+    for encoding, suffix in ENCODINGS:
+        compressed = variants.get(encoding)
+        if compressed is not None and len(compressed) < len(data):
+            _write(path + suffix, compressed)
+            sizes[encoding] = len(compressed)
+    return sizes
+
+
+def build_assets(source, target):
+    """
+    Build the hashed, compressed copy of `source` into `target`, replacing any earlier build.
+
+    Returns totals: files, bytes and the bytes of each compressed variant.
+    """
+    names = []
+    for root, _, files in os.walk(source):
+        for filename in files:
+            names.append(os.path.relpath(os.path.join(root, filename), source).replace(os.sep, '/'))
+    names.sort(key=lambda name: (_BUILD_ORDER.get(os.path.splitext(name)[1], 0), name))
+
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    manifest = {}
+    totals = {'files': 0, 'bytes': 0, 'gzip': 0, 'br': 0}
+
+    def rewrite(match):
+        hashed = manifest.get(match.group(1))
+        return f'/{ASSETS_DIR}/{hashed}' if hashed else match.group(0)
+
+    for name in names:
+        with open(os.path.join(source, name), 'rb') as f:
+            data = f.read()
+        if name.endswith(COMPRESSIBLE):
+            data = STATIC_REF.sub(rewrite, data.decode('utf-8')).encode('utf-8')
+
+        if name.endswith('.html'):
+            path = os.path.join(target, name)  # Pages keep their names; the routes serve them
+        else:
+            manifest[name] = fingerprint(name, data)
+            path = os.path.join(target, ASSETS_DIR, manifest[name])
+        _write(path, data)
+
+        totals['files'] += 1
+        totals['bytes'] += len(data)
+        for encoding, size in _compress(path, data).items():
+            totals[encoding] += size
+
+    _write(os.path.join(target, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return totals
+
+
+def send_asset(directory, filename, cache_control):
+    """send_from_directory, but from a precompressed sibling when the client accepts its encoding"""
+    path = safe_join(directory, filename)
+    chosen = None
+    if path is not None:
+        for encoding, suffix in ENCODINGS:
+            if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+                chosen = encoding, suffix
+                break
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if chosen:
+        response = send_from_directory(directory, filename + chosen[1], mimetype=mimetype)
+        response.headers['Content-Encoding'] = chosen[0]
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def send_page(filename):
+    """Serve an HTML shell from the asset build when there is one, else from app/static"""
+    build = current_app.config['ASSET_BUILD_FOLDER']
+    if build and os.path.isfile(os.path.join(build, filename)):
+        return send_asset(build, filename, f"public, max-age={current_app.config['HTML_MAX_AGE_SECONDS']}")
+    return send_from_directory(current_app.static_folder, filename)
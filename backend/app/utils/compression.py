@@ -0,0 +1,112 @@
+"""
+gzip/Brotli compression of JSON API responses.
+
+compress_response runs after every request and compresses JSON bodies of
+at least COMPRESS_MIN_BYTES for clients that accept it, preferring Brotli
+when it is installed. Compressed GET bodies are kept in a per-worker LRU
+cache keyed by a digest of the uncompressed body, so the same page served
+again costs a hash instead of a compression; a stale entry can never be
+returned because a changed body has a different key.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+
+from flask import current_app, request
+
+HAS_BROTLI = find_spec('brotli') is not None
+
+
+class CompressedCache:
+    """Thread-safe LRU of compressed bodies, bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def compress(data, encoding, config):
+    """Compress `data` with 'br' or 'gzip' at the configured level"""
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def choose_encoding():
+    """Best encoding the client accepts: br when Brotli is installed, else gzip, else None"""
+    for encoding in ('br', 'gzip'):
+        if request.accept_encodings[encoding] and (encoding != 'br' or HAS_BROTLI):
+            return encoding
+    return None
+
+
+def get_compressed_cache():
+    """The worker's cache of compressed bodies, created on first use"""
+    cache = current_app.extensions.get('compressed_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('compressed_cache',
+                                                  CompressedCache(current_app.config['COMPRESS_CACHE_BYTES']))
+    return cache
+
+
+def compress_response(response):
+    """after_request hook: compress large JSON responses for clients that accept gzip or br"""
+    config = current_app.config
+    if (response.mimetype != 'application/json' or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.status_code in (204, 304)):
+        return response
+
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_BYTES']:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    cacheable = request.method == 'GET' and not response.cache_control.no_store and config['COMPRESS_CACHE_BYTES']
+    if cacheable:
+        cache = get_compressed_cache()
+        key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+        body = cache.get(key)
+        if body is None:
+            body = compress(data, encoding, config)
+            cache.put(key, body)
+    else:
+        body = compress(data, encoding, config)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        response.headers['ETag'] = response.headers['ETag'].rstrip('"') + f'-{encoding}"'
+    return response
@@ -0,0 +1,127 @@
+"""Database engine profile applied to every new connection"""
+
+import os
+import sqlite3
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+# Accepted values of the PRAGMAs that take a keyword; they are interpolated into SQL
+SQLITE_PRAGMA_CHOICES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+PROGRESS_STEPS = 10000  # SQLite VM instructions between statement timeout checks
+
+
+def sqlite_pragmas(config):
+    """
+    PRAGMA name -> value for new SQLite connections, from the SQLITE_* settings.
+
+    busy_timeout comes first so switching the journal mode waits for other
+    connections instead of failing. Raises ValueError for a bad setting.
+    """
+    pragmas = {
+        'busy_timeout': int(config['SQLITE_BUSY_TIMEOUT_MS']),
+        'journal_mode': str(config['SQLITE_JOURNAL_MODE']).upper(),
+        'synchronous': str(config['SQLITE_SYNCHRONOUS']).upper(),
+        'cache_size': -int(config['SQLITE_CACHE_SIZE_KB']),  # Negative means KiB rather than pages
+        'mmap_size': int(config['SQLITE_MMAP_SIZE']),
+        'temp_store': str(config['SQLITE_TEMP_STORE']).upper(),
+    }
+    for name, choices in SQLITE_PRAGMA_CHOICES.items():
+        if pragmas[name] not in choices:
+            raise ValueError(f"SQLITE_{name.upper()} must be one of {', '.join(choices)}, not {pragmas[name]!r}")
+    for name in ('busy_timeout', 'mmap_size'):
+        if pragmas[name] < 0:
+            raise ValueError(f'SQLITE_{name.upper()} must not be negative')
+    return pragmas
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings.
+
+    In-memory SQLite runs on a single shared connection, so it gets no pool
+    sizing. PostgreSQL enforces the statement timeout itself; SQLite gets one
+    from configure_engine.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+    options.update(pool_size=config['DB_POOL_SIZE'], max_overflow=config['DB_MAX_OVERFLOW'],
+                   pool_timeout=config['DB_POOL_TIMEOUT'], pool_recycle=config['DB_POOL_RECYCLE'])
+    if url.get_backend_name() == 'postgresql' and config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'options': f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"}
+    return options
+
+
+def create_replica_engine(config, instance_path):
+    """
+    Engine for the read replica at DB_REPLICA_URI, or None without one.
+
+    An SQLite replica is opened read-only; it can be the primary's own file
+    (WAL lets readers run beside the writer) or a copy refreshed with
+    `sqlite3 lostnfound.db ".backup replica.db"`. Relative paths are in the
+    instance folder, as for the primary.
+    """
+    uri = config['DB_REPLICA_URI']
+    if not uri:
+        return None
+    url = make_url(uri)
+    options = engine_options(dict(config, SQLALCHEMY_DATABASE_URI=uri))
+    if url.get_backend_name() == 'sqlite':
+        path = os.path.join(instance_path, url.database)  # Absolute paths are kept by join
+        options['creator'] = lambda: sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+    engine = create_engine(url, **options)
+    configure_engine(engine, config, read_only=True)
+    return engine
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Run PRAGMA statements on a raw DB-API connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine, config, read_only=False):
+    """
+    Apply the SQLite profile from config to every connection the engine opens.
+
+    A read-only engine keeps the journal mode of the file and refuses writes.
+
+    With DB_STATEMENT_TIMEOUT_MS set, a progress handler interrupts statements
+    that run past the deadline stamped on their connection before execution.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(config)
+    if read_only:
+        del pragmas['journal_mode']
+        pragmas['query_only'] = 1
+    timeout = config['DB_STATEMENT_TIMEOUT_MS'] / 1000
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+        if timeout:
+            info = connection_record.info
+            dbapi_connection.set_progress_handler(
+                lambda: info.get('deadline') is not None and time.monotonic() > info['deadline'], PROGRESS_STEPS)
+
+    if timeout:
+        @event.listens_for(engine, 'before_cursor_execute')
+        def start_deadline(connection, cursor, statement, parameters, context, executemany):
+            connection.connection.info['deadline'] = time.monotonic() + timeout
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def clear_deadline(connection, cursor, statement, parameters, context, executemany):
+            connection.connection.info['deadline'] = None
@@ -0,0 +1,279 @@
+"""
+Server-sent events: an in-process broker fed from a change table shared by all workers.
+
+Writers add rows to the `events` table in the same transaction as the
+change they describe. Each worker runs one bridge thread that reads new
+rows and publishes them to its local broker, which hands them to the
+matching open streams. However many clients are connected, a worker runs
+one small indexed query per poll interval instead of every client polling
+the API.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+ITEM_VERIFIED = 'item_verified'
+CLAIM_UPDATED = 'claim_updated'
+SUBSCRIBER_BUFFER = 100  # Events kept for a slow client before the oldest are dropped
+POLL_BATCH = 1000
+PRUNE_INTERVAL = 60  # Seconds between deletes of expired events
+
+
+def format_event(event_id, kind, payload):
+    """One event in text/event-stream framing"""
+    return f'id: {event_id}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n'
+
+
+def _insert_events(rows):
+    from app import db
+    from app.models import Event
+
+    if rows:
+        now = datetime.utcnow()
+        for row in rows:
+            row['created_at'] = now
+        db.session.execute(db.insert(Event), rows)
+
+
+def record_item_events(item_ids):
+    """Add an item_verified event per item to the caller's transaction"""
+    from app import db
+    from app.models import Item
+
+    if not item_ids:
+        return
+    rows = (db.session.query(Item.item_id, Item.title, Item.category, Item.item_type,
+                             Item.location, Item.date, Item.photo_path)
+            .filter(Item.item_id.in_(item_ids)))
+    _insert_events([{
+        'kind': ITEM_VERIFIED,
+        'user_id': None,
+        'payload': json.dumps({'item_id': item_id, 'title': title, 'category': category, 'item_type': item_type,
+                               'location': location, 'date': date.isoformat(), 'photo_path': photo_path})
+    } for item_id, title, category, item_type, location, date, photo_path in rows])
+
+
+def record_claim_events(claim_ids):
+    """Add a claim_updated event per claim, addressed to the claimant, to the caller's transaction"""
+    from app import db
+    from app.models import Claim
+
+    if not claim_ids:
+        return
+    rows = (db.session.query(Claim.claim_id, Claim.user_id, Claim.item_id, Claim.status, Claim.version)
+            .filter(Claim.claim_id.in_(claim_ids)))
+    _insert_events([{
+        'kind': CLAIM_UPDATED,
+        'user_id': user_id,
+        'payload': json.dumps({'claim_id': claim_id, 'item_id': item_id, 'status': status, 'version': version})
+    } for claim_id, user_id, item_id, status, version in rows])
+
+
+class Subscriber:
+    """One open stream: its filters and a bounded buffer of undelivered events"""
+
+    __slots__ = ('user_id', 'categories', 'item_types', 'events', 'ready')
+
+    def __init__(self, user_id=None, categories=None, item_types=None):
+        self.user_id = user_id
+        self.categories = frozenset(categories or ())
+        self.item_types = frozenset(item_types or ())
+        self.events = deque(maxlen=SUBSCRIBER_BUFFER)
+        self.ready = threading.Event()
+
+    def wants(self, kind, user_id, payload):
+        if kind == CLAIM_UPDATED:
+            return user_id is not None and user_id == self.user_id
+        return ((not self.categories or payload.get('category') in self.categories) and
+                (not self.item_types or payload.get('item_type') in self.item_types))
+
+    def push(self, event):
+        self.events.append(event)
+        self.ready.set()
+
+    def wait(self, timeout):
+        """Return the buffered events, waiting up to timeout seconds for one"""
+        if not self.events:
+            self.ready.wait(timeout)
+        self.ready.clear()
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+
+class EventBroker:
+    """In-process fan-out of events to the subscribers that want them"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.item_subscribers = set()
+        self.user_subscribers = {}  # user_id -> {Subscriber}
+
+    def __len__(self):
+        with self.lock:
+            return len(self.item_subscribers)
+
+    def subscribe(self, user_id=None, categories=None, item_types=None):
+        subscriber = Subscriber(user_id, categories, item_types)
+        with self.lock:
+            self.item_subscribers.add(subscriber)
+            if user_id is not None:
+                self.user_subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.item_subscribers.discard(subscriber)
+            subscribers = self.user_subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.user_subscribers[subscriber.user_id]
+
+    def publish(self, event_id, kind, user_id, payload):
+        """Hand an event to every interested subscriber; returns how many got it"""
+        with self.lock:
+            if kind == CLAIM_UPDATED:
+                candidates = list(self.user_subscribers.get(user_id, ()))
+            else:
+                candidates = list(self.item_subscribers)
+        targets = [subscriber for subscriber in candidates if subscriber.wants(kind, user_id, payload)]
+        for subscriber in targets:
+            subscriber.push((event_id, kind, payload))
+        return len(targets)
+
+
+class EventBridge:
+    """
+    Moves rows of the events table into a worker's broker.
+
+    poll() publishes rows past the last seen event id. The thread started
+    by start() polls every `interval` seconds while anyone is subscribed;
+    while nobody is, it only moves the last seen id to the newest event, so
+    the first client after an idle spell doesn't get old events as new.
+    Every PRUNE_INTERVAL it deletes events older than `retention`; clients
+    that reconnect within that time get what they missed through Last-Event-ID.
+    """
+
+    def __init__(self, app, broker, interval=1.0, retention=timedelta(hours=1)):
+        self.app = app
+        self.broker = broker
+        self.interval = interval
+        self.retention = retention
+        self.last_event_id = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def poll(self):
+        from app import db
+        from app.models import Event
+
+        with self.lock:
+            with db.engine.connect() as connection:
+                rows = connection.execute(
+                    db.select(Event.event_id, Event.kind, Event.user_id, Event.payload)
+                    .where(Event.event_id > self.last_event_id)
+                    .order_by(Event.event_id)
+                    .limit(POLL_BATCH)
+                ).all()
+            for event_id, kind, user_id, payload in rows:
+                self.broker.publish(event_id, kind, user_id, json.loads(payload))
+                self.last_event_id = event_id
+            return len(rows)
+
+    def skip_to_end(self):
+        """Move the last seen id to the newest event without publishing, unless someone subscribed meanwhile"""
+        from app import db
+        from app.models import Event
+
+        with self.lock:
+            with db.engine.connect() as connection:
+                newest = connection.execute(db.select(db.func.max(Event.event_id))).scalar() or 0
+            # A subscriber that arrived during the query may be owed the rows up to `newest`
+            if not len(self.broker):
+                self.last_event_id = max(self.last_event_id, newest)
+
+    def prune(self):
+        from app import db
+        from app.models import Event
+
+        with db.engine.begin() as connection:
+            connection.execute(db.delete(Event).where(Event.created_at < datetime.utcnow() - self.retention))
+
+    def start(self):
+        """Begin at the current end of the events table and keep polling in a background thread"""
+        from app import db
+        from app.models import Event
+
+        with self.lock:
+            if self.last_event_id is None:
+                with db.engine.connect() as connection:
+                    self.last_event_id = connection.execute(db.select(db.func.max(Event.event_id))).scalar() or 0
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='event-bridge', daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        """End the polling thread after its current round"""
+        self.stopping.set()
+
+    def _run(self):
+        last_prune = 0
+        with self.app.app_context():
+            while not self.stopping.wait(self.interval):
+                try:
+                    if len(self.broker):
+                        self.poll()
+                    else:
+                        self.skip_to_end()
+                    if time.monotonic() - last_prune > PRUNE_INTERVAL:
+                        self.prune()
+                        last_prune = time.monotonic()
+                except Exception as e:
+                    print(f"[EVENTS] Bridge poll failed: {e}")
+                    self.stopping.wait(self.interval)
+
+
+def get_event_broker():
+    """The event broker of the current app"""
+    from flask import current_app
+
+    broker = current_app.extensions.get('event_broker')
+    if broker is None:
+        broker = current_app.extensions.setdefault('event_broker', EventBroker())
+    return broker
+
+
+def get_event_bridge():
+    """The event bridge of the current app, created on first use"""
+    from flask import current_app
+
+    bridge = current_app.extensions.get('event_bridge')
+    if bridge is None:
+        config = current_app.config
+        bridge = current_app.extensions.setdefault('event_bridge', EventBridge(
+            current_app._get_current_object(), get_event_broker(),
+            interval=config['EVENTS_POLL_SECONDS'],
+            retention=timedelta(seconds=config['EVENTS_RETENTION_SECONDS'])
+        ))
+    return bridge
+
+
+def replay_events(after_id, user_id=None, limit=POLL_BATCH):
+    """Events after `after_id` a reconnecting client may have missed, oldest first"""
+    from app import db
+    from app.models import Event
+
+    visible = Event.kind == ITEM_VERIFIED
+    if user_id is not None:
+        visible = db.or_(visible, Event.user_id == user_id)
+    rows = (db.session.query(Event.event_id, Event.kind, Event.user_id, Event.payload)
+            .filter(Event.event_id > after_id, visible)
+            .order_by(Event.event_id)
+            .limit(limit))
+    return [(event_id, kind, user_id, json.loads(payload)) for event_id, kind, user_id, payload in rows]
@@ -0,0 +1,170 @@
+"""Image normalization applied to uploads before they are stored"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from io import BytesIO
+
+# Optional dependency, imported on first use so workers that never handle an upload don't load it
+HAS_PIL = find_spec('PIL') is not None
+
+DEFAULT_MAX_EDGE = 2048  # Longest side of a stored photo, in pixels
+DEFAULT_JPEG_QUALITY = 82
+ORIGINALS_DIR = 'originals'  # Sub-folder of UPLOAD_FOLDER for kept originals
+
+# Metadata keys that must survive re-encoding for the image to render correctly
+PRESERVED_INFO_KEYS = ('transparency',)
+
+StoredPhoto = namedtuple('StoredPhoto', ['original_size', 'stored_size', 'photo_hash'])
+
+
+def normalize_image(stream, max_edge=DEFAULT_MAX_EDGE, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Re-encode an image for storage.
+
+    Applies the EXIF orientation to the pixels, drops all metadata (EXIF, XMP,
+    ICC, text chunks), downscales so the longest edge is at most ``max_edge``
+    and re-encodes in the original format. Animated GIFs are returned as-is.
+
+    Returns a tuple (data, image_format).
+    """
+    stream.seek(0)
+    raw = stream.read()
+    stream.seek(0)
+
+    if not HAS_PIL:
+        return raw, None
+    from PIL import Image, ImageOps
+
+    img = Image.open(BytesIO(raw))
+    image_format = img.format
+
+    if image_format == 'GIF' and getattr(img, 'is_animated', False):
+        return raw, image_format
+
+    # Bake the orientation into the pixels so stripping EXIF doesn't rotate the photo
+    img = ImageOps.exif_transpose(img)
+
+    if max_edge and max(img.size) > max_edge:
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    img.info = {key: value for key, value in img.info.items() if key in PRESERVED_INFO_KEYS}
+
+    output = BytesIO()
+    if image_format == 'JPEG':
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+    elif image_format == 'PNG':
+        img.save(output, 'PNG', optimize=True)
+    elif image_format == 'GIF':
+        img.save(output, 'GIF', optimize=True)
+    else:
+        return raw, image_format
+
+    return output.getvalue(), image_format
+
+
+def store_upload(file, upload_folder, filename, max_edge=DEFAULT_MAX_EDGE,
+                 quality=DEFAULT_JPEG_QUALITY, keep_original=False):
+    """
+    Normalize an uploaded file and write it to ``upload_folder/filename``.
+
+    When ``keep_original`` is set the received bytes are also written to
+    ``upload_folder/originals/filename``.
+
+    Normalization is best-effort: files that passed validation but can't be
+    decoded fully are stored as received.
+
+    Returns a StoredPhoto with the sizes and the perceptual hash of the
+    stored image.
+    """
+    from app.utils.phash import image_hash
+
+    try:
+        data, _ = normalize_image(file, max_edge=max_edge, quality=quality)
+    except Exception as e:
+        print(f"[UPLOAD] Could not normalize {filename}, storing as received: {e}")
+        file.seek(0)
+        data = file.read()
+        file.seek(0)
+
+    file.seek(0, os.SEEK_END)
+    original_size = file.tell()
+    file.seek(0)
+
+    if keep_original:
+        originals_folder = os.path.join(upload_folder, ORIGINALS_DIR)
+        os.makedirs(originals_folder, exist_ok=True)
+        with open(os.path.join(originals_folder, filename), 'wb') as f:
+            f.write(file.read())
+        file.seek(0)
+
+    with open(os.path.join(upload_folder, filename), 'wb') as f:
+        f.write(data)
+
+    return StoredPhoto(original_size, len(data), image_hash(data))
+
+
+def get_photo_executor():
+    """
+    Thread pool of the current app for photo validation, re-encoding and hashing.
+
+    Pillow releases the GIL while decoding, resizing and encoding, so the
+    photos of one report are processed in parallel.
+    """
+    from flask import current_app
+
+    executor = current_app.extensions.get('photo_executor')
+    if executor is None:
+        executor = current_app.extensions.setdefault('photo_executor', ThreadPoolExecutor(
+            max_workers=current_app.config['PHOTO_WORKERS'],
+            thread_name_prefix='photo'
+        ))
+    return executor
+
+
+def normalization_report(upload_folder, max_edge=DEFAULT_MAX_EDGE,
+                         quality=DEFAULT_JPEG_QUALITY, apply=False):
+    """
+    Measure what normalization would save across the files in ``upload_folder``.
+
+    Only top-level image files are considered. With ``apply`` set, files that
+    shrink are rewritten in place.
+
+    Returns a dict with per-file results and totals.
+    """
+    from app.utils.validators import allowed_file
+
+    results = []
+    totals = {'files': 0, 'skipped': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+    with os.scandir(upload_folder) as entries:
+        for entry in entries:
+            if not entry.is_file() or not allowed_file(entry.name):
+                continue
+
+            before = entry.stat().st_size
+            try:
+                with open(entry.path, 'rb') as f:
+                    data, _ = normalize_image(f, max_edge=max_edge, quality=quality)
+            except Exception as e:
+                totals['skipped'] += 1
+                results.append({'name': entry.name, 'error': str(e)})
+                continue
+
+            after = min(before, len(data))
+            if apply and len(data) < before:
+                tmp_path = entry.path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, entry.path)
+
+            totals['files'] += 1
+            totals['bytes_before'] += before
+            totals['bytes_after'] += after
+            results.append({'name': entry.name, 'bytes_before': before, 'bytes_after': after})
+
+    totals['bytes_saved'] = totals['bytes_before'] - totals['bytes_after']
+    return {'files': results, 'totals': totals}
@@ -0,0 +1,114 @@
+"""Scheduled status transitions for items nobody acted on"""
+
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+
+DEFAULT_BATCH_SIZE = 500
+
+# Verified items whose date is older than after_days move to `to`. A rule can
+# be narrowed to a category and/or item type; the most specific match wins.
+DEFAULT_RULES = [
+    {'status': 'verified', 'item_type': 'found', 'after_days': 90, 'to': 'expired'},
+    {'status': 'verified', 'item_type': 'lost', 'after_days': 60, 'to': 'expired'},
+    {'status': 'verified', 'category': 'documents', 'item_type': 'found', 'after_days': 180, 'to': 'expired'},
+]
+
+
+def parse_rules(value):
+    """
+    Read lifecycle rules from a JSON string (or a list of dicts).
+
+    Returns (rules, error). Each rule needs `status`, `after_days` and `to`,
+    and may have `category` and `item_type`.
+    """
+    from app.models import Item
+
+    try:
+        rules = json.loads(value) if isinstance(value, str) else value
+    except ValueError as e:
+        return None, f'LIFECYCLE_RULES is not valid JSON: {e}'
+
+    if not isinstance(rules, list):
+        return None, 'LIFECYCLE_RULES must be a list of rules'
+    for rule in rules:
+        if not isinstance(rule, dict) or not {'status', 'after_days', 'to'} <= rule.keys():
+            return None, 'Each lifecycle rule needs status, after_days and to'
+        if rule['status'] not in Item.STATUSES or rule['to'] not in Item.STATUSES:
+            return None, f"Unknown status in lifecycle rule {rule}"
+        if rule['status'] == rule['to']:
+            return None, f"Lifecycle rule {rule} does not change the status"
+        if not isinstance(rule['after_days'], int) or rule['after_days'] < 1:
+            return None, f"after_days must be a positive integer in lifecycle rule {rule}"
+    return rules, None
+
+
+def _specificity(rule):
+    return ('category' in rule) * 2 + ('item_type' in rule)
+
+
+def _scope(rule):
+    """SQL condition for the items a rule covers, ignoring age"""
+    from app import db
+    from app.models import Item
+
+    conditions = [Item.status == rule['status']]
+    if 'category' in rule:
+        conditions.append(Item.category == rule['category'])
+    if 'item_type' in rule:
+        conditions.append(Item.item_type == rule['item_type'])
+    return db.and_(*conditions)
+
+
+def run_lifecycle(rules, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Apply lifecycle rules and return the number of items moved per rule.
+
+    Stale items are found through the (status, date) index and moved with
+    one UPDATE per batch of `batch_size`, each batch in its own short
+    transaction so reporting and moderation are never blocked for long.
+    Items with pending claims are left alone. Statistics counters move in
+    the same transactions.
+    """
+    from app import db
+    from app.models import Item, Claim
+    from app.utils.stats import apply_deltas
+
+    now = datetime.utcnow()
+    ordered = sorted(rules, key=_specificity, reverse=True)
+    counts = []
+
+    for position, rule in enumerate(ordered):
+        # Items a more specific rule is responsible for follow that rule instead
+        overridden = [_scope(other) for other in ordered[:position]
+                      if other['status'] == rule['status'] and _specificity(other) > _specificity(rule)]
+        candidates = (db.session.query(Item.item_id)
+                      .filter(_scope(rule), Item.date < now - timedelta(days=rule['after_days']),
+                              ~Item.claims.any(Claim.status == 'pending'),
+                              *[~condition for condition in overridden])
+                      .order_by(Item.status, Item.date))
+
+        moved = 0
+        if dry_run:
+            moved = candidates.count()
+        else:
+            while True:
+                item_ids = [item_id for (item_id,) in candidates.limit(batch_size)]
+                if not item_ids:
+                    break
+                changed = db.session.execute(
+                    db.update(Item)
+                    .where(Item.item_id.in_(item_ids), Item.status == rule['status'])
+                    .values(status=rule['to'], updated_at=datetime.utcnow()),
+                    execution_options={'synchronize_session': False}
+                ).rowcount
+                apply_deltas(db.session.connection(), Counter({
+                    f"items:status:{rule['status']}": -changed,
+                    f"items:status:{rule['to']}": changed,
+                }))
+                db.session.commit()
+                moved += changed
+
+        counts.append((rule, moved))
+
+    return counts
@@ -0,0 +1,272 @@
+"""TF-IDF text matching between lost and found reports"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from importlib.util import find_spec
+
+# Listed in requirements.txt but imported on first use: numpy and scipy take longer
+# to load than the rest of the app and most workers never build a sparse index.
+# Without them the index falls back to pure-Python postings
+HAS_SCIPY = find_spec('numpy') is not None and find_spec('scipy') is not None
+
+DEFAULT_WINDOW_DAYS = 60  # Max days between the lost and the found date
+FIELD_WEIGHTS = {'title': 2.0, 'description': 1.0, 'location': 1.0}
+OPEN_STATUSES = ('pending', 'verified')  # Items that can still be matched
+OPPOSITE_TYPE = {'lost': 'found', 'found': 'lost'}
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have i in is it its my of on or that the this to was were with'.split()
+)
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase word tokens of text, without stopwords and single characters"""
+    return [token for token in _TOKEN.findall((text or '').lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+def item_fields(item):
+    """The text fields of an item that take part in matching"""
+    return {name: getattr(item, name) for name in FIELD_WEIGHTS}
+
+
+def match_query(item):
+    """What matches_for needs from an item, so it can be read while the item is loaded"""
+    return {'item_id': item.item_id, 'category': item.category, 'item_type': item.item_type,
+            'day': item.date.toordinal(), 'fields': item_fields(item)}
+
+
+def idf(df, n):
+    """Smoothed inverse document frequency of a term found in df of n documents"""
+    return math.log((1 + n) / (1 + df)) + 1
+
+
+class _SparsePartition:
+    """
+    Candidate rows as CSR matrices of term weights, scored with one sparse
+    matrix-vector product.
+
+    New rows go into a small segment of their own; segments are merged like
+    a binary counter (the last two whenever the newer is at least half the
+    size of the older), so an insert costs amortized O(log n) row copies
+    instead of rebuilding the whole matrix.
+    """
+
+    def __init__(self):
+        self.segments = []  # [matrix, squared matrix, item ids, days]
+        self.pending = []
+
+    def __len__(self):
+        return sum(segment[0].shape[0] for segment in self.segments) + len(self.pending)
+
+    def add(self, item_id, day, weights):
+        self.pending.append((item_id, day, weights))
+
+    def _flush(self, columns):
+        if not self.pending:
+            return
+        import numpy as np
+        from scipy import sparse
+
+        indptr, indices, data = [0], [], []
+        for _, _, weights in self.pending:
+            indices.extend(weights)
+            data.extend(weights.values())
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64),
+                                    np.asarray(indptr, dtype=np.int64)), shape=(len(self.pending), columns))
+        item_ids = np.fromiter((item_id for item_id, _, _ in self.pending), dtype=np.int64)
+        days = np.fromiter((day for _, day, _ in self.pending), dtype=np.int64)
+        self.segments.append([matrix, matrix.multiply(matrix).tocsr(), item_ids, days])
+        self.pending = []
+
+        while len(self.segments) > 1 and self.segments[-1][0].shape[0] * 2 >= self.segments[-2][0].shape[0]:
+            newer = self.segments.pop()
+            older = self.segments.pop()
+            width = max(older[0].shape[1], newer[0].shape[1])
+            for segment in (older, newer):
+                segment[0].resize(segment[0].shape[0], width)
+                segment[1].resize(segment[1].shape[0], width)
+            self.segments.append([sparse.vstack([older[0], newer[0]], format='csr'),
+                                  sparse.vstack([older[1], newer[1]], format='csr'),
+                                  np.concatenate([older[2], newer[2]]),
+                                  np.concatenate([older[3], newer[3]])])
+
+    def top(self, query, df, n, day, window, limit, exclude):
+        import numpy as np
+
+        self._flush(len(df))
+
+        idf_weights = np.log((1 + n) / (1 + np.asarray(df, dtype=np.float64))) + 1
+        idf_squared = idf_weights * idf_weights
+        terms = np.fromiter(query, dtype=np.int64)
+        weights = np.fromiter(query.values(), dtype=np.float64)
+        query_norm = math.sqrt(float(np.sum((weights * idf_weights[terms]) ** 2)))
+        vector = np.zeros(len(df))
+        vector[terms] = weights * idf_squared[terms]
+
+        scores, item_ids = [], []
+        for matrix, squares, segment_ids, days in self.segments:
+            # Terms added after a segment was built can't appear in it
+            width = matrix.shape[1]
+            dots = matrix @ vector[:width]
+            rows = np.flatnonzero((dots > 0) & (np.abs(days - day) <= window) & (segment_ids != exclude))
+            if not len(rows):
+                continue
+            norms = np.sqrt(squares[rows] @ idf_squared[:width])
+            scores.append(dots[rows] / (norms * query_norm))
+            item_ids.append(segment_ids[rows])
+
+        if not scores:
+            return []
+        scores = np.concatenate(scores)
+        item_ids = np.concatenate(item_ids)
+        if len(scores) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            scores, item_ids = scores[best], item_ids[best]
+        order = np.argsort(-scores, kind='stable')
+        return [(float(scores[i]), int(item_ids[i])) for i in order]
+
+
+class _PostingsPartition:
+    """Pure-Python inverted index with the same scores, used when NumPy/SciPy are not installed"""
+
+    def __init__(self):
+        self.postings = defaultdict(list)  # term -> [row]
+        self.rows = []  # (item_id, day, weights)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, item_id, day, weights):
+        row = len(self.rows)
+        self.rows.append((item_id, day, weights))
+        for term in weights:
+            self.postings[term].append(row)
+
+    def top(self, query, df, n, day, window, limit, exclude):
+        query_norm = math.sqrt(sum((weight * idf(df[term], n)) ** 2 for term, weight in query.items()))
+
+        dots = defaultdict(float)
+        for term, weight in query.items():
+            factor = weight * idf(df[term], n) ** 2
+            for row in self.postings.get(term, ()):
+                dots[row] += factor * self.rows[row][2][term]
+
+        results = []
+        for row, dot in dots.items():
+            item_id, row_day, weights = self.rows[row]
+            if item_id == exclude or abs(row_day - day) > window:
+                continue
+            norm = math.sqrt(sum((value * idf(df[term], n)) ** 2 for term, value in weights.items()))
+            results.append((dot / (norm * query_norm), item_id))
+        return sorted(heapq.nlargest(limit, results, key=lambda result: result[0]),
+                      key=lambda result: -result[0])
+
+
+class TextMatchIndex:
+    """
+    In-process TF-IDF index of item text, partitioned by (category, item_type).
+
+    Documents keep raw (sublinear) term frequencies and document frequencies
+    are counted as items are added, so inserting an item never re-vectorizes
+    the others; IDF weights and document norms are applied at query time.
+    A query scores only the partition of opposite-type items in the same
+    category, then drops items outside the date window.
+
+    Like PhotoHashIndex, the index is filled lazily and catches up with items
+    written by other workers through an item_id watermark on every lookup.
+    It never forgets items, so callers should load the returned ids and
+    check that they are still open.
+    """
+
+    def __init__(self, vectorized=HAS_SCIPY):
+        self.partition_class = _SparsePartition if vectorized else _PostingsPartition
+        self.vocabulary = {}
+        self.df = []
+        self.size = 0
+        self.partitions = {}
+        self.last_item_id = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def _weights(self, fields, grow):
+        """Sublinear term weights {term id: 1 + log(tf)} of weighted field text"""
+        counts = Counter()
+        for name, field_weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(name)):
+                counts[token] += field_weight
+
+        weights = {}
+        for token, count in counts.items():
+            term = self.vocabulary.get(token)
+            if term is None:
+                # A word no indexed item uses can't change any score
+                if not grow:
+                    continue
+                term = self.vocabulary[token] = len(self.df)
+                self.df.append(0)
+            weights[term] = 1 + math.log(count)
+        return weights
+
+    def _add(self, item_id, category, item_type, day, fields):
+        weights = self._weights(fields, grow=True)
+        for term in weights:
+            self.df[term] += 1
+        self.size += 1
+
+        partition = self.partitions.get((category, item_type))
+        if partition is None:
+            partition = self.partitions[(category, item_type)] = self.partition_class()
+        partition.add(item_id, day, weights)
+
+    def add(self, item_id, category, item_type, day, fields):
+        """Index one report; day is a date ordinal"""
+        with self.lock:
+            self._add(item_id, category, item_type, day, fields)
+
+    def search(self, category, item_type, day, fields, window=DEFAULT_WINDOW_DAYS, limit=10, exclude=None):
+        """Return [(score, item_id)] of the opposite type, best cosine similarity first"""
+        with self.lock:
+            partition = self.partitions.get((category, OPPOSITE_TYPE.get(item_type)))
+            query = self._weights(fields, grow=False)
+            if not partition or not query:
+                return []
+            return partition.top(query, self.df, self.size, day, window, limit, exclude)
+
+    def refresh(self):
+        """Index open items newer than the watermark"""
+        from app import db
+        from app.models import Item
+
+        with self.lock:
+            rows = (db.session.query(Item.item_id, Item.category, Item.item_type, Item.date,
+                                     Item.title, Item.description, Item.location)
+                    .filter(Item.item_id > self.last_item_id, Item.status.in_(OPEN_STATUSES))
+                    .order_by(Item.item_id)
+                    .yield_per(5000))
+            for item_id, category, item_type, date, title, description, location in rows:
+                self._add(item_id, category, item_type, date.toordinal(),
+                          {'title': title, 'description': description, 'location': location})
+                self.last_item_id = item_id
+
+    def matches_for(self, query, window=DEFAULT_WINDOW_DAYS, limit=10):
+        """Candidates for a stored item's match_query, after catching up with new items"""
+        self.refresh()
+        return self.search(query['category'], query['item_type'], query['day'], query['fields'],
+                           window=window, limit=limit, exclude=query['item_id'])
+
+
+def get_match_index():
+    """The text match index of the current app"""
+    from flask import current_app
+
+    index = current_app.extensions.get('text_match_index')
+    if index is None:
+        index = current_app.extensions.setdefault('text_match_index', TextMatchIndex())
+    return index
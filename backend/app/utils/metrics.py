@@ -0,0 +1,222 @@
+"""
+Request metrics in the Prometheus text format.
+
+RequestMetrics hooks into every request and keeps, per endpoint and
+method: request counts by status, a latency histogram, and request and
+response size histograms, plus the number of requests in flight. It only
+updates a few dicts under a lock, so it costs a few microseconds per
+request.
+
+Each worker process counts on its own. With METRICS_DIR set, a background
+thread in each worker writes its totals to METRICS_DIR/<pid>.json every
+METRICS_FLUSH_SECONDS while requests come in, and /metrics adds up every
+file in the directory. Totals of exited workers stay in the sum, so
+counters never go backwards when a worker is recycled, but their in-flight
+requests are dropped. Clear the directory when the server starts;
+gunicorn.conf.py and serve.py do.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # Bytes
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+STARTED_KEY = 'metrics.started'  # WSGI environ key holding the request's start time
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAMS = (
+    ('latency', 'http_request_duration_seconds', 'Time from the first before_request hook to the response',
+     LATENCY_BUCKETS),
+    ('request_size', 'http_request_size_bytes', 'Request body sizes', SIZE_BUCKETS),
+    ('response_size', 'http_response_size_bytes', 'Response body sizes as sent, after compression', SIZE_BUCKETS),
+)
+
+
+def _observe(histograms, key, buckets, value):
+    """Count `value` in its bucket; a histogram is [count per bucket..., count above the last bucket, sum]"""
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+    histogram[bisect_left(buckets, value)] += 1
+    histogram[-1] += value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clear_metrics_dir(directory):
+    """Create `directory` and delete the files of a previous server run"""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            os.remove(os.path.join(directory, name))
+
+
+class RequestMetrics:
+    """Per-process request counters, flushed to `directory` for aggregation across workers"""
+
+    def __init__(self, directory=None, flush_seconds=1.0):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.reset()
+
+    def reset(self):
+        """Start from zero; called in each worker after a fork"""
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.requests = {}  # (endpoint, method, status) -> count
+        self.latency = {}  # (endpoint, method) -> histogram
+        self.request_size = {}
+        self.response_size = {}
+        self.in_flight = 0
+        self.dirty = False  # Counts changed since the last flush
+        self.flusher = None
+
+    def before_request(self):
+        # Every access through the `request` proxy costs about a microsecond, so each hook resolves it once
+        request._get_current_object().environ[STARTED_KEY] = time.perf_counter()
+        with self.lock:
+            self.in_flight += 1
+            self.dirty = True
+
+    def after_request(self, response):
+        current = request._get_current_object()
+        started = current.environ.get(STARTED_KEY)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        key = (current.endpoint or 'unmatched', current.method)
+        received = current.environ.get('CONTENT_LENGTH', '')
+        received = int(received) if received.isdigit() else 0
+        sent = response.content_length  # None for streamed responses
+
+        with self.lock:
+            status_key = key + (response.status_code,)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            _observe(self.latency, key, LATENCY_BUCKETS, elapsed)
+            _observe(self.request_size, key, SIZE_BUCKETS, received)
+            if sent is not None:
+                _observe(self.response_size, key, SIZE_BUCKETS, sent)
+            self.dirty = True
+
+        if self.directory and self.flusher is None:
+            self._start_flusher()
+        return response
+
+    def teardown_request(self, exc):
+        if request._get_current_object().environ.pop(STARTED_KEY, None) is not None:
+            with self.lock:
+                self.in_flight -= 1
+                self.dirty = True
+
+    def snapshot(self):
+        """This process's totals as a JSON-serializable dict"""
+        with self.lock:
+            return {
+                'pid': self.pid,
+                'in_flight': self.in_flight,
+                'requests': [[*key, count] for key, count in self.requests.items()],
+                **{name: [[*key, list(histogram)] for key, histogram in getattr(self, name).items()]
+                   for name, _, _, _ in HISTOGRAMS},
+            }
+
+    def flush(self):
+        """Write the snapshot to directory/<pid>.json, atomically so readers never see half a file"""
+        self.dirty = False
+        path = os.path.join(self.directory, f'{self.pid}.json')
+        temporary = f'{path}.{threading.get_ident()}.tmp'  # The flusher and /metrics may write at once
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, path)
+
+    def _start_flusher(self):
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self.flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            if self.dirty:
+                try:
+                    self.flush()
+                except OSError:
+                    logger.warning('Could not write metrics to %s', self.directory, exc_info=True)
+
+    def collect(self):
+        """Snapshots of every worker: this one, plus the others' files when there is a directory"""
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # Removed or replaced while listing
+        return snapshots
+
+    def view(self):
+        """GET /metrics"""
+        return Response(render(self.collect()), content_type=CONTENT_TYPE)
+
+
+def _labels(endpoint, method, **extra):
+    pairs = {'endpoint': endpoint, 'method': method, **extra}
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in pairs.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(pairs, escaped)) + '}'
+
+
+def render(snapshots):
+    """Sum worker snapshots into the Prometheus text exposition format"""
+    requests = {}
+    histograms = {name: {} for name, _, _, _ in HISTOGRAMS}
+    in_flight = 0
+    for snapshot in snapshots:
+        if snapshot['pid'] == os.getpid() or _pid_alive(snapshot['pid']):
+            in_flight += snapshot['in_flight']
+        for endpoint, method, status, count in snapshot['requests']:
+            requests[endpoint, method, status] = requests.get((endpoint, method, status), 0) + count
+        for name, _, _, _ in HISTOGRAMS:
+            merged = histograms[name]
+            for endpoint, method, histogram in snapshot[name]:
+                total = merged.setdefault((endpoint, method), [0] * len(histogram))
+                merged[endpoint, method] = [a + b for a, b in zip(total, histogram)]
+
+    lines = ['# HELP http_requests_total Requests handled, by endpoint, method and status',
+             '# TYPE http_requests_total counter']
+    for (endpoint, method, status), count in sorted(requests.items()):
+        lines.append(f'http_requests_total{_labels(endpoint, method, status=status)} {count}')
+
+    for name, metric, description, buckets in HISTOGRAMS:
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} histogram']
+        for (endpoint, method), histogram in sorted(histograms[name].items()):
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), histogram[:-1]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{_labels(endpoint, method, le=bound)} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(endpoint, method)} {histogram[-1]}')
+            lines.append(f'{metric}_count{_labels(endpoint, method)} {cumulative}')
+
+    lines += ['# HELP http_requests_in_flight Requests being handled by live workers',
+              '# TYPE http_requests_in_flight gauge', f'http_requests_in_flight {in_flight}']
+    return '\n'.join(lines) + '\n'
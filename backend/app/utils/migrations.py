@@ -0,0 +1,181 @@
+"""
+Schema setup and upgrades, run once per deployment instead of at every app start.
+
+`flask init-db` brings the database to the current schema and makes sure
+the default admin exists; `flask migrate` only applies pending
+migrations. Each migration is recorded in the schema_version table, so
+workers can start without touching the database.
+"""
+
+from sqlalchemy import inspect, literal
+from sqlalchemy.schema import CreateTable
+
+DEFAULT_ADMIN_EMAIL = 'admin@strathmore.ac.ke'
+
+
+def _column_ddl(column, dialect):
+    """Column definition for ALTER TABLE ADD COLUMN; NOT NULL only when a default fills existing rows"""
+    quote = dialect.identifier_preparer.quote
+    ddl = f'{quote(column.name)} {column.type.compile(dialect=dialect)}'
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        ddl += ' DEFAULT ' + str(literal(default, column.type).compile(dialect=dialect,
+                                                                      compile_kwargs={'literal_binds': True}))
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    for foreign_key in column.foreign_keys:
+        ddl += f' REFERENCES {quote(foreign_key.column.table.name)} ({quote(foreign_key.column.name)})'
+    return ddl
+
+
+def sync_models(connection):
+    """
+    Create the tables, columns and indexes of the models that the database lacks.
+
+    Existing columns are never altered or dropped. Returns the names of
+    what was added.
+    """
+    from app import db
+
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            table.create(connection)
+            added.append(table.name)
+            continue
+
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                connection.exec_driver_sql(f'ALTER TABLE {connection.dialect.identifier_preparer.quote(table.name)} '
+                                           f'ADD COLUMN {_column_ddl(column, connection.dialect)}')
+                added.append(f'{table.name}.{column.name}')
+
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+                added.append(index.name)
+
+    return added
+
+
+def _upgrade_to_models(connection):
+    added = sync_models(connection)
+    # Counters created next to existing data start at zero; fill them once the DDL is committed
+    needs_counters = 'stat_counters' in added and connection.exec_driver_sql('SELECT 1 FROM items LIMIT 1').first()
+    return added, bool(needs_counters)
+
+
+def _rebuild_with_autoincrement(connection):
+    """
+    Rebuild SQLite tables created before their model asked for AUTOINCREMENT.
+
+    sqlite_autoincrement only takes effect in CREATE TABLE, so older
+    databases kept plain rowid tables that hand out the ids of deleted
+    rows again, including archived ones. Each such table is recreated
+    from the model, its rows copied, and the old table dropped. The id
+    sequence starts past the largest id in the table's archive too.
+    """
+    from app import db
+
+    if connection.dialect.name != 'sqlite':
+        return [], False
+    quote = connection.dialect.identifier_preparer.quote
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    # Foreign keys point at the table by name; check them at commit, once it exists again
+    connection.exec_driver_sql('PRAGMA defer_foreign_keys = ON')
+    rebuilt = []
+
+    for table in db.metadata.sorted_tables:
+        if not table.dialect_options['sqlite']['autoincrement'] or table.name not in existing_tables:
+            continue
+        sql = connection.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                         (table.name,)).scalar()
+        if 'AUTOINCREMENT' in sql.upper():
+            continue
+
+        name, temporary = quote(table.name), quote(f'{table.name}_rebuild')
+        ddl = str(CreateTable(table).compile(dialect=connection.dialect))
+        connection.exec_driver_sql(ddl.replace(f'CREATE TABLE {name} ', f'CREATE TABLE {temporary} ', 1))
+        old_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        columns = ', '.join(quote(column.name) for column in table.columns if column.name in old_columns)
+        connection.exec_driver_sql(f'INSERT INTO {temporary} ({columns}) SELECT {columns} FROM {name}')
+        connection.exec_driver_sql(f'DROP TABLE {name}')
+        connection.exec_driver_sql(f'ALTER TABLE {temporary} RENAME TO {name}')
+        for index in table.indexes:
+            index.create(connection)
+
+        archive = f'{table.name}_archive'
+        if archive in existing_tables:
+            key = quote(table.primary_key.columns[0].name)
+            highest = connection.exec_driver_sql(f'SELECT MAX({key}) FROM {quote(archive)}').scalar() or 0
+            connection.exec_driver_sql('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?',
+                                       (highest, table.name))
+            connection.exec_driver_sql('INSERT INTO sqlite_sequence (name, seq) SELECT ?, ? WHERE NOT EXISTS '
+                                       '(SELECT 1 FROM sqlite_sequence WHERE name = ?)',
+                                       (table.name, highest, table.name))
+        rebuilt.append(f'{table.name} AUTOINCREMENT')
+
+    return rebuilt, False
+
+
+# (version, description, upgrade); upgrade(connection) returns (added names, whether counters need a rebuild)
+MIGRATIONS = [
+    (1, 'Photos, archives, statistics, moderation leases, saved searches and events', _upgrade_to_models),
+    (2, 'AUTOINCREMENT ids on tables created without it', _rebuild_with_autoincrement),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    """Latest applied migration, 0 for a database that predates schema_version"""
+    from app import db
+    from app.models import SchemaVersion
+
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return 0
+    return connection.execute(db.select(db.func.max(SchemaVersion.version))).scalar() or 0
+
+
+def migrate():
+    """Apply pending migrations in order; returns [(version, description, added)] of those applied"""
+    from app import db
+    from app.models import SchemaVersion
+    from app.utils.stats import rebuild_counters
+
+    applied = []
+    rebuild = False
+    with db.engine.begin() as connection:
+        version = current_version(connection)
+        if version == 0:
+            SchemaVersion.__table__.create(connection, checkfirst=True)
+        for number, description, upgrade in MIGRATIONS:
+            if number <= version:
+                continue
+            added, needs_counters = upgrade(connection)
+            rebuild = rebuild or needs_counters
+            connection.execute(db.insert(SchemaVersion).values(version=number, description=description))
+            applied.append((number, description, added))
+
+    if rebuild:
+        rebuild_counters()
+    return applied
+
+
+def ensure_admin(email=DEFAULT_ADMIN_EMAIL, password='Admin123'):
+    """Create the admin account if no user has `email`; returns whether it was created"""
+    from app import db
+    from app.models import User
+
+    if db.session.query(User.user_id).filter_by(email=email).first():
+        return False
+    admin = User(name='Admin User', email=email, role='admin')
+    admin.set_password(password)
+    db.session.add(admin)
+    db.session.commit()
+    return True
@@ -0,0 +1,146 @@
+"""Saved-search percolator: match new items against stored searches instead of searches against items"""
+
+import threading
+from datetime import datetime, timedelta
+from app.utils.matching import tokenize, item_fields
+
+# Searches changed slightly before the previous refresh may be committed after it;
+# re-reading this window catches them. Re-indexing a search is idempotent.
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def compile_terms(query):
+    """The words an item must contain to match a saved search"""
+    return frozenset(tokenize(query))
+
+
+class SavedSearchIndex:
+    """
+    Inverted index of saved searches, keyed by (category, item_type, term).
+
+    Each search is filed under exactly one key: its filters plus one of its
+    words (the one whose posting list is currently shortest), or None when
+    it has no words. An item then probes the keys for its own category and
+    type, the wildcard None for each, and every word it contains, and only
+    the searches found there are checked in full. The work per item grows
+    with the item's text, not with the number of saved searches.
+    """
+
+    def __init__(self):
+        self.postings = {}  # (category, item_type, term) -> {search_id}
+        self.searches = {}  # search_id -> (user_id, terms, key)
+        self.watermark = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.searches)
+
+    def _remove(self, search_id):
+        entry = self.searches.pop(search_id, None)
+        if entry:
+            bucket = self.postings[entry[2]]
+            bucket.discard(search_id)
+            if not bucket:
+                del self.postings[entry[2]]
+
+    def _add(self, search_id, user_id, query, category, item_type):
+        self._remove(search_id)
+        terms = compile_terms(query)
+        anchor = min(sorted(terms), key=lambda term: len(self.postings.get((category, item_type, term), ())),
+                     default=None)
+        key = (category, item_type, anchor)
+        self.postings.setdefault(key, set()).add(search_id)
+        self.searches[search_id] = (user_id, terms, key)
+
+    def add(self, search_id, user_id, query, category=None, item_type=None):
+        """Index one saved search, replacing an earlier version of it"""
+        with self.lock:
+            self._add(search_id, user_id, query, category, item_type)
+
+    def remove(self, search_id):
+        with self.lock:
+            self._remove(search_id)
+
+    def match(self, category, item_type, fields, exclude_user=None):
+        """Return [(search_id, user_id)] of the searches an item with this text satisfies"""
+        tokens = set()
+        for text in fields.values():
+            tokens.update(tokenize(text))
+
+        matched = []
+        with self.lock:
+            for search_category in (category, None):
+                for search_type in (item_type, None):
+                    for term in (*tokens, None):
+                        for search_id in self.postings.get((search_category, search_type, term), ()):
+                            user_id, terms, _ = self.searches[search_id]
+                            if user_id != exclude_user and terms <= tokens:
+                                matched.append((search_id, user_id))
+        return matched
+
+    def refresh(self):
+        """Apply saved searches created, changed or deactivated since the last refresh"""
+        from app import db
+        from app.models import SavedSearch
+
+        started = datetime.utcnow()
+        query = db.session.query(SavedSearch.search_id, SavedSearch.user_id, SavedSearch.keywords,
+                                 SavedSearch.category, SavedSearch.item_type, SavedSearch.is_active)
+        with self.lock:
+            if self.watermark is None:
+                query = query.filter(SavedSearch.is_active.is_(True))
+            else:
+                query = query.filter(SavedSearch.updated_at > self.watermark - REFRESH_OVERLAP)
+            for search_id, user_id, text, category, item_type, is_active in query.yield_per(5000):
+                if is_active:
+                    self._add(search_id, user_id, text, category, item_type)
+                else:
+                    self._remove(search_id)
+            self.watermark = started
+
+
+def get_search_index():
+    """The saved search index of the current app"""
+    from flask import current_app
+
+    index = current_app.extensions.get('saved_search_index')
+    if index is None:
+        index = current_app.extensions.setdefault('saved_search_index', SavedSearchIndex())
+    return index
+
+
+def alert_saved_searches(item_ids):
+    """
+    Add alerts for every saved search the given newly verified items match.
+
+    Rows are added to the caller's transaction and nothing is committed, so
+    the alerts appear together with the status change. An item never alerts
+    the user who reported it, and a search is alerted at most once per item.
+    Returns the number of alerts added.
+    """
+    from app import db
+    from app.models import Item, SearchAlert
+    from app.utils.stats import dialect_insert
+
+    if not item_ids:
+        return 0
+
+    index = get_search_index()
+    index.refresh()
+
+    rows = []
+    now = datetime.utcnow()
+    for item in (db.session.query(Item.item_id, Item.user_id, Item.category, Item.item_type,
+                                  Item.title, Item.description, Item.location)
+                 .filter(Item.item_id.in_(item_ids))):
+        for search_id, user_id in index.match(item.category, item.item_type, item_fields(item),
+                                              exclude_user=item.user_id):
+            rows.append({'search_id': search_id, 'user_id': user_id, 'item_id': item.item_id,
+                         'seen': False, 'created_at': now})
+    if not rows:
+        return 0
+
+    connection = db.session.connection()
+    stmt = dialect_insert(connection.dialect.name)(SearchAlert.__table__).on_conflict_do_nothing()
+    connection.execute(stmt, rows)
+    return len(rows)
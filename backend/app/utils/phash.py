@@ -0,0 +1,199 @@
+"""Perceptual photo hashing and a multi-index hash table for near-duplicate lookups"""
+
+import threading
+from bisect import bisect_right
+from itertools import combinations
+from importlib.util import find_spec
+from io import BytesIO
+
+# Optional dependency, imported on first use so workers that never hash a photo don't load it
+HAS_PIL = find_spec('PIL') is not None
+
+HASH_SIZE = 8  # 8x8 gradient grid -> 64-bit hash
+DEFAULT_RADIUS = 8  # Max Hamming distance treated as "the same photo"
+
+
+def dhash(img, hash_size=HASH_SIZE):
+    """Difference hash of a PIL image as an int of hash_size**2 bits"""
+    from PIL import Image
+
+    img = img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(img.getdata())
+    width = hash_size + 1
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def image_hash(data):
+    """Hex dHash of encoded image bytes, or None if they can't be decoded"""
+    if not HAS_PIL:
+        return None
+    from PIL import Image
+
+    try:
+        img = Image.open(BytesIO(data))
+        # Let the JPEG decoder downscale while decoding; we only need a few pixels
+        img.draft('L', (64, 64))
+        return format_hash(dhash(img))
+    except Exception as e:
+        print(f"[PHASH] Could not hash image: {e}")
+        return None
+
+
+def format_hash(value):
+    """Fixed-width hex representation stored on Item.photo_hash"""
+    return f'{value:0{HASH_SIZE * HASH_SIZE // 4}x}'
+
+
+def parse_hash(text):
+    """Inverse of format_hash"""
+    return int(text, 16)
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+
+class MultiIndexHashTable:
+    """
+    Multi-index hash table over 64-bit hashes with Hamming distance.
+
+    Each hash is split into `chunks` substrings, each indexed in its own
+    table. If two hashes are within distance r, at least one of their
+    substrings is within r // chunks (pigeonhole), so a radius search only
+    probes the few buckets near each substring instead of scanning every hash.
+    """
+
+    def __init__(self, bits=HASH_SIZE * HASH_SIZE, chunks=4):
+        self.chunks = chunks
+        self.chunk_bits = bits // chunks
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        self.tables = [{} for _ in range(chunks)]
+        self.size = 0
+        self._probe_masks = {}
+
+    def __len__(self):
+        return self.size
+
+    def _split(self, value):
+        return [(value >> (i * self.chunk_bits)) & self.chunk_mask for i in range(self.chunks)]
+
+    def _masks(self, sub_radius):
+        """XOR masks of every chunk-sized bit pattern with at most sub_radius bits set"""
+        masks = self._probe_masks.get(sub_radius)
+        if masks is None:
+            masks = [0]
+            for count in range(1, sub_radius + 1):
+                for bits in combinations(range(self.chunk_bits), count):
+                    mask = 0
+                    for bit in bits:
+                        mask |= 1 << bit
+                    masks.append(mask)
+            self._probe_masks[sub_radius] = masks
+        return masks
+
+    def add(self, value, payload):
+        """Insert a hash with an attached payload (e.g. an item id)"""
+        entry = (value, payload)
+        for table, key in zip(self.tables, self._split(value)):
+            table.setdefault(key, []).append(entry)
+        self.size += 1
+
+    def search(self, value, radius):
+        """Return [(distance, payload)] for every entry within radius of value"""
+        masks = self._masks(radius // self.chunks)
+        seen = set()
+        results = []
+        for table, key in zip(self.tables, self._split(value)):
+            for mask in masks:
+                bucket = table.get(key ^ mask)
+                if not bucket:
+                    continue
+                for entry in bucket:
+                    if entry in seen:
+                        continue
+                    seen.add(entry)
+                    distance = hamming_distance(value, entry[0])
+                    if distance <= radius:
+                        results.append((distance, entry[1]))
+        return results
+
+
+class PhotoHashIndex:
+    """
+    In-process index of ItemPhoto.photo_hash values, with item ids as payload.
+
+    The index is filled lazily from the database and catches up with rows
+    written by other workers through a photo_id watermark on every lookup.
+    Results may reference items that were deleted since, so callers should
+    load the returned ids from the database before using them.
+    """
+
+    def __init__(self):
+        self.table = MultiIndexHashTable()
+        self.entries = []  # (photo_id, hash, item_id) in photo_id order, for paging through pairs
+        self.last_photo_id = 0
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Load hashes of photos newer than the watermark"""
+        from app import db
+        from app.models import ItemPhoto
+
+        with self.lock:
+            rows = (db.session.query(ItemPhoto.photo_id, ItemPhoto.photo_hash, ItemPhoto.item_id)
+                    .filter(ItemPhoto.photo_id > self.last_photo_id, ItemPhoto.photo_hash.isnot(None))
+                    .order_by(ItemPhoto.photo_id)
+                    .yield_per(5000))
+            for photo_id, photo_hash, item_id in rows:
+                value = parse_hash(photo_hash)
+                self.table.add(value, item_id)
+                self.entries.append((photo_id, value, item_id))
+                self.last_photo_id = photo_id
+
+    def search(self, photo_hash, radius=DEFAULT_RADIUS):
+        """Return [(distance, item_id)] sorted by distance, one entry per photo"""
+        self.refresh()
+        with self.lock:
+            matches = self.table.search(parse_hash(photo_hash), radius)
+        return sorted(matches)
+
+    def candidate_pairs(self, radius=DEFAULT_RADIUS, after_id=0, limit=100, max_scan=5000):
+        """
+        Find near-duplicate item pairs (distance, item_id_a, item_id_b) with a < b.
+
+        Photos are scanned in id order starting after photo `after_id`; the scan
+        stops once `limit` pairs are found or `max_scan` photos were looked at,
+        so each call does bounded work. Returns (pairs, next_after_id), where
+        next_after_id is None once every photo has been scanned.
+        """
+        self.refresh()
+        best = {}
+        with self.lock:
+            start = bisect_right(self.entries, (after_id, float('inf')))
+            position = start
+            while position < len(self.entries) and position - start < max_scan and len(best) < limit:
+                _, value, item_id = self.entries[position]
+                for distance, other_id in self.table.search(value, radius):
+                    if item_id < other_id and distance < best.get((item_id, other_id), radius + 1):
+                        best[(item_id, other_id)] = distance
+                position += 1
+            next_after_id = self.entries[position - 1][0] if position < len(self.entries) else None
+        pairs = sorted((distance, a, b) for (a, b), distance in best.items())
+        return pairs, next_after_id
+
+
+def get_photo_index():
+    """The photo hash index of the current app"""
+    from flask import current_app
+
+    index = current_app.extensions.get('photo_hash_index')
+    if index is None:
+        index = current_app.extensions.setdefault('photo_hash_index', PhotoHashIndex())
+    return index
@@ -0,0 +1,79 @@
+"""
+Per-request SQL statistics: query counts and timings, slow queries, N+1 warnings.
+
+instrument_engine times every statement on an engine. Inside a request
+the statements are tallied on flask.g; finish_query_stats then adds a
+Server-Timing header (in debug mode or with SQL_SERVER_TIMING) and logs a
+warning when one SELECT ran SQL_N_PLUS_ONE_THRESHOLD times or more, the
+usual sign of a relationship lazy-loaded inside a loop. Statements slower
+than SQL_SLOW_QUERY_MS are logged with their parameters wherever they run.
+"""
+
+import logging
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+MAX_LOGGED_PARAMETERS = 500  # Characters of the parameters shown in the slow query log
+
+
+class QueryStats:
+    """Statements run while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold):
+        """SELECT statements that ran at least `threshold` times, most frequent first"""
+        return [(statement, count) for statement, count in self.statements.most_common()
+                if count >= threshold and statement.lstrip().upper().startswith('SELECT')]
+
+
+def instrument_engine(engine, config):
+    """Time every statement on `engine`, for the request's QueryStats and the slow query log"""
+    slow_seconds = config['SQL_SLOW_QUERY_MS'] / 1000
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        if has_request_context():
+            stats = g.get('query_stats')
+            if stats is not None:
+                stats.count += 1
+                stats.seconds += elapsed
+                stats.statements[statement] += 1
+        if slow_seconds and elapsed >= slow_seconds:
+            logger.warning('Slow query (%.0f ms): %s; parameters: %.*s', elapsed * 1000, statement,
+                           MAX_LOGGED_PARAMETERS, repr(parameters))
+
+
+def start_query_stats():
+    """before_request hook"""
+    g.query_stats = QueryStats()
+
+
+def finish_query_stats(response):
+    """after_request hook: Server-Timing header and N+1 warnings"""
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+    config = current_app.config
+
+    if current_app.debug or config['SQL_SERVER_TIMING']:
+        response.headers.add('Server-Timing', f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+
+    threshold = config['SQL_N_PLUS_ONE_THRESHOLD']
+    for statement, count in (stats.repeated(threshold) if threshold else []):
+        logger.warning('Probable N+1 query in %s %s (%s): ran %d times: %s', request.method, request.path,
+                       request.endpoint, count, ' '.join(statement.split()))
+    return response
@@ -0,0 +1,74 @@
+"""
+Read/write splitting between the primary database and a read replica.
+
+Views decorated with use_replica run their SELECTs on the replica engine
+when DB_REPLICA_URI is set. Writes, anything read after a flush or a Core
+write in the same request, and every request from a client that wrote in
+the last DB_REPLICA_STICKY_SECONDS go to the primary, so people always see
+their own changes even while the replica lags behind.
+"""
+
+import time
+from functools import wraps
+
+from flask import current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+PRIMARY_COOKIE = 'db_primary_until'  # Epoch second until which the client reads from the primary
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the replica while info['use_replica'] is set"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('use_replica') and getattr(clause, 'is_select', False):
+            engine = current_app.extensions.get('db_replica')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        if not getattr(statement, 'is_select', False):
+            self.info['use_replica'] = False
+        return super().execute(statement, *args, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def pin_to_primary(session, flush_context):
+    """Read what the session just wrote from the primary for the rest of the request"""
+    session.info['use_replica'] = False
+
+
+def wrote_recently():
+    """Whether the client made a write within DB_REPLICA_STICKY_SECONDS"""
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def use_replica(f):
+    """Run a read-only view's queries on the replica, if there is one and the client hasn't just written"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app import db
+
+        if 'db_replica' not in current_app.extensions or wrote_recently():
+            return f(*args, **kwargs)
+        db.session.info['use_replica'] = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            db.session.info['use_replica'] = False
+    return decorated_function
+
+
+def remember_writes(response):
+    """after_request hook: keep a client that just wrote on the primary for a few seconds"""
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        seconds = current_app.config['DB_REPLICA_STICKY_SECONDS']
+        response.set_cookie(PRIMARY_COOKIE, f'{time.time() + seconds:.3f}', max_age=seconds,
+                            httponly=True, samesite='Lax')
+    return response
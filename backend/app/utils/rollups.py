@@ -0,0 +1,129 @@
+"""Daily rollup tables behind the admin time-series charts"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+
+# Rows committed slightly after the previous run started may carry an older
+# updated_at; re-scanning this window catches them. Re-rolling a day is idempotent.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _sources():
+    """(name, live model, archive model, rollup model, grouping columns) for every rolled-up table"""
+    from app.models import Item, Claim, ItemArchive, ClaimArchive, DailyItemRollup, DailyClaimRollup
+
+    return [
+        ('items', Item, ItemArchive, DailyItemRollup, ['category', 'item_type', 'status']),
+        ('claims', Claim, ClaimArchive, DailyClaimRollup, ['status']),
+    ]
+
+
+def _roll_day(model, archive, rollup, columns, day):
+    """Replace one day of a rollup table with a GROUP BY over that day's live and archived rows"""
+    from app import db
+    from app.utils.archive import with_archive
+
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+    db.session.execute(db.delete(rollup).where(rollup.day == day))
+    rows = with_archive(model, archive, columns,
+                        where=lambda m: db.and_(m.created_at >= start, m.created_at < end))
+    grouped = (db.select(db.literal(day, db.Date), *[rows.c[name] for name in columns], func.count())
+               .group_by(*[rows.c[name] for name in columns]))
+    target = [rollup.day] + [getattr(rollup, name) for name in columns] + [rollup.count]
+    db.session.execute(db.insert(rollup).from_select(target, grouped))
+
+
+def refresh_rollups(full=False):
+    """
+    Bring the daily rollups up to date and commit.
+
+    Only the days that contain rows created or changed since the last run
+    are recomputed, found through the updated_at index. With `full`, every
+    day is rebuilt. Returns {source: number of days rolled up}.
+    """
+    from app import db
+    from app.models import RollupWatermark
+
+    started = datetime.utcnow()
+    rolled = {}
+
+    for name, model, archive, rollup, columns in _sources():
+        watermark = db.session.get(RollupWatermark, name)
+        days = db.session.query(func.date(model.created_at)).filter(model.created_at.isnot(None))
+        if full:
+            db.session.execute(db.delete(rollup))
+            # Archived rows never change, so only a full rebuild needs their days
+            days = days.union(db.session.query(func.date(archive.created_at)))
+        elif watermark:
+            days = days.filter(model.updated_at > watermark.updated_at - WATERMARK_OVERLAP)
+
+        affected = sorted({_as_date(day) for (day,) in days.distinct() if day is not None})
+        for day in affected:
+            _roll_day(model, archive, rollup, columns, day)
+
+        if watermark:
+            watermark.updated_at = started
+        else:
+            db.session.add(RollupWatermark(name=name, updated_at=started))
+        # One transaction per source keeps each commit short
+        db.session.commit()
+        rolled[name] = len(affected)
+
+    return rolled
+
+
+def _day_range(start, end):
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def report_series(start, end, group_by='item_type', category=None, item_type=None):
+    """Items reported per day between start and end (inclusive), one series per value of `group_by`"""
+    from app import db
+    from app.models import DailyItemRollup
+
+    key = getattr(DailyItemRollup, group_by)
+    query = (db.session.query(DailyItemRollup.day, key, func.sum(DailyItemRollup.count))
+             .filter(DailyItemRollup.day >= start, DailyItemRollup.day <= end))
+    if category:
+        query = query.filter(DailyItemRollup.category == category)
+    if item_type:
+        query = query.filter(DailyItemRollup.item_type == item_type)
+
+    days = _day_range(start, end)
+    index = {day: i for i, day in enumerate(days)}
+    series = {}
+    for day, value, count in query.group_by(DailyItemRollup.day, key):
+        series.setdefault(value, [0] * len(days))[index[_as_date(day)]] = int(count)
+
+    return {'days': [day.isoformat() for day in days], 'series': series}
+
+
+def claim_series(start, end):
+    """Claims made per day between start and end (inclusive) by outcome, with the approval rate"""
+    from app import db
+    from app.models import DailyClaimRollup
+
+    days = _day_range(start, end)
+    index = {day: i for i, day in enumerate(days)}
+    series = {status: [0] * len(days) for status in ('pending', 'approved', 'rejected')}
+    totals = [0] * len(days)
+
+    rows = (db.session.query(DailyClaimRollup.day, DailyClaimRollup.status, DailyClaimRollup.count)
+            .filter(DailyClaimRollup.day >= start, DailyClaimRollup.day <= end))
+    for day, status, count in rows:
+        i = index[_as_date(day)]
+        series.setdefault(status, [0] * len(days))[i] += count
+        totals[i] += count
+
+    # Share of the day's decided claims that were approved
+    series['approval_rate'] = [
+        round(approved / (approved + rejected), 3) if approved + rejected else None
+        for approved, rejected in zip(series['approved'], series['rejected'])
+    ]
+    series['total'] = totals
+    return {'days': [day.isoformat() for day in days], 'series': series}
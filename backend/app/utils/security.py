@@ -4,24 +4,53 @@ Security middleware and rate limiting
 
 import time
 import hashlib
+import logging
 from functools import wraps
-from flask import request, jsonify, g
+from flask import request, jsonify, g, current_app
 from collections import defaultdict, deque
 
-# Simple in-memory rate limiter (for production, use Redis or similar)
+logger = logging.getLogger(__name__)
+
+# In-memory rate limiter by default; a shared storage backend keeps the counts
+# per client across worker processes
 class RateLimiter:
-    def __init__(self):
+    def __init__(self, window_size=60, max_requests=None, storage_uri='memory://', storage=None):
         self.requests = defaultdict(deque)
-        self.window_size = 60  # 1 minute window
-        self.max_requests = {
+        self.window_size = window_size
+        self.max_requests = max_requests or {
             'default': 1000,        # Very lenient for development
             'auth': 500,            # Very lenient for development
             'upload': 500,          # Very lenient for development
             'admin': 500            # Very lenient for development
         }
+        self.strategy = None
+        # `storage`, a limits storage instance, stands in for the one storage_uri would open
+        if storage is not None or not storage_uri.startswith('memory://'):
+            from limits import RateLimitItemPerSecond
+            from limits.storage import MovingWindowSupport, storage_from_string
+            from limits.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+            storage = storage or storage_from_string(storage_uri)
+            strategy = MovingWindowRateLimiter if isinstance(storage, MovingWindowSupport) else FixedWindowRateLimiter
+            self.strategy = strategy(storage)
+            self.items = {limit_type: RateLimitItemPerSecond(amount, window_size)
+                          for limit_type, amount in self.max_requests.items()}
+    
+    @classmethod
+    def from_config(cls, config):
+        """Rate limiter with the RATELIMIT_* settings"""
+        return cls(window_size=config['RATELIMIT_WINDOW_SECONDS'], storage_uri=config['RATELIMIT_STORAGE_URI'],
+                   max_requests={'default': config['RATELIMIT_DEFAULT'], 'auth': config['RATELIMIT_AUTH'],
+                                 'upload': config['RATELIMIT_UPLOAD'], 'admin': config['RATELIMIT_ADMIN']})
     
     def is_allowed(self, key, limit_type='default'):
         """Check if request is allowed based on rate limit"""
+        if self.strategy is not None:
+            item = self.items.get(limit_type, self.items['default'])
+            if not self.strategy.hit(item, key, limit_type):
+                logger.warning(f"[RATE LIMIT] Client {key} exceeded limit for '{limit_type}'")
+                return False
+            return True
+        
         now = time.time()
         window_start = now - self.window_size
         
@@ -33,16 +62,20 @@ class RateLimiter:
         # Check if under limit
         max_requests = self.max_requests.get(limit_type, self.max_requests['default'])
         if len(request_queue) >= max_requests:
-            print(f"[RATE LIMIT] Client {key} exceeded limit for '{limit_type}': {len(request_queue)}/{max_requests}")
+            logger.warning(f"[RATE LIMIT] Client {key} exceeded limit for '{limit_type}': {len(request_queue)}/{max_requests}")
             return False
         
         # Add current request
         request_queue.append(now)
-        print(f"[RATE LIMIT] Client {key} - {limit_type}: {len(request_queue)}/{max_requests} requests used")
+        logger.debug(f"[RATE LIMIT] Client {key} - {limit_type}: {len(request_queue)}/{max_requests} requests used")
         return True
     
     def get_remaining_requests(self, key, limit_type='default'):
         """Get number of remaining requests"""
+        if self.strategy is not None:
+            item = self.items.get(limit_type, self.items['default'])
+            return self.strategy.get_window_stats(item, key, limit_type).remaining
+        
         now = time.time()
         window_start = now - self.window_size
         
@@ -53,9 +86,22 @@ class RateLimiter:
         max_requests = self.max_requests.get(limit_type, self.max_requests['default'])
         return max(0, max_requests - len(request_queue))
 
-# Global rate limiter instance
+    def recent_requests(self, key):
+        """Requests from `key` in the current window, over all limit types, from the storage that counts them"""
+        if self.strategy is not None:
+            return sum(item.amount - self.strategy.get_window_stats(item, key, limit_type).remaining
+                       for limit_type, item in self.items.items())
+        
+        window_start = time.time() - self.window_size
+        return sum(1 for request_time in self.requests[key] if request_time >= window_start)
+
+# Rate limiter for code running outside an app; create_app sets one up from its config
 rate_limiter = RateLimiter()
 
+def get_rate_limiter():
+    """The rate limiter of the current app"""
+    return current_app.extensions.get('rate_limiter', rate_limiter)
+
 def get_client_identifier():
     """Get a unique identifier for the client"""
     # Try to get IP address
@@ -81,13 +127,13 @@ def rate_limit(limit_type='default'):
             endpoint = request.path
             method = request.method
             
-            print(f"\n[API REQUEST] {method} {endpoint}")
-            print(f"[CLIENT] ID: {client_id}")
+            logger.debug(f"[API REQUEST] {method} {endpoint} from client {client_id}")
             
             # Check rate limit
-            if not rate_limiter.is_allowed(client_id, limit_type):
-                remaining = rate_limiter.get_remaining_requests(client_id, limit_type)
-                print(f"[BLOCKED] Rate limit exceeded for {limit_type} on {endpoint}")
+            limiter = get_rate_limiter()
+            if not limiter.is_allowed(client_id, limit_type):
+                remaining = limiter.get_remaining_requests(client_id, limit_type)
+                logger.warning(f"[BLOCKED] Rate limit exceeded for {limit_type} on {endpoint}")
                 return jsonify({
                     'error': 'Rate limit exceeded',
                     'message': f'Too many requests. Please try again later.',
@@ -95,9 +141,9 @@ def rate_limit(limit_type='default'):
                 }), 429
             
             # Add rate limit headers
-            remaining = rate_limiter.get_remaining_requests(client_id, limit_type)
+            remaining = limiter.get_remaining_requests(client_id, limit_type)
             g.remaining_requests = remaining
-            print(f"[ALLOWED] Request allowed. Remaining: {remaining}")
+            logger.debug(f"[ALLOWED] Request allowed. Remaining: {remaining}")
             
             return f(*args, **kwargs)
         return decorated_function
@@ -150,14 +196,15 @@ def detect_suspicious_activity():
     # Check for rapid requests to sensitive endpoints
     sensitive_endpoints = ['/auth/login', '/auth/register', '/items/report']
     
-    if request.path in sensitive_endpoints:
-        # Count recent requests from this client
-        recent_requests = sum(1 for req_time in rate_limiter.requests[client_id] 
-                             if time.time() - req_time < 300)  # Last 5 minutes
+    if request.path.removeprefix('/api') in sensitive_endpoints:
+        # Count recent requests from this client, wherever the rate limiter keeps its counts
+        limiter = get_rate_limiter()
+        recent_requests = limiter.recent_requests(client_id)
         
         if recent_requests > 20:  # Threshold for suspicious activity
             log_security_event('suspicious_activity', 
-                              f'High frequency requests to {request.path}: {recent_requests} in 5 minutes')
+                              f'High frequency requests to {request.path}: {recent_requests} in '
+                              f'{limiter.window_size} seconds')
             return True
     
     return False
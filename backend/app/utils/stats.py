@@ -0,0 +1,234 @@
+"""Admin statistics counters, kept up to date in the same transaction as item and claim writes"""
+
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from sqlalchemy.orm import configure_mappers
+
+VERIFY_BUCKETS_PER_DOUBLING = 4  # Time-to-verify histogram resolution, buckets are ~19% wide
+APPROVED_PREFIX = 'claims:approved:'
+VERIFY_PREFIX = 'items:verify_bucket:'
+
+
+def item_keys(status, item_type, category):
+    """Counters an item contributes to"""
+    return ['items:total', f'items:status:{status}', f'items:type:{item_type}', f'items:category:{category}']
+
+
+def status_change(deltas, table, old, new):
+    """Move one row of `table` ('items' or 'claims') from one status counter to another"""
+    if old != new:
+        deltas[f'{table}:status:{old}'] -= 1
+        deltas[f'{table}:status:{new}'] += 1
+
+
+def verify_bucket(seconds):
+    """Histogram bucket of a time-to-verify; bucket widths grow geometrically from one minute"""
+    return int(math.log2(max(seconds, 0) / 60 + 1) * VERIFY_BUCKETS_PER_DOUBLING)
+
+
+def record_verification(deltas, created_at, verified_at):
+    """Count a pending item being approved"""
+    if created_at and verified_at:
+        deltas[f'{VERIFY_PREFIX}{verify_bucket((verified_at - created_at).total_seconds())}'] += 1
+
+
+def record_approval(deltas, approved_at):
+    """Count a claim approved on the day of approved_at"""
+    deltas[f'{APPROVED_PREFIX}{approved_at.date().isoformat()}'] += 1
+
+
+def dialect_insert(dialect_name):
+    """INSERT construct with ON CONFLICT support for the given dialect"""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def apply_deltas(connection, deltas):
+    """
+    Add deltas to the counters with an UPSERT, on the caller's connection.
+
+    Nothing is committed here: the counters change in the same transaction
+    as the writes they describe, so they never drift from the tables.
+    """
+    from app.models import StatCounter
+
+    rows = [{'name': name, 'value': value} for name, value in deltas.items() if value]
+    if not rows:
+        return
+
+    table = StatCounter.__table__
+    stmt = dialect_insert(connection.dialect.name)(table)
+    stmt = stmt.on_conflict_do_update(index_elements=['name'], set_={'value': table.c.value + stmt.excluded.value})
+    connection.execute(stmt, rows)
+
+
+def _change(obj, attr):
+    from sqlalchemy.orm import attributes
+
+    history = attributes.get_history(obj, attr)
+    if history.added and history.deleted and history.added[0] != history.deleted[0]:
+        return history.deleted[0], history.added[0]
+    return None
+
+
+def _collect_deltas(session, flush_context, instances):
+    """before_flush hook: turn pending Item and Claim changes into counter deltas"""
+    from app.models import Item, Claim
+
+    deltas = Counter()
+    now = datetime.utcnow()
+
+    for obj in session.new:
+        if isinstance(obj, Item):
+            for key in item_keys(obj.status or 'pending', obj.item_type, obj.category):
+                deltas[key] += 1
+        elif isinstance(obj, Claim):
+            deltas[f'claims:status:{obj.status or "pending"}'] += 1
+            if obj.status == 'approved':
+                record_approval(deltas, now)
+
+    for obj in session.deleted:
+        if isinstance(obj, Item):
+            for key in item_keys(obj.status, obj.item_type, obj.category):
+                deltas[key] -= 1
+        elif isinstance(obj, Claim):
+            deltas[f'claims:status:{obj.status}'] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Item):
+            for attr, prefix in (('status', 'items:status:'), ('item_type', 'items:type:'),
+                                 ('category', 'items:category:')):
+                change = _change(obj, attr)
+                if change:
+                    deltas[prefix + str(change[0])] -= 1
+                    deltas[prefix + str(change[1])] += 1
+                    if attr == 'status' and change == ('pending', 'verified'):
+                        record_verification(deltas, obj.created_at, obj.verified_at or now)
+        elif isinstance(obj, Claim):
+            change = _change(obj, 'status')
+            if change:
+                status_change(deltas, 'claims', *change)
+                if change[1] == 'approved':
+                    record_approval(deltas, now)
+
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def register_stats_listeners(session):
+    """Keep the counters in step with ORM writes made through `session`"""
+    from app.models import Item, Claim
+
+    if event.contains(session, 'before_flush', _collect_deltas):
+        return
+    event.listen(session, 'before_flush', _collect_deltas)
+    # Load the previous value on assignment so the history always has both sides;
+    # the attributes get their impl once the mappers are configured
+    configure_mappers()
+    for attribute in (Item.status, Item.item_type, Item.category, Claim.status):
+        attribute.impl.active_history = True
+
+
+def median_from_histogram(buckets):
+    """Approximate median seconds from {bucket: count}, using the bucket's midpoint"""
+    total = sum(buckets.values())
+    if not total:
+        return None
+
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen * 2 >= total:
+            lower = 2 ** (bucket / VERIFY_BUCKETS_PER_DOUBLING) - 1
+            upper = 2 ** ((bucket + 1) / VERIFY_BUCKETS_PER_DOUBLING) - 1
+            return round((lower + upper) / 2 * 60)
+
+
+def read_stats(days=30):
+    """Admin statistics assembled from the counters; claims approved per day cover the last `days` days"""
+    from app import db
+    from app.models import StatCounter
+
+    stats = {
+        'items': {'total': 0, 'by_status': {}, 'by_type': {}, 'by_category': {}},
+        'claims': {'by_status': {}, 'pending': 0, 'approved_per_day': {}},
+        'median_time_to_verify_seconds': None
+    }
+    sections = {
+        'items:status:': stats['items']['by_status'],
+        'items:type:': stats['items']['by_type'],
+        'items:category:': stats['items']['by_category'],
+        'claims:status:': stats['claims']['by_status'],
+    }
+    verify_buckets = {}
+
+    rows = (db.session.query(StatCounter.name, StatCounter.value)
+            .filter(~StatCounter.name.startswith(APPROVED_PREFIX), StatCounter.value != 0))
+    for name, value in rows:
+        if name == 'items:total':
+            stats['items']['total'] = value
+        elif name.startswith(VERIFY_PREFIX):
+            verify_buckets[int(name[len(VERIFY_PREFIX):])] = value
+        else:
+            for prefix, section in sections.items():
+                if name.startswith(prefix):
+                    section[name[len(prefix):]] = value
+                    break
+
+    first_day = (datetime.utcnow() - timedelta(days=days - 1)).date().isoformat()
+    daily = (db.session.query(StatCounter.name, StatCounter.value)
+             .filter(StatCounter.name >= APPROVED_PREFIX + first_day,
+                     StatCounter.name.startswith(APPROVED_PREFIX))
+             .order_by(StatCounter.name))
+    for name, value in daily:
+        stats['claims']['approved_per_day'][name[len(APPROVED_PREFIX):]] = value
+
+    stats['claims']['pending'] = stats['claims']['by_status'].get('pending', 0)
+    stats['median_time_to_verify_seconds'] = median_from_histogram(verify_buckets)
+    return stats
+
+
+def rebuild_counters():
+    """
+    Recompute every counter from the items and claims tables, archives included, and commit.
+
+    Approvals made before claims were counted are dated by the claim's
+    updated_at, the closest record of when they happened.
+    """
+    from app import db
+    from app.models import Item, Claim, ItemArchive, ClaimArchive, StatCounter
+    from app.utils.archive import with_archive
+
+    items = with_archive(Item, ItemArchive, ['status', 'item_type', 'category', 'created_at', 'verified_at'])
+    claims = with_archive(Claim, ClaimArchive, ['status', 'updated_at'])
+
+    deltas = Counter()
+    for status, item_type, category, count in (db.session.query(items.c.status, items.c.item_type,
+                                                                items.c.category, func.count())
+                                               .group_by(items.c.status, items.c.item_type, items.c.category)):
+        for key in item_keys(status, item_type, category):
+            deltas[key] += count
+
+    for status, count in db.session.query(claims.c.status, func.count()).group_by(claims.c.status):
+        deltas[f'claims:status:{status}'] += count
+
+    approved_day = func.date(claims.c.updated_at)
+    for day, count in (db.session.query(approved_day, func.count())
+                       .filter(claims.c.status == 'approved')
+                       .group_by(approved_day)):
+        deltas[f'{APPROVED_PREFIX}{day}'] += count
+
+    for created_at, verified_at in (db.session.query(items.c.created_at, items.c.verified_at)
+                                    .filter(items.c.verified_at.isnot(None))
+                                    .yield_per(5000)):
+        record_verification(deltas, created_at, verified_at)
+
+    db.session.query(StatCounter).delete()
+    apply_deltas(db.session.connection(), deltas)
+    db.session.commit()
+    return sum(1 for value in deltas.values() if value)
@@ -0,0 +1,153 @@
+"""Upload storage helpers: reconciliation with the database and chunked uploads"""
+
+import os
+import shutil
+import tempfile
+import time
+import zlib
+
+QUARANTINE_DIR = '.quarantine'  # Hidden folders are never scanned as uploads
+PARTIAL_DIR = '.partial'  # In-progress chunked uploads
+COPY_BUFFER_SIZE = 64 * 1024
+DEFAULT_PARTITIONS = 64
+
+
+def scan_upload_tree(upload_folder):
+    """
+    Yield (relative_path, mtime) for every file under upload_folder.
+
+    Hidden entries (.gitkeep, the quarantine and in-progress upload folders)
+    are skipped. Uses os.scandir so directory entries come with their type
+    and no extra stat call is needed to tell files from folders.
+    """
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        with os.scandir(os.path.join(upload_folder, rel_dir)) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(rel_path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield rel_path, entry.stat().st_mtime
+
+
+def reference_key(rel_path):
+    """The stored photo name a file belongs to (originals/x.jpg -> x.jpg)"""
+    return os.path.basename(rel_path)
+
+
+def _partition(key, partitions):
+    return zlib.crc32(key.encode('utf-8', 'surrogateescape')) % partitions
+
+
+def _is_safe(text):
+    return '\t' not in text and '\n' not in text
+
+
+def reconcile(upload_folder, references, partitions=DEFAULT_PARTITIONS, workdir=None):
+    """
+    Diff the files in upload_folder against the photos referenced in the DB.
+
+    `references` is an iterable of (photo_name, item_id). Both streams are
+    spilled into `partitions` bucket files keyed by a hash of the photo name,
+    then each bucket is diffed on its own, so memory holds one bucket at a
+    time and the whole run stays linear in the number of files and rows.
+
+    Yields ('orphan', relative_path, mtime) for files no row references and
+    ('missing', photo_name, item_id) for rows whose main file is gone.
+    """
+    with tempfile.TemporaryDirectory(dir=workdir, prefix='reconcile-') as spill_dir:
+        file_buckets = [open(os.path.join(spill_dir, f'files-{i}'), 'w', encoding='utf-8', errors='surrogateescape')
+                        for i in range(partitions)]
+        ref_buckets = [open(os.path.join(spill_dir, f'refs-{i}'), 'w', encoding='utf-8', errors='surrogateescape')
+                       for i in range(partitions)]
+        try:
+            for rel_path, mtime in scan_upload_tree(upload_folder):
+                if not _is_safe(rel_path):
+                    # Never produced by secure_upload_filename, so nothing can reference it
+                    yield 'orphan', rel_path, mtime
+                    continue
+                key = reference_key(rel_path)
+                file_buckets[_partition(key, partitions)].write(f'{key}\t{rel_path}\t{mtime}\n')
+
+            for photo_name, item_id in references:
+                if photo_name and _is_safe(photo_name):
+                    ref_buckets[_partition(photo_name, partitions)].write(f'{photo_name}\t{item_id}\n')
+        finally:
+            for bucket in file_buckets + ref_buckets:
+                bucket.close()
+
+        for i in range(partitions):
+            referenced = {}
+            with open(os.path.join(spill_dir, f'refs-{i}'), encoding='utf-8', errors='surrogateescape') as f:
+                for line in f:
+                    photo_name, item_id = line.rstrip('\n').split('\t')
+                    referenced.setdefault(photo_name, int(item_id))
+
+            present = set()
+            with open(os.path.join(spill_dir, f'files-{i}'), encoding='utf-8', errors='surrogateescape') as f:
+                for line in f:
+                    key, rel_path, mtime = line.rstrip('\n').split('\t')
+                    if key not in referenced:
+                        yield 'orphan', rel_path, float(mtime)
+                    elif rel_path == key:
+                        present.add(key)
+
+            for photo_name, item_id in referenced.items():
+                if photo_name not in present:
+                    yield 'missing', photo_name, item_id
+
+
+def quarantine_file(upload_folder, rel_path):
+    """Move a file into the quarantine folder, keeping its relative path"""
+    target = os.path.join(upload_folder, QUARANTINE_DIR, rel_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(os.path.join(upload_folder, rel_path), target)
+    # Restart the clock so --purge-quarantine counts from the move
+    os.utime(target)
+    return target
+
+
+def purge_quarantine(upload_folder, older_than_seconds):
+    """Delete quarantined files older than the given age; returns the count removed"""
+    quarantine = os.path.join(upload_folder, QUARANTINE_DIR)
+    if not os.path.isdir(quarantine):
+        return 0
+
+    cutoff = time.time() - older_than_seconds
+    removed = 0
+    for root, _, files in os.walk(quarantine):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def partial_upload_path(upload_folder, upload_id):
+    """Where the bytes of an in-progress chunked upload are written"""
+    return os.path.join(upload_folder, PARTIAL_DIR, f'{upload_id}.part')
+
+
+def write_chunk(path, offset, stream, length):
+    """
+    Copy `length` bytes from stream into the file at `offset`.
+
+    The chunk goes to disk in COPY_BUFFER_SIZE pieces, so a request never
+    holds more than one buffer in memory. Returns the number of bytes written,
+    which is less than `length` if the client disconnected early.
+    """
+    written = 0
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        while written < length:
+            buffer = stream.read(min(COPY_BUFFER_SIZE, length - written))
+            if not buffer:
+                break
+            f.write(buffer)
+            written += len(buffer)
+    return written
@@ -4,13 +4,11 @@ import re
 import os
 import html
 from datetime import datetime, timedelta
+from importlib.util import find_spec
 
-# Try to import optional dependencies
-try:
-    import bleach
-    HAS_BLEACH = True
-except ImportError:
-    HAS_BLEACH = False
+# Optional dependencies. bleach and PIL are imported on first use, so workers,
+# CLI commands and tests that never sanitize text or open an image don't load them
+HAS_BLEACH = find_spec('bleach') is not None
 
 try:
     from werkzeug.utils import secure_filename
@@ -24,15 +22,7 @@ except ImportError:
         filename = filename.strip(' .')
         return filename or 'upload'
 
-try:
-    from PIL import Image
-    HAS_PIL = True
-except ImportError:
-    HAS_PIL = False
-    # Create a dummy Image class for compatibility
-    class Image:
-        class ImageFile:
-            pass
+HAS_PIL = find_spec('PIL') is not None
 
 try:
     from io import BytesIO
@@ -88,6 +78,7 @@ def sanitize_text_input(text, max_length=None, allow_html=False):
         text = text[:max_length]
     
     if HAS_BLEACH and allow_html:
+        import bleach
         # Allow certain HTML tags but sanitize
         text = bleach.clean(
             text,
@@ -96,6 +87,7 @@ def sanitize_text_input(text, max_length=None, allow_html=False):
             strip=True
         )
     elif HAS_BLEACH:
+        import bleach
         # Remove all HTML tags and entities
         text = bleach.clean(text, tags=[], strip=True)
     else:
@@ -222,6 +214,7 @@ def validate_image(file):
     
     # Validate image content if PIL is available
     if HAS_PIL:
+        from PIL import Image
         try:
             # Read file content
             file_content = file.read()
@@ -0,0 +1,46 @@
+"""
+Worker process sizing and the per-process state to rebuild after a fork.
+
+Both gunicorn.conf.py and serve.py load the app once in the master process
+and fork workers from it. Connections, threads and client sockets must not
+be shared across that fork, so each worker calls reset_process_state first.
+"""
+
+import os
+
+# Extensions holding threads, which don't survive a fork; they are recreated on first use
+THREADED_EXTENSIONS = ('photo_executor', 'event_bridge', 'event_broker')
+
+
+def worker_count(cpu_count=None):
+    """Worker processes: WEB_CONCURRENCY, else 2 per core plus one to cover workers blocked on I/O"""
+    if os.getenv('WEB_CONCURRENCY'):
+        return max(1, int(os.environ['WEB_CONCURRENCY']))
+    return 2 * (cpu_count or os.cpu_count() or 1) + 1
+
+
+def thread_count():
+    """Request threads per worker: WEB_THREADS, else 4; keep it within DB_POOL_SIZE + DB_MAX_OVERFLOW"""
+    return max(1, int(os.getenv('WEB_THREADS', 4)))
+
+
+def reset_process_state(app):
+    """Give a freshly forked worker its own connections, rate limiter, metrics, token cache and thread pools"""
+    from app import db
+    from app.utils import auth
+    from app.utils.security import RateLimiter
+
+    # Drop the inherited pooled connections without closing them under the master's feet
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    replica = app.extensions.get('db_replica')
+    if replica is not None:
+        replica.dispose(close=False)
+
+    auth.TOKEN_STORE = {}
+    app.extensions['rate_limiter'] = RateLimiter.from_config(app.config)
+    if 'metrics' in app.extensions:
+        app.extensions['metrics'].reset()
+    for name in THREADED_EXTENSIONS:
+        app.extensions.pop(name, None)
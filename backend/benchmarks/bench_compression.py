@@ -0,0 +1,87 @@
+"""
+Benchmark: bytes on the wire and CPU per request for /api/items, uncompressed vs gzip and Brotli
+
+CPU is process time for the whole request (query, JSON encoding and compression),
+measured through the Flask test client, so the differences between rows are the
+cost of compressing and of the compressed-body cache.
+
+Usage: python benchmarks/bench_compression.py [--items 100] [--requests 200] [--gzip-level 6] [--brotli-quality 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, db
+from app.models import User, Item
+from app.utils.compression import HAS_BROTLI
+
+CATEGORIES = ['electronics', 'documents', 'clothing', 'accessories', 'books', 'others']
+WORDS = ('black blue red small large leather phone wallet laptop charger bag keys card library cafeteria '
+         'lecture hall near left found lost sticker scratched brand new old case zip pocket silver').split()
+
+
+def setup(items, rng):
+    db.create_all()
+    user = User(name='Bench User', email='bench@strathmore.ac.ke', role='user')
+    user.set_password('BenchPass123')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all(Item(title=' '.join(rng.choices(WORDS, k=3)), description=' '.join(rng.choices(WORDS, k=40)),
+                            category=rng.choice(CATEGORIES), item_type=rng.choice(['lost', 'found']),
+                            date=datetime.utcnow(), location=' '.join(rng.choices(WORDS, k=2)),
+                            user_id=user.user_id, is_verified=True) for _ in range(items))
+    db.session.commit()
+
+
+def measure(app, url, encoding, requests, cache_bytes):
+    app.config['COMPRESS_CACHE_BYTES'] = cache_bytes
+    app.extensions.pop('compressed_cache', None)
+    client = app.test_client()
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    size = len(client.get(url, headers=headers).data)  # Also warms the query and, if enabled, the cache
+    start = time.process_time()
+    for _ in range(requests):
+        client.get(url, headers=headers)
+    return size, (time.process_time() - start) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--gzip-level', type=int, default=6)
+    parser.add_argument('--brotli-quality', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    app = create_app('testing')
+    app.config.update(COMPRESS_GZIP_LEVEL=args.gzip_level, COMPRESS_BROTLI_QUALITY=args.brotli_quality)
+    url = f'/api/items?per_page={args.items}'
+
+    with app.app_context():
+        setup(args.items, random.Random(args.seed))
+        cache_bytes = app.config['COMPRESS_CACHE_BYTES']
+        rows = [('identity', None, 0), ('gzip', 'gzip', 0), ('gzip, cached', 'gzip', cache_bytes)]
+        if HAS_BROTLI:
+            rows += [('br', 'br', 0), ('br, cached', 'br', cache_bytes)]
+        results = [(label, *measure(app, url, encoding, args.requests, cache)) for label, encoding, cache in rows]
+
+    raw = results[0][1]
+    print(f"Response:         GET {url} ({args.items} items)")
+    for label, size, cpu_ms in results:
+        print(f"{label + ':':<18}{size:>8} bytes ({size / raw * 100:5.1f}%)  {cpu_ms:.3f} ms CPU/request")
+    if not HAS_BROTLI:
+        print("Brotli:           not installed, skipped")
+
+
+if __name__ == '__main__':
+    main()
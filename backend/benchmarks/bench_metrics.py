@@ -0,0 +1,58 @@
+"""
+Benchmark: per-request cost of the metrics hooks and of rendering /metrics
+
+Usage: python benchmarks/bench_metrics.py [--requests 100000] [--endpoints 40]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask, Response
+
+from app.utils.metrics import RequestMetrics, render
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--endpoints', type=int, default=40)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    metrics = RequestMetrics()
+    for i in range(args.endpoints):
+        app.add_url_rule(f'/e{i}', f'e{i}', lambda: 'ok')
+    response = Response(b'x' * 2048, mimetype='application/json')
+
+    contexts = [app.test_request_context(f'/e{i % args.endpoints}') for i in range(args.endpoints)]
+    for context in contexts:
+        context.push()
+        context.pop()
+
+    # The hooks alone, inside a pushed request context like Flask runs them
+    elapsed = 0.0
+    for i in range(args.requests):
+        context = contexts[i % args.endpoints]
+        context.push()
+        start = time.perf_counter()
+        metrics.before_request()
+        metrics.after_request(response)
+        metrics.teardown_request(None)
+        elapsed += time.perf_counter() - start
+        context.pop()
+
+    start = time.perf_counter()
+    text = render([metrics.snapshot()])
+    render_seconds = time.perf_counter() - start
+
+    print(f"Requests:         {args.requests} over {args.endpoints} endpoints")
+    print(f"Hooks:            {elapsed / args.requests * 1e6:.2f} us/request")
+    print(f"Render:           {render_seconds * 1000:.2f} ms ({len(text.splitlines())} lines)")
+
+
+if __name__ == '__main__':
+    main()
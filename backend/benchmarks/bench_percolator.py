@@ -0,0 +1,85 @@
+"""
+Benchmark: matching a newly verified item against saved searches, inverted index vs a linear scan
+
+Usage: python benchmarks/bench_percolator.py [--searches 50000] [--items 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.matching import tokenize
+from app.utils.percolator import SavedSearchIndex, compile_terms
+
+CATEGORIES = ['electronics', 'documents', 'clothing', 'accessories', 'books', 'others']
+
+
+def pick_word(rng, words):
+    """Word with a log-uniform rank, so a few words are common and most are rare"""
+    return words[int(len(words) ** rng.random()) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--searches', type=int, default=50000)
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = [f'w{i}' for i in range(args.vocabulary)]
+
+    searches = []
+    for search_id in range(args.searches):
+        query = ' '.join(pick_word(rng, words) for _ in range(rng.randint(1, 4)))
+        category = rng.choice(CATEGORIES + [None])
+        item_type = rng.choice(['lost', 'found', None])
+        searches.append((search_id, search_id % 5000, query, category, item_type))
+
+    start = time.perf_counter()
+    index = SavedSearchIndex()
+    for search in searches:
+        index.add(*search)
+    build_seconds = time.perf_counter() - start
+
+    items = [(rng.choice(CATEGORIES), rng.choice(['lost', 'found']),
+              {'title': ' '.join(pick_word(rng, words) for _ in range(3)),
+               'description': ' '.join(pick_word(rng, words) for _ in range(12)),
+               'location': pick_word(rng, words)})
+             for _ in range(args.items)]
+
+    start = time.perf_counter()
+    index_hits = [sorted(search_id for search_id, _ in index.match(category, item_type, fields))
+                  for category, item_type, fields in items]
+    index_seconds = time.perf_counter() - start
+
+    compiled = [(search_id, compile_terms(query), category, item_type)
+                for search_id, _, query, category, item_type in searches]
+    start = time.perf_counter()
+    scan_hits = []
+    for category, item_type, fields in items:
+        tokens = set()
+        for text in fields.values():
+            tokens.update(tokenize(text))
+        scan_hits.append([search_id for search_id, terms, search_category, search_type in compiled
+                          if search_category in (category, None) and search_type in (item_type, None)
+                          and terms <= tokens])
+    scan_seconds = time.perf_counter() - start
+
+    assert index_hits == scan_hits, 'Index results differ from linear scan'
+
+    print(f"Saved searches:   {args.searches}")
+    print(f"Build time:       {build_seconds:.2f} s")
+    print(f"Items matched:    {args.items} ({sum(map(len, index_hits)) / args.items:.1f} alerts/item)")
+    print(f"Inverted index:   {index_seconds / args.items * 1000:.3f} ms/item")
+    print(f"Linear scan:      {scan_seconds / args.items * 1000:.3f} ms/item")
+    print(f"Speed-up:         {scan_seconds / index_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: near-duplicate photo lookups in the multi-index hash table vs a linear scan
+
+Usage: python benchmarks/bench_phash_index.py [--hashes 100000] [--queries 200] [--radius 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.phash import MultiIndexHashTable, hamming_distance
+
+
+def flip_bits(value, count, rng):
+    """Return value with `count` random bits flipped (a near-duplicate)"""
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hashes', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radius', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    hashes = [rng.getrandbits(64) for _ in range(args.hashes)]
+
+    start = time.perf_counter()
+    table = MultiIndexHashTable()
+    for item_id, value in enumerate(hashes):
+        table.add(value, item_id)
+    build_seconds = time.perf_counter() - start
+
+    # Half the queries are near-duplicates of indexed photos, half are unrelated
+    queries = [flip_bits(rng.choice(hashes), rng.randint(0, args.radius), rng) for _ in range(args.queries // 2)]
+    queries += [rng.getrandbits(64) for _ in range(args.queries - len(queries))]
+
+    start = time.perf_counter()
+    index_hits = [sorted(payload for _, payload in table.search(q, args.radius)) for q in queries]
+    index_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scan_hits = [sorted(i for i, value in enumerate(hashes) if hamming_distance(q, value) <= args.radius)
+                 for q in queries]
+    scan_seconds = time.perf_counter() - start
+
+    assert index_hits == scan_hits, 'Index results differ from linear scan'
+
+    print(f"Hashes indexed:   {args.hashes}")
+    print(f"Build time:       {build_seconds:.2f} s")
+    print(f"Queries:          {args.queries} (radius {args.radius})")
+    print(f"Multi-index:      {index_seconds / args.queries * 1000:.3f} ms/query")
+    print(f"Linear scan:      {scan_seconds / args.queries * 1000:.3f} ms/query")
+    print(f"Speed-up:         {scan_seconds / index_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: upload reconciliation runtime as the upload tree grows
+
+Usage: python benchmarks/bench_reconcile.py [--files 200000] [--partitions 64]
+
+Builds trees of files/10, files/2 and files empty files with 1% orphans and
+1% missing rows, and reports the time per file at each size. Roughly
+constant time per file means the run scales linearly.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.storage import reconcile
+
+
+def build_tree(folder, count):
+    """Create `count` files; return the references a DB would hold for them"""
+    references = []
+    for i in range(count):
+        name = f'20260101_000000_photo{i}.jpg'
+        if i % 100 != 0:  # 1% orphans
+            references.append((name, i))
+        if i % 100 != 1:  # 1% missing blobs
+            open(os.path.join(folder, name), 'wb').close()
+    return references
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=200000)
+    parser.add_argument('--partitions', type=int, default=64)
+    args = parser.parse_args()
+
+    for count in (args.files // 10, args.files // 2, args.files):
+        with tempfile.TemporaryDirectory() as folder:
+            references = build_tree(folder, count)
+
+            start = time.perf_counter()
+            results = {'orphan': 0, 'missing': 0}
+            for kind, _, _ in reconcile(folder, iter(references), partitions=args.partitions):
+                results[kind] += 1
+            seconds = time.perf_counter() - start
+
+        print(f"{count:>9} files: {seconds:6.2f} s  {seconds / count * 1e6:6.2f} us/file  "
+              f"orphans={results['orphan']} missing={results['missing']}")
+
+
+if __name__ == '__main__':
+    main()
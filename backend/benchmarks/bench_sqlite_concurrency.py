@@ -0,0 +1,126 @@
+"""
+Benchmark: read throughput and lock errors while writes are in flight, SQLite defaults vs the tuned profile
+
+Each reader and writer is its own process, like separate web workers.
+
+Usage: python benchmarks/bench_sqlite_concurrency.py [--readers 4] [--writers 2] [--seconds 5] [--rows 20000]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config import Config
+from app.utils.database import sqlite_pragmas, apply_pragmas
+
+# What pysqlite gives you without configuration: rollback journal, FULL sync, and a
+# busy timeout of 0 here so lock contention shows up as errors instead of hidden waits
+DEFAULT_PROFILE = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 0}
+TUNED_PROFILE = sqlite_pragmas({name: getattr(Config, name) for name in dir(Config) if name.startswith('SQLITE_')})
+
+CATEGORIES = ['electronics', 'documents', 'clothing', 'accessories', 'books', 'others']
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, timeout=0, isolation_level=None)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def setup(path, rows, pragmas):
+    connection = connect(path, pragmas)
+    connection.execute('CREATE TABLE items (item_id INTEGER PRIMARY KEY, title TEXT, category TEXT, '
+                       'status TEXT, created_at REAL)')
+    connection.execute('CREATE INDEX ix_items_status_created ON items (status, created_at)')
+    rng = random.Random(1)
+    connection.execute('BEGIN')
+    connection.executemany('INSERT INTO items (title, category, status, created_at) VALUES (?, ?, ?, ?)',
+                           [(f'item {i}', rng.choice(CATEGORIES), 'verified', time.time()) for i in range(rows)])
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def reader(path, pragmas, deadline, results):
+    connection = connect(path, pragmas)
+    reads = errors = 0
+    while time.time() < deadline:
+        try:
+            connection.execute("SELECT item_id, title FROM items WHERE status = 'verified' "
+                               "ORDER BY created_at DESC LIMIT 20").fetchall()
+            reads += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    results.put(('read', reads, errors))
+
+
+def writer(path, pragmas, deadline, results):
+    connection = connect(path, pragmas)
+    rng = random.Random(os.getpid())
+    writes = errors = 0
+    while time.time() < deadline:
+        try:
+            # Like report_item: a transaction with a few statements, then a commit
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('INSERT INTO items (title, category, status, created_at) VALUES (?, ?, ?, ?)',
+                               ('new item', rng.choice(CATEGORIES), 'pending', time.time()))
+            connection.execute("UPDATE items SET status = 'verified' WHERE item_id = ?", (rng.randint(1, 1000),))
+            connection.execute('COMMIT')
+            writes += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+    results.put(('write', writes, errors))
+
+
+def run(name, pragmas, args):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'bench.db')
+        setup(path, args.rows, pragmas)
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + args.seconds
+        processes = ([multiprocessing.Process(target=reader, args=(path, pragmas, deadline, results))
+                      for _ in range(args.readers)] +
+                     [multiprocessing.Process(target=writer, args=(path, pragmas, deadline, results))
+                      for _ in range(args.writers)])
+        for process in processes:
+            process.start()
+        totals = {'read': [0, 0], 'write': [0, 0]}
+        for _ in processes:
+            kind, done, errors = results.get()
+            totals[kind][0] += done
+            totals[kind][1] += errors
+        for process in processes:
+            process.join()
+
+    print(f"{name}:")
+    print(f"  reads:  {totals['read'][0] / args.seconds:10.0f}/s  ({totals['read'][1]} 'database is locked')")
+    print(f"  writes: {totals['write'][0] / args.seconds:10.0f}/s  ({totals['write'][1]} 'database is locked')")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"Readers: {args.readers}, writers: {args.writers}, {args.seconds:g} s each, {args.rows} rows")
+    default = run('Defaults (rollback journal)', DEFAULT_PROFILE, args)
+    tuned = run('Tuned profile (' + ', '.join(f'{k}={v}' for k, v in TUNED_PROFILE.items()) + ')', TUNED_PROFILE, args)
+    if default['read'][0]:
+        print(f"Read throughput: {tuned['read'][0] / default['read'][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
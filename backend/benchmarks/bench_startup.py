@@ -0,0 +1,48 @@
+"""
+Benchmark: time to create the app and serve its first request
+
+Usage: python benchmarks/bench_startup.py [--runs 20] [--config testing]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--config', default='testing')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    with create_app(args.config).app_context():
+        db.create_all()
+
+    create_seconds, first_request_seconds = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        app = create_app(args.config)
+        created = time.perf_counter()
+        response = app.test_client().get('/api/items')
+        first_request_seconds.append(time.perf_counter() - created)
+        create_seconds.append(created - started)
+        assert response.status_code == 200, response.status_code
+
+    print(f"Runs:             {args.runs} ({args.config} config)")
+    print(f"create_app:       {statistics.median(create_seconds) * 1000:.1f} ms median, "
+          f"{max(create_seconds) * 1000:.1f} ms max")
+    print(f"First request:    {statistics.median(first_request_seconds) * 1000:.1f} ms median, "
+          f"{max(first_request_seconds) * 1000:.1f} ms max")
+
+
+if __name__ == '__main__':
+    main()
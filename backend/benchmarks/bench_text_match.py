@@ -0,0 +1,89 @@
+"""
+Benchmark: per-report TF-IDF matching latency against a large set of open items
+
+Usage: python benchmarks/bench_text_match.py [--items 100000] [--queries 200] [--window 60]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.matching import TextMatchIndex, HAS_SCIPY
+
+CATEGORIES = ['electronics', 'documents', 'clothing', 'accessories', 'books', 'others']
+LOCATIONS = ['Library', 'Cafeteria', 'Sports complex', 'Main gate', 'Auditorium', 'Parking', 'Lab 3', 'Chapel']
+
+
+def make_report(rng, words):
+    """Random report text with a vocabulary skewed like real titles"""
+    def phrase(count):
+        return ' '.join(words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)] for _ in range(count))
+    return {'title': phrase(rng.randint(2, 4)), 'description': phrase(rng.randint(5, 20)),
+            'location': rng.choice(LOCATIONS)}
+
+
+def build(reports, vectorized):
+    index = TextMatchIndex(vectorized=vectorized)
+    start = time.perf_counter()
+    for item_id, (category, item_type, day, fields) in enumerate(reports):
+        index.add(item_id, category, item_type, day, fields)
+    return index, time.perf_counter() - start
+
+
+def run_queries(index, queries, window):
+    start = time.perf_counter()
+    results = [index.search(category, item_type, day, fields, window=window)
+               for category, item_type, day, fields in queries]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--window', type=int, default=60)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = [f'w{i}' for i in range(args.vocabulary)]
+    # Two years of reports
+    reports = [(rng.choice(CATEGORIES), rng.choice(['lost', 'found']), rng.randint(0, 730), make_report(rng, words))
+               for _ in range(args.items)]
+    queries = [(rng.choice(CATEGORIES), rng.choice(['lost', 'found']), rng.randint(0, 730), make_report(rng, words))
+               for _ in range(args.queries)]
+
+    backends = [('sparse matrix', True), ('pure Python', False)] if HAS_SCIPY else [('pure Python', False)]
+    print(f"Items indexed:    {args.items}")
+    print(f"Queries:          {args.queries} (window {args.window} days)")
+
+    timings = {}
+    for name, vectorized in backends:
+        index, build_seconds = build(reports, vectorized)
+        results, query_seconds = run_queries(index, queries, args.window)
+        timings[name] = (results, query_seconds)
+        print(f"{name + ':':<17} build {build_seconds:.2f} s, {query_seconds / args.queries * 1000:.3f} ms/report")
+
+        # Matching a new report includes indexing it first
+        start = time.perf_counter()
+        for offset, (category, item_type, day, fields) in enumerate(queries):
+            index.add(args.items + offset, category, item_type, day, fields)
+            index.search(category, item_type, day, fields, window=args.window, exclude=args.items + offset)
+        insert_seconds = time.perf_counter() - start
+        print(f"{'':<17} insert + match {insert_seconds / args.queries * 1000:.3f} ms/report")
+
+    if len(timings) == 2:
+        (sparse_results, sparse_seconds), (pure_results, pure_seconds) = timings.values()
+        for a, b in zip(sparse_results, pure_results):
+            assert [round(score, 9) for score, _ in a] == [round(score, 9) for score, _ in b], \
+                'Sparse and pure-Python scores differ'
+        print(f"Speed-up:         {pure_seconds / sparse_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
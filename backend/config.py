@@ -1,29 +1,92 @@
-"""Configuration settings"""
+"""
+Configuration settings
 
+create_app loads one of the classes below, then lets environment variables
+of the same name override single settings (DATABASE_URL sets the database
+URI), so one build can be tuned per deployment without code changes.
+"""
+
+import logging
 import os
 
 class Config:
     """Base configuration"""
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///lostnfound.db'  # Relative SQLite paths live in the instance folder
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_POOL_SIZE = 5  # Connections each worker keeps open
+    DB_MAX_OVERFLOW = 10  # Extra connections a worker may open under load
+    DB_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = 1800  # Seconds before a connection is replaced; -1 keeps them forever
+    DB_POOL_PRE_PING = False  # Test connections on checkout, for servers that drop idle ones
+    DB_STATEMENT_TIMEOUT_MS = 0  # Abort statements running longer than this; 0 disables
+    DB_REPLICA_URI = None  # Read replica for browse, item detail and stats; None reads from the primary
+    DB_REPLICA_STICKY_SECONDS = 5  # Clients read from the primary this long after a write
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
-    UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'app/uploads')
+    SQLITE_JOURNAL_MODE = 'WAL'  # Readers don't block the writer
+    SQLITE_SYNCHRONOUS = 'NORMAL'  # Safe with WAL; fsyncs at checkpoints only
+    SQLITE_CACHE_SIZE_KB = 65536  # Page cache per connection
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the database file read through mmap
+    SQLITE_TEMP_STORE = 'MEMORY'  # Sorts and temp tables
+    SQLITE_BUSY_TIMEOUT_MS = 5000  # Wait this long for a lock instead of failing with "database is locked"
+    RATELIMIT_STORAGE_URI = 'memory://'  # Per worker; redis://host:6379 shares counts between workers
+    RATELIMIT_WINDOW_SECONDS = 60
+    RATELIMIT_DEFAULT = 1000  # Requests per window and client
+    RATELIMIT_AUTH = 500
+    RATELIMIT_UPLOAD = 500
+    RATELIMIT_ADMIN = 500
+    LOG_LEVEL = 'INFO'
+    SQL_SLOW_QUERY_MS = 200  # Log statements slower than this with their parameters; 0 disables
+    SQL_N_PLUS_ONE_THRESHOLD = 5  # Warn when one SELECT runs this often in a request; 0 disables
+    SQL_SERVER_TIMING = False  # Send query count and time in a Server-Timing header; always on in debug
+    METRICS_ENABLED = True  # Prometheus metrics at /metrics
+    METRICS_DIR = None  # Shared by the workers of one server so /metrics covers all of them; None counts per process
+    METRICS_FLUSH_SECONDS = 1.0  # How stale other workers' numbers in /metrics may be
+    UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'app', 'uploads')
+    ASSET_BUILD_FOLDER = os.path.join(os.path.dirname(__file__), 'app', 'static_build')  # Output of `flask assets build`
+    COMPRESS_MIN_BYTES = 1024  # JSON responses smaller than this are sent as is
+    COMPRESS_GZIP_LEVEL = 6  # 1 (fastest) to 9 (smallest)
+    COMPRESS_BROTLI_QUALITY = 4  # 0 to 11; above 5 costs far more CPU for little gain on dynamic responses
+    COMPRESS_CACHE_BYTES = 16 * 1024 * 1024  # Compressed GET bodies kept per worker; 0 disables the cache
+    HTML_MAX_AGE_SECONDS = 60  # Browser cache for built HTML pages; hashed assets are cached for a year
+    IMAGE_MAX_EDGE = 2048  # Longest stored photo edge in pixels
+    IMAGE_QUALITY = 82  # JPEG re-encode quality
+    KEEP_ORIGINAL_UPLOADS = False  # Also keep the bytes as received in uploads/originals
+    PHOTO_HASH_RADIUS = 8  # Max dHash Hamming distance treated as the same photo
+    MATCH_WINDOW_DAYS = 60  # Max days between the lost and the found date for text matches
+    MAX_SAVED_SEARCHES = 20  # Per user
+    EVENTS_POLL_SECONDS = 1.0  # How often each worker reads new events
+    EVENTS_HEARTBEAT_SECONDS = 15.0  # Keep-alive comment interval on idle event streams
+    EVENTS_RETRY_MS = 3000  # Reconnect delay suggested to EventSource clients
+    EVENTS_RETENTION_SECONDS = 3600  # Events kept for clients that reconnect
+    MAX_PHOTOS_PER_ITEM = 5
+    PHOTO_WORKERS = min(4, os.cpu_count() or 1)  # Threads for photo validation and re-encoding
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # Chunk size suggested to chunked-upload clients
+    UPLOAD_SESSION_TTL_HOURS = 24  # Unfinished chunked uploads are dropped after this
+    MODERATION_LEASE_SECONDS = 300  # How long leased queue items stay reserved
+    ARCHIVE_AFTER_DAYS = 180  # Days since the last update before an item is archived
+    ARCHIVE_STATUSES = ('claimed', 'returned', 'rejected', 'expired')  # Final statuses that get archived
+    ARCHIVE_BATCH_SIZE = 500  # Items moved per transaction
+    LIFECYCLE_RULES = None  # JSON list of rules; None uses the defaults in app/utils/lifecycle.py
+    LIFECYCLE_BATCH_SIZE = 500  # Items transitioned per transaction
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///lostnfound.db'
     TESTING = False
+    LOG_LEVEL = 'DEBUG'
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///lostnfound.db')
     TESTING = False
+    DB_POOL_PRE_PING = True
+    DB_STATEMENT_TIMEOUT_MS = 30000
+    LOG_LEVEL = 'WARNING'
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    LOG_LEVEL = 'WARNING'
 
 config = {
     'development': DevelopmentConfig,
@@ -31,3 +94,70 @@ config = {
     'testing': TestingConfig,
     'default': DevelopmentConfig
 }
+
+# Environment variables read under another name than the setting
+ENV_ALIASES = {
+    'SQLALCHEMY_DATABASE_URI': 'DATABASE_URL',
+}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def _cast(name, value, default):
+    """Convert an environment string to the type of the setting's default"""
+    if isinstance(default, bool):
+        return value.strip().lower() in TRUE_VALUES
+    if isinstance(default, tuple):
+        return tuple(part.strip() for part in value.split(',') if part.strip())
+    try:
+        if isinstance(default, int):
+            return int(value)
+        if isinstance(default, float):
+            return float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a {type(default).__name__}, not {value!r}') from None
+    return value
+
+
+def env_overrides(config_class, environ=os.environ):
+    """Settings of config_class that are set in the environment, cast to the type of their default"""
+    overrides = {}
+    for name in dir(config_class):
+        if not name.isupper():
+            continue
+        value = environ.get(ENV_ALIASES.get(name, name))
+        if value is not None:
+            overrides[name] = _cast(name, value, getattr(config_class, name))
+    return overrides
+
+
+def validate_config(settings):
+    """Raise ValueError naming every setting that is out of range"""
+    errors = []
+
+    def check(name, valid, requirement):
+        if not valid(settings[name]):
+            errors.append(f'{name} {requirement}, not {settings[name]!r}')
+
+    positive = lambda value: value > 0
+    not_negative = lambda value: value >= 0
+    for name in ('DB_POOL_SIZE', 'DB_POOL_TIMEOUT', 'MAX_CONTENT_LENGTH', 'RATELIMIT_WINDOW_SECONDS',
+                 'RATELIMIT_DEFAULT', 'RATELIMIT_AUTH', 'RATELIMIT_UPLOAD', 'RATELIMIT_ADMIN', 'IMAGE_MAX_EDGE',
+                 'MAX_PHOTOS_PER_ITEM', 'PHOTO_WORKERS', 'UPLOAD_CHUNK_SIZE', 'EVENTS_POLL_SECONDS',
+                 'EVENTS_HEARTBEAT_SECONDS', 'ARCHIVE_BATCH_SIZE', 'LIFECYCLE_BATCH_SIZE', 'MAX_SAVED_SEARCHES',
+                 'METRICS_FLUSH_SECONDS'):
+        check(name, positive, 'must be positive')
+    for name in ('DB_MAX_OVERFLOW', 'DB_STATEMENT_TIMEOUT_MS', 'DB_REPLICA_STICKY_SECONDS', 'PHOTO_HASH_RADIUS',
+                 'MATCH_WINDOW_DAYS', 'COMPRESS_MIN_BYTES', 'COMPRESS_CACHE_BYTES', 'HTML_MAX_AGE_SECONDS',
+                 'SQL_SLOW_QUERY_MS', 'SQL_N_PLUS_ONE_THRESHOLD'):
+        check(name, not_negative, 'must not be negative')
+    check('DB_POOL_RECYCLE', lambda value: value == -1 or value > 0, 'must be positive or -1')
+    check('IMAGE_QUALITY', lambda value: 1 <= value <= 95, 'must be between 1 and 95')
+    check('COMPRESS_GZIP_LEVEL', lambda value: 1 <= value <= 9, 'must be between 1 and 9')
+    check('COMPRESS_BROTLI_QUALITY', lambda value: 0 <= value <= 11, 'must be between 0 and 11')
+    check('LOG_LEVEL', lambda value: isinstance(logging.getLevelName(str(value).upper()), int),
+          'must be a logging level name')
+    check('RATELIMIT_STORAGE_URI', lambda value: '://' in str(value), 'must be a storage URI such as memory://')
+
+    if errors:
+        raise ValueError('Invalid configuration: ' + '; '.join(errors))
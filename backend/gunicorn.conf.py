@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for wsgi:app, sized from the number of CPU cores
+
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+Environment: PORT or BIND, WEB_CONCURRENCY (workers), WEB_THREADS (threads per worker),
+WEB_TIMEOUT (seconds before a silent worker is restarted), METRICS_DIR (defaults to instance/metrics)
+"""
+
+import os
+from app.utils.workers import worker_count, thread_count
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = worker_count()
+threads = thread_count()
+worker_class = 'gthread'  # Each open event stream holds one thread; raise WEB_THREADS for many clients
+preload_app = True  # Create the app once in the master; workers fork with it already loaded
+timeout = int(os.getenv('WEB_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+max_requests = 5000  # Recycle workers now and then to bound slow memory growth
+max_requests_jitter = 500
+accesslog = '-'
+
+# Workers share their request metrics through this directory; set before preload_app creates the app
+os.environ.setdefault('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+
+
+def on_starting(server):
+    from app.utils.metrics import clear_metrics_dir
+
+    clear_metrics_dir(os.environ['METRICS_DIR'])
+
+
+def post_fork(server, worker):
+    from app.utils.workers import reset_process_state
+    from wsgi import app
+
+    reset_process_state(app)
+
+
+def worker_exit(server, worker):
+    from wsgi import app
+
+    metrics = app.extensions.get('metrics')
+    if metrics is not None and metrics.directory:
+        metrics.flush()  # Counts since the last periodic flush
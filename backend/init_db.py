@@ -1,31 +1,22 @@
 """
 Database Schema and Initialization Script
-Run this to set up the database structure
+Run this to set up the database structure (same as `flask init-db`)
 """
 
-from app import create_app, db
-from app.models import User, Item, Claim
+import os
+from app import create_app
+from app.utils.migrations import migrate, ensure_admin
 
 def init_db():
     """Initialize database"""
-    app = create_app()
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
     
     with app.app_context():
-        # Create all tables
-        db.create_all()
+        for version, description, added in migrate():
+            print(f"Applied migration {version}: {description}")
         
-        # Create default admin user (optional)
-        admin = User.query.filter_by(email='admin@strathmore.ac.ke').first()
-        if not admin:
-            admin = User(
-                name='Administrator',
-                email='admin@strathmore.ac.ke',
-                role='admin'
-            )
-            admin.set_password('Admin123')
-            db.session.add(admin)
-            db.session.commit()
-            print("Admin user created: admin@strathmore.ac.ke / Admin123")
+        if ensure_admin(password=os.getenv('ADMIN_PASSWORD', 'Admin123')):
+            print("Admin user created: admin@strathmore.ac.ke")
         
         print("Database initialized successfully!")
 
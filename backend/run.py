@@ -3,31 +3,19 @@ Main entry point for Flask application
 Strathmore University Digital Lost & Found Web Application
 """
 
-from app import create_app, db
-from app.models import User, Item, Claim
+import os
+from app import create_app
 
-app = create_app()
-
-# Initialize database on startup
-with app.app_context():
-    db.create_all()
-    
-    # Create default admin user if doesn't exist
-    admin = User.query.filter_by(email='admin@strathmore.ac.ke').first()
-    if not admin:
-        admin = User(
-            name='Administrator',
-            email='admin@strathmore.ac.ke',
-            role='admin'
-        )
-        admin.set_password('admin123')
-        db.session.add(admin)
-        db.session.commit()
-        print("✓ Admin user created: admin@strathmore.ac.ke / admin123")
-    else:
-        print("✓ Admin user already exists")
+app = create_app(os.getenv('FLASK_ENV', 'development'))
 
 if __name__ == '__main__':
+    # The dev server sets up its own database; deployments run `flask init-db` once
+    from app.utils.migrations import migrate, ensure_admin
+    with app.app_context():
+        migrate()
+        if ensure_admin(password=os.getenv('ADMIN_PASSWORD', 'Admin123')):
+            print("✓ Admin user created: admin@strathmore.ac.ke")
+    
     print("\n🚀 Starting Strathmore Lost & Found Backend...")
     print("📝 API running at http://localhost:5000/api")
     print("🔗 Frontend at http://localhost:5000\n")
@@ -0,0 +1,116 @@
+"""
+Prefork server for local load testing, in pure Python
+
+Binds the socket and creates the app once, then forks workers that each
+accept on the shared socket and handle requests in a fixed thread pool,
+the same model as gunicorn.conf.py (preload_app, gthread workers) without
+installing anything. Dead workers are replaced; Ctrl-C stops them all.
+Without os.fork (Windows) it runs a single worker.
+
+Usage: python serve.py [--host 127.0.0.1] [--port 8000] [--workers N] [--threads N]
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+from app.utils.metrics import clear_metrics_dir
+from app.utils.workers import worker_count, thread_count, reset_process_state
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that hands accepted connections to a bounded thread pool"""
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads=4, **kwargs):
+        super().__init__(host, port, app, **kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def run_worker(app, listener, host, port, threads):
+    """Serve the inherited listening socket until the master stops this process"""
+    reset_process_state(app)
+    server = PooledWSGIServer(host, port, app, threads=threads, fd=listener.fileno())
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help='Defaults to WEB_CONCURRENCY or 2 per core + 1')
+    parser.add_argument('--threads', type=int, default=None, help='Defaults to WEB_THREADS or 4')
+    args = parser.parse_args()
+    workers = args.workers or worker_count()
+    threads = args.threads or thread_count()
+
+    listener = socket.create_server((args.host, args.port), backlog=1024)
+    listener.set_inheritable(True)
+    os.environ.setdefault('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+    clear_metrics_dir(os.environ['METRICS_DIR'])
+
+    from wsgi import app  # Loaded once here; workers fork with it in memory
+
+    print(f"Serving on http://{args.host}:{args.port} with {workers} workers x {threads} threads")
+    if not hasattr(os, 'fork') or workers == 1:
+        run_worker(app, listener, args.host, args.port, threads)
+        return
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)  # The master decides when workers stop
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                run_worker(app, listener, args.host, args.port, threads)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass  # Already exited; os.wait collects it
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}; starting a replacement", file=sys.stderr)
+            spawn()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,8 @@ Test configuration and fixtures for the Lost & Found application
 import pytest
 import tempfile
 import os
+import random
+from io import BytesIO
 from datetime import datetime
 from app import create_app, db
 from app.models import User, Item, Claim
@@ -16,9 +18,6 @@ def app():
     # Create a temporary file for the test database
     db_fd, db_path = tempfile.mkstemp()
     
-    # Disable auto-init to avoid admin user creation during app startup
-    os.environ['SKIP_ADMIN_INIT'] = '1'
-    
     app = create_app('testing')
     app.config['TESTING'] = True
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
@@ -30,12 +29,13 @@ def app():
     with app.app_context():
         db.create_all()
         yield app
+        # Event bridge threads outlive the test otherwise
+        if 'event_bridge' in app.extensions:
+            app.extensions['event_bridge'].stop()
         # Clean session before dropping
         db.session.remove()
         db.drop_all()
     
-    # Clean up env
-    os.environ.pop('SKIP_ADMIN_INIT', None)
     os.close(db_fd)
     os.unlink(db_path)
 
@@ -176,4 +176,41 @@ def sample_image():
     return (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01'
             b'\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
             b'\x00\x00\x00\nIDATx\x9cc`\x00\x00\x00\x02\x00\x01'
-            b'\xe2!\xbc\x33\x00\x00\x00\x00IEND\xaeB`\x82', 'test.png')
\ No newline at end of file
+            b'\xe2!\xbc\x33\x00\x00\x00\x00IEND\xaeB`\x82', 'test.png')
+
+@pytest.fixture
+def make_photo():
+    """Factory for real encoded photos; the same seed always gives the same picture"""
+    def _make(seed=0, size=(90, 80), fmt='JPEG'):
+        from PIL import Image
+        rng = random.Random(seed)
+        blocks = Image.new('L', (9, 8))
+        blocks.putdata([rng.randrange(256) for _ in range(9 * 8)])
+        img = blocks.resize(size, Image.NEAREST).convert('RGB')
+        buf = BytesIO()
+        img.save(buf, format=fmt)
+        return buf.getvalue()
+    return _make
+
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Context manager failing the test when the block runs more than `limit` SQL statements"""
+    from contextlib import contextmanager
+    from sqlalchemy import event
+    
+    @contextmanager
+    def _assert(limit):
+        engines = [db.engine] + ([app.extensions['db_replica']] if 'db_replica' in app.extensions else [])
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(' '.join(statement.split()))
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', record)
+        assert len(statements) <= limit, (f'{len(statements)} queries, expected at most {limit}:\n'
+                                          + '\n'.join(statements))
+    return _assert
@@ -36,6 +36,32 @@ class TestAdminRoutes:
         assert 'claims' in data
         assert len(data['claims']) >= 1
 
+    def test_claim_lists_query_count_is_constant(self, app, client, admin_headers, test_claim, assert_max_queries):
+        """Test that claim lists load items, reporters and claimers with the claims, not per claim"""
+        from datetime import datetime
+        from app import db
+        from app.models import User
+        
+        for i in range(5):
+            claimer = User(name=f'Claimer {i}', email=f'claimer{i}@strathmore.ac.ke', role='user')
+            claimer.set_password('TestPass123')
+            item = Item(title=f'Found Keys {i}', description='Keys on a red lanyard', category='accessories',
+                        item_type='found', date=datetime.utcnow(), location='Library', user_id=test_claim.user_id,
+                        is_verified=True)
+            db.session.add_all([claimer, item])
+            db.session.flush()
+            db.session.add(Claim(item_id=item.item_id, user_id=claimer.user_id, status='pending'))
+        db.session.commit()
+        db.session.remove()
+        
+        # The admin check, then one SELECT per table listed
+        with assert_max_queries(2):
+            response = client.get('/api/admin/claims/pending', headers=admin_headers)
+        assert response.get_json()['total'] == 6
+        assert all(claim['item_reporter'] and claim['claimer'] for claim in response.get_json()['claims'])
+        with assert_max_queries(3):
+            assert client.get('/api/admin/claims/all', headers=admin_headers).get_json()['total'] == 6
+
     def test_approve_claim_success(self, client, admin_headers, test_claim):
         """Test approving a claim as admin"""
         response = client.put(
@@ -47,6 +73,17 @@ class TestAdminRoutes:
         data = response.get_json()
         assert 'Claim approved successfully' in data['message']
 
+    def test_approve_claim_deleted_meanwhile(self, client, admin_headers, test_claim, monkeypatch):
+        """Test a claim that disappears between the lookup and the approval gives 404, not 500"""
+        monkeypatch.setattr('app.routes.admin_routes.approve_claims',
+                            lambda claim_ids, expected_versions=None: {claim_ids[0]: {'claim_id': claim_ids[0],
+                                                                                     'outcome': 'not_found'}})
+        
+        response = client.put(f'/api/admin/claims/{test_claim.claim_id}/approve', headers=admin_headers)
+        
+        assert response.status_code == 404
+        assert response.get_json()['error'] == 'Claim not found'
+
     def test_approve_claim_unauthorized(self, client, auth_headers, test_claim):
         """Test approving a claim as regular user"""
         response = client.put(
@@ -81,6 +118,38 @@ class TestAdminRoutes:
             data = response.get_json()
             assert 'Claim rejected' in data['message']
 
+    def test_approve_claim_rejects_competing_claims(self, client, admin_headers, app, test_item,
+                                                     test_user, test_claim):
+        """Test that approving a claim rejects the other pending claims on the item"""
+        from app import db
+        with app.app_context():
+            competing = Claim(item_id=test_item.item_id, user_id=test_user.user_id, status='pending')
+            db.session.add(competing)
+            db.session.commit()
+            competing_id = competing.claim_id
+        
+        response = client.put(f'/api/admin/claims/{test_claim.claim_id}/approve', headers=admin_headers)
+        
+        assert response.status_code == 200
+        assert response.get_json()['rejected_claims'] == [competing_id]
+        with app.app_context():
+            assert Claim.query.get(competing_id).status == 'rejected'
+        
+        # The item is taken, so the rejected claim can't be approved anymore
+        response = client.put(f'/api/admin/claims/{competing_id}/approve', headers=admin_headers)
+        assert response.status_code == 409
+
+    def test_approve_claim_stale_version(self, client, admin_headers, app, test_claim):
+        """Test that approving with an outdated version is refused"""
+        response = client.put(f'/api/admin/claims/{test_claim.claim_id}/approve', headers=admin_headers,
+                              json={'version': test_claim.version + 1})
+        
+        assert response.status_code == 409
+        with app.app_context():
+            claim = Claim.query.get(test_claim.claim_id)
+            assert claim.status == 'pending'
+            assert Item.query.get(claim.item_id).status != 'claimed'
+
     def test_add_claim_notes_success(self, client, admin_headers, test_claim):
         """Test adding notes to a claim as admin"""
         response = client.put(
@@ -101,6 +170,158 @@ class TestAdminRoutes:
         data = response.get_json()
         assert 'Claim not found' in data['error']
 
+    def test_update_item_status_rejects_unknown_status(self, client, admin_headers, app, test_item):
+        """Test that only known statuses are written, so no stray counters appear"""
+        from app.utils.stats import read_stats
+        with app.app_context():
+            before = read_stats()['items']['by_status']
+        
+        for status in (None, 'lost-and-found', ''):
+            response = client.put(f'/api/admin/items/{test_item.item_id}/status', headers=admin_headers,
+                                  json={'status': status})
+            assert response.status_code == 400
+        
+        response = client.put(f'/api/admin/items/{test_item.item_id}/status', headers=admin_headers,
+                              json={'status': 'returned'})
+        assert response.status_code == 200
+        with app.app_context():
+            assert Item.query.get(test_item.item_id).status == 'returned'
+            after = read_stats()['items']['by_status']
+        assert set(after) <= set(Item.STATUSES)
+        assert after.get('returned', 0) == before.get('returned', 0) + 1
+
+    def test_bulk_moderate_items(self, client, admin_headers, app, test_item):
+        """Test moderating several items in one request"""
+        response = client.post('/api/admin/items/bulk', headers=admin_headers,
+                               json={'item_ids': [test_item.item_id, 99999], 'action': 'reject'})
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['updated'] == 1
+        outcomes = {r['item_id']: r['outcome'] for r in data['results']}
+        assert outcomes == {test_item.item_id: 'updated', 99999: 'not_found'}
+        with app.app_context():
+            assert Item.query.get(test_item.item_id).status == 'rejected'
+
+    def test_bulk_moderate_items_changed_meanwhile(self, client, admin_headers, app, test_user, test_item):
+        """Test that an item changed between the bulk SELECT and UPDATE is reported as is and not counted"""
+        from datetime import datetime
+        from sqlalchemy import event
+        from app import db
+        from app.utils.stats import read_stats
+        with app.app_context():
+            other = Item(title='Found wallet', description='Brown leather wallet', category='accessories',
+                         item_type='found', date=datetime.utcnow(), location='Cafeteria', user_id=test_user.user_id)
+            db.session.add(other)
+            db.session.commit()
+            other_id = other.item_id
+            before = read_stats()['items']['by_status']
+        
+        def claim_first(conn, cursor, statement, parameters, context, executemany):
+            # Another admin claims the item just before the bulk UPDATE runs
+            if statement.startswith('UPDATE items SET') and not claimed:
+                claimed.append(other_id)
+                cursor.connection.execute("UPDATE items SET status = 'claimed' WHERE item_id = ?", (other_id,))
+        claimed = []
+        event.listen(db.engine, 'before_cursor_execute', claim_first)
+        try:
+            response = client.post('/api/admin/items/bulk', headers=admin_headers,
+                                   json={'item_ids': [test_item.item_id, other_id], 'action': 'approve'})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', claim_first)
+        
+        data = response.get_json()
+        assert data['updated'] == 1
+        results = {r['item_id']: (r['outcome'], r['status']) for r in data['results']}
+        assert results == {test_item.item_id: ('updated', 'verified'), other_id: ('unchanged', 'claimed')}
+        with app.app_context():
+            after = read_stats()['items']['by_status']
+        assert after.get('pending', 0) == before['pending'] - 1
+        assert after.get('verified', 0) == before.get('verified', 0) + 1
+
+    def test_bulk_items_invalid_request(self, client, admin_headers, test_item):
+        """Test that bulk item moderation validates the action and ids"""
+        response = client.post('/api/admin/items/bulk', headers=admin_headers,
+                               json={'item_ids': [test_item.item_id], 'action': 'status', 'status': 'lost'})
+        assert response.status_code == 400
+        
+        response = client.post('/api/admin/items/bulk', headers=admin_headers,
+                               json={'item_ids': list(range(1001)), 'action': 'approve'})
+        assert response.status_code == 400
+
+    def test_bulk_approve_claims(self, client, admin_headers, app, test_item, test_user, test_claim):
+        """Test that bulk approval approves one claim per item"""
+        from app import db
+        with app.app_context():
+            competing = Claim(item_id=test_item.item_id, user_id=test_user.user_id, status='pending')
+            db.session.add(competing)
+            db.session.commit()
+            competing_id = competing.claim_id
+        
+        response = client.post('/api/admin/claims/bulk', headers=admin_headers,
+                               json={'claim_ids': [test_claim.claim_id, competing_id], 'action': 'approve'})
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        outcomes = {r['claim_id']: r['outcome'] for r in data['results']}
+        assert outcomes == {test_claim.claim_id: 'updated', competing_id: 'superseded'}
+        with app.app_context():
+            assert Claim.query.get(test_claim.claim_id).status == 'approved'
+            assert Claim.query.get(competing_id).status == 'rejected'
+            assert Item.query.get(test_item.item_id).status == 'claimed'
+
+    def test_bulk_reject_claims_skips_moderated(self, client, admin_headers, test_claim):
+        """Test that bulk moderation leaves already moderated claims alone"""
+        client.put(f'/api/admin/claims/{test_claim.claim_id}/approve', headers=admin_headers)
+        
+        response = client.post('/api/admin/claims/bulk', headers=admin_headers,
+                               json={'claim_ids': [test_claim.claim_id], 'action': 'reject'})
+        
+        assert response.status_code == 200
+        result = response.get_json()['results'][0]
+        assert result['outcome'] == 'conflict'
+        assert result['status'] == 'approved'
+
+    def test_bulk_moderation_unauthorized(self, client, auth_headers):
+        """Test that regular users cannot moderate in bulk"""
+        response = client.post('/api/admin/items/bulk', headers=auth_headers,
+                               json={'item_ids': [1], 'action': 'approve'})
+        assert response.status_code == 403
+        
+        response = client.post('/api/admin/claims/bulk', headers=auth_headers,
+                               json={'claim_ids': [1], 'action': 'approve'})
+        assert response.status_code == 403
+
+    def test_get_duplicate_candidates(self, client, admin_headers, app, test_user):
+        """Test listing near-duplicate photo pairs"""
+        from datetime import datetime
+        from app import db
+        from app.models import ItemPhoto
+        with app.app_context():
+            for title, photo_hash in [('Phone A', 'ffff0000ffff0000'), ('Phone B', 'ffff0000ffff0001'),
+                                      ('Bag', '0123456789abcdef')]:
+                item = Item(title=title, description='Reported item description',
+                            category='electronics', item_type='found', date=datetime.utcnow(),
+                            location='Library', user_id=test_user.user_id, photo_hash=photo_hash)
+                item.photos = [ItemPhoto(path=f'uploads/{title}.jpg', photo_hash=photo_hash, position=0)]
+                db.session.add(item)
+            db.session.commit()
+        
+        response = client.get('/api/admin/items/duplicates', headers=admin_headers)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['total'] == 1
+        assert data['pairs'][0]['distance'] == 1
+        assert {item['title'] for item in data['pairs'][0]['items']} == {'Phone A', 'Phone B'}
+        assert data['next_after_id'] is None
+
+    def test_get_duplicate_candidates_unauthorized(self, client, auth_headers):
+        """Test that regular users cannot list duplicates"""
+        response = client.get('/api/admin/items/duplicates', headers=auth_headers)
+        
+        assert response.status_code == 403
+
     def test_admin_dashboard_access(self, client, admin_headers):
         """Test that admin can access admin-specific endpoints"""
         # Test multiple admin endpoints
@@ -159,4 +380,228 @@ class TestAdminRoutes:
             
             # Check that item status is updated
             updated_item = Item.query.get(test_item.item_id)
-            assert updated_item.status == 'claimed'
\ No newline at end of file
+            assert updated_item.status == 'claimed'
+
+@pytest.fixture
+def pending_items(app, test_user):
+    """Five pending items reported a minute apart, oldest first"""
+    from datetime import datetime, timedelta
+    from app import db
+    with app.app_context():
+        start = datetime.utcnow() - timedelta(hours=1)
+        ids = []
+        for i in range(5):
+            item = Item(title=f'Pending item {i}', description='Reported item description',
+                        category='electronics' if i % 2 else 'books', item_type='found',
+                        date=start, location='Library', user_id=test_user.user_id,
+                        created_at=start + timedelta(minutes=i))
+            db.session.add(item)
+            db.session.flush()
+            ids.append(item.item_id)
+        db.session.commit()
+    return ids
+
+
+@pytest.fixture
+def second_admin_headers(app, client):
+    """Headers for a second admin working the queue at the same time"""
+    from app import db
+    from app.models import User
+    with app.app_context():
+        admin = User(name='Second Admin', email='admin2@strathmore.ac.ke', role='admin')
+        admin.set_password('AdminPass123')
+        db.session.add(admin)
+        db.session.commit()
+    response = client.post('/api/auth/login', json={'email': 'admin2@strathmore.ac.ke',
+                                                    'password': 'AdminPass123'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+class TestModerationQueue:
+    """Test the paginated moderation queue and its leases"""
+
+    def test_queue_pages_oldest_first(self, client, admin_headers, pending_items):
+        """Test that the queue is keyset paginated in report order"""
+        response = client.get('/api/admin/queue?limit=2', headers=admin_headers)
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        assert data['total'] == 5
+        assert [item['item_id'] for item in data['items']] == pending_items[:2]
+        
+        seen = [item['item_id'] for item in data['items']]
+        while data['next_cursor']:
+            data = client.get(f"/api/admin/queue?limit=2&cursor={data['next_cursor']}",
+                              headers=admin_headers).get_json()
+            seen += [item['item_id'] for item in data['items']]
+        assert seen == pending_items
+
+    def test_queue_filters_by_category(self, client, admin_headers, pending_items):
+        """Test filtering the queue by category"""
+        response = client.get('/api/admin/queue?category=books', headers=admin_headers)
+        
+        assert [item['item_id'] for item in response.get_json()['items']] == pending_items[::2]
+
+    def test_queue_invalid_cursor(self, client, admin_headers):
+        """Test that a malformed cursor is rejected"""
+        response = client.get('/api/admin/queue?cursor=garbage', headers=admin_headers)
+        
+        assert response.status_code == 400
+
+    def test_concurrent_leases_are_disjoint(self, client, admin_headers, second_admin_headers, pending_items):
+        """Test that two admins leasing at once get different items"""
+        first = client.post('/api/admin/queue/lease', headers=admin_headers, json={'count': 3}).get_json()
+        second = client.post('/api/admin/queue/lease', headers=second_admin_headers, json={'count': 3}).get_json()
+        
+        assert [item['item_id'] for item in first['items']] == pending_items[:3]
+        assert [item['item_id'] for item in second['items']] == pending_items[3:]
+        
+        available = client.get('/api/admin/queue?available=1', headers=second_admin_headers).get_json()
+        assert [item['item_id'] for item in available['items']] == pending_items[3:]
+
+    def test_leased_item_blocks_other_admins(self, client, admin_headers, second_admin_headers, pending_items):
+        """Test that moderation respects another admin's lease"""
+        client.post('/api/admin/queue/lease', headers=admin_headers, json={'count': 1})
+        item_id = pending_items[0]
+        
+        response = client.put(f'/api/admin/items/{item_id}/verify', headers=second_admin_headers,
+                              json={'action': 'approve'})
+        assert response.status_code == 409
+        
+        response = client.post('/api/admin/items/bulk', headers=second_admin_headers,
+                               json={'item_ids': [item_id], 'action': 'approve'})
+        assert response.get_json()['results'][0]['outcome'] == 'leased'
+        
+        response = client.put(f'/api/admin/items/{item_id}/verify', headers=admin_headers,
+                              json={'action': 'approve'})
+        assert response.status_code == 200
+
+    def test_release_returns_items_to_queue(self, client, admin_headers, second_admin_headers, pending_items):
+        """Test that released items can be leased by someone else"""
+        lease = client.post('/api/admin/queue/lease', headers=admin_headers, json={'count': 5}).get_json()
+        
+        response = client.post('/api/admin/queue/release', headers=admin_headers,
+                               json={'lease_token': lease['lease_token']})
+        assert response.get_json()['released'] == 5
+        
+        second = client.post('/api/admin/queue/lease', headers=second_admin_headers, json={'count': 5}).get_json()
+        assert len(second['items']) == 5
+
+    def test_lease_count_validation(self, client, admin_headers):
+        """Test that lease batch size is bounded"""
+        response = client.post('/api/admin/queue/lease', headers=admin_headers, json={'count': 500})
+        
+        assert response.status_code == 400
+
+
+class TestAdminStats:
+    """Test the statistics endpoint and its counters"""
+
+    def test_stats_follow_moderation(self, client, admin_headers, app, test_item, test_claim):
+        """Test that counters move with item and claim writes"""
+        response = client.get('/api/admin/stats', headers=admin_headers)
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        assert data['items']['total'] == 1
+        assert data['items']['by_status'] == {'pending': 1}
+        assert data['items']['by_type'] == {'lost': 1}
+        assert data['items']['by_category'] == {'electronics': 1}
+        assert data['claims']['pending'] == 1
+        
+        client.put(f'/api/admin/items/{test_item.item_id}/verify', headers=admin_headers,
+                   json={'action': 'approve'})
+        client.put(f'/api/admin/claims/{test_claim.claim_id}/approve', headers=admin_headers)
+        
+        data = client.get('/api/admin/stats', headers=admin_headers).get_json()
+        assert data['items']['by_status'] == {'claimed': 1}
+        assert data['claims']['pending'] == 0
+        assert data['claims']['by_status'] == {'approved': 1}
+        assert sum(data['claims']['approved_per_day'].values()) == 1
+        assert data['median_time_to_verify_seconds'] is not None
+
+    def test_stats_match_rebuild(self, client, admin_headers, app, pending_items, test_claim):
+        """Test that bulk writes keep the counters equal to a full recount"""
+        from app.utils.stats import read_stats, rebuild_counters
+        client.post('/api/admin/items/bulk', headers=admin_headers,
+                    json={'item_ids': pending_items[:3], 'action': 'approve'})
+        client.post('/api/admin/items/bulk', headers=admin_headers,
+                    json={'item_ids': pending_items[3:], 'action': 'reject'})
+        client.post('/api/admin/claims/bulk', headers=admin_headers,
+                    json={'claim_ids': [test_claim.claim_id], 'action': 'approve'})
+        
+        with app.app_context():
+            incremental = read_stats()
+            rebuild_counters()
+            assert read_stats() == incremental
+        assert incremental['items']['by_status'] == {'verified': 3, 'rejected': 2, 'claimed': 1}
+
+    def test_stats_unauthorized(self, client, auth_headers):
+        """Test that regular users cannot read statistics"""
+        response = client.get('/api/admin/stats', headers=auth_headers)
+        
+        assert response.status_code == 403
+
+
+class TestTimeseries:
+    """Test the daily rollups and the time-series endpoint"""
+
+    @pytest.fixture
+    def history(self, app, test_user):
+        """Items and claims spread over the last three days"""
+        from datetime import datetime, timedelta
+        from app import db
+        with app.app_context():
+            now = datetime.utcnow()
+            for days_ago, item_type, category in [(2, 'lost', 'books'), (2, 'found', 'books'),
+                                                  (1, 'found', 'electronics'), (0, 'lost', 'books')]:
+                reported = now - timedelta(days=days_ago)
+                item = Item(title='Reported item', description='Reported item description',
+                            category=category, item_type=item_type, date=reported, location='Library',
+                            user_id=test_user.user_id, created_at=reported)
+                db.session.add(item)
+                db.session.flush()
+                db.session.add(Claim(item_id=item.item_id, user_id=test_user.user_id,
+                                     status='approved' if days_ago == 2 else 'pending', created_at=reported))
+            db.session.commit()
+            return now.date()
+
+    def test_reports_per_day(self, client, admin_headers, runner, history):
+        """Test items reported per day split by type"""
+        from datetime import timedelta
+        result = runner.invoke(args=['stats', 'rollup'])
+        assert result.exit_code == 0
+        
+        start = (history - timedelta(days=2)).isoformat()
+        response = client.get(f'/api/admin/timeseries?start={start}&end={history.isoformat()}',
+                              headers=admin_headers)
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        assert len(data['days']) == 3
+        assert data['series'] == {'lost': [1, 0, 1], 'found': [1, 1, 0]}
+
+    def test_incremental_rollup(self, client, admin_headers, app, runner, history):
+        """Test that a later run picks up changed rows and matches a full rebuild"""
+        from app import db
+        runner.invoke(args=['stats', 'rollup'])
+        with app.app_context():
+            claim = Claim.query.filter_by(status='pending').first()
+            claim.status = 'rejected'
+            db.session.commit()
+        
+        runner.invoke(args=['stats', 'rollup'])
+        incremental = client.get('/api/admin/timeseries?metric=claims', headers=admin_headers).get_json()
+        runner.invoke(args=['stats', 'rollup', '--full'])
+        full = client.get('/api/admin/timeseries?metric=claims', headers=admin_headers).get_json()
+        
+        assert incremental == full
+        assert sum(incremental['series']['rejected']) == 1
+        assert incremental['series']['approval_rate'][-3] == 1.0
+
+    def test_timeseries_validation(self, client, admin_headers):
+        """Test that bad parameters are rejected"""
+        assert client.get('/api/admin/timeseries?metric=bogus', headers=admin_headers).status_code == 400
+        assert client.get('/api/admin/timeseries?start=2024-13-01', headers=admin_headers).status_code == 400
+        assert client.get('/api/admin/timeseries?start=2020-01-01&end=2024-01-01',
+                          headers=admin_headers).status_code == 400
@@ -0,0 +1,472 @@
+"""
+Test Flask CLI maintenance commands
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+import pytest
+from io import BytesIO
+from PIL import Image
+
+
+def _write_image(folder, name, size, fmt):
+    img = Image.new('RGB', size, color='white')
+    path = os.path.join(folder, name)
+    img.save(path, format=fmt, quality=100)
+    return path
+
+
+class TestUploadCommands:
+    """Test the uploads command group"""
+
+    def test_normalize_report_dry_run(self, app, runner):
+        """Test that the report shows savings without touching files"""
+        folder = app.config['UPLOAD_FOLDER']
+        path = _write_image(folder, 'big.jpg', (3000, 2000), 'JPEG')
+        size_before = os.path.getsize(path)
+        
+        result = runner.invoke(args=['uploads', 'normalize-report'])
+        
+        assert result.exit_code == 0
+        assert 'Files: 1' in result.output
+        assert 'Would save' in result.output
+        assert os.path.getsize(path) == size_before
+
+    def test_normalize_report_apply(self, app, runner):
+        """Test that --apply rewrites files that shrink"""
+        folder = app.config['UPLOAD_FOLDER']
+        path = _write_image(folder, 'big.jpg', (3000, 2000), 'JPEG')
+        
+        result = runner.invoke(args=['uploads', 'normalize-report', '--apply'])
+        
+        assert result.exit_code == 0
+        assert 'Saved' in result.output
+        assert max(Image.open(path).size) == app.config['IMAGE_MAX_EDGE']
+
+    def test_normalize_report_skips_non_images(self, app, runner):
+        """Test that unrelated files are ignored"""
+        with open(os.path.join(app.config['UPLOAD_FOLDER'], 'notes.txt'), 'w') as f:
+            f.write('not an image')
+        
+        result = runner.invoke(args=['uploads', 'normalize-report'])
+        
+        assert result.exit_code == 0
+        assert 'Files: 0' in result.output
+
+
+class TestReconcileCommand:
+    """Test the uploads reconcile command"""
+
+    @pytest.fixture
+    def upload_tree(self, app, test_user):
+        """Referenced, orphaned and missing photos in the upload folder"""
+        from datetime import datetime
+        from app import db
+        from app.models import Item
+        
+        folder = app.config['UPLOAD_FOLDER']
+        old = time.time() - 7 * 86400
+        for name in ('kept.jpg', 'stale.jpg', 'fresh.jpg', 'originals/kept.jpg', 'originals/stale.jpg'):
+            path = os.path.join(folder, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'data')
+            if name != 'fresh.jpg':
+                os.utime(path, (old, old))
+        
+        with app.app_context():
+            for photo in ('kept.jpg', 'gone.jpg'):
+                db.session.add(Item(title='Item', description='Item description', category='others',
+                                    item_type='found', photo_path=f'uploads/{photo}', date=datetime.utcnow(),
+                                    location='Library', user_id=test_user.user_id))
+            db.session.commit()
+        return folder
+
+    def test_reconcile_report(self, runner, upload_tree):
+        """Test that orphans and missing files are reported without changes"""
+        result = runner.invoke(args=['uploads', 'reconcile', '--verbose', '--partitions', '4'])
+        
+        assert result.exit_code == 0
+        assert 'Orphaned files: 3 (1 within the 24h grace period)' in result.output
+        assert 'orphan: stale.jpg' in result.output
+        assert 'missing: gone.jpg' in result.output
+        assert 'Items with missing photo files: 1' in result.output
+        assert os.path.exists(os.path.join(upload_tree, 'stale.jpg'))
+
+    def test_reconcile_quarantine(self, runner, upload_tree):
+        """Test that old orphans are moved to quarantine and fresh ones are kept"""
+        result = runner.invoke(args=['uploads', 'reconcile', '--action', 'quarantine'])
+        
+        assert result.exit_code == 0
+        assert 'Quarantined: 2' in result.output
+        assert os.path.exists(os.path.join(upload_tree, '.quarantine', 'stale.jpg'))
+        assert os.path.exists(os.path.join(upload_tree, '.quarantine', 'originals', 'stale.jpg'))
+        assert os.path.exists(os.path.join(upload_tree, 'fresh.jpg'))
+        assert os.path.exists(os.path.join(upload_tree, 'kept.jpg'))
+        assert os.path.exists(os.path.join(upload_tree, 'originals', 'kept.jpg'))
+        
+        # Quarantined files are no longer scanned
+        result = runner.invoke(args=['uploads', 'reconcile'])
+        assert 'Orphaned files: 1' in result.output
+
+    def test_reconcile_delete(self, runner, upload_tree):
+        """Test that old orphans are deleted"""
+        result = runner.invoke(args=['uploads', 'reconcile', '--action', 'delete', '--grace-hours', '0'])
+        
+        assert result.exit_code == 0
+        assert 'Deleted: 3' in result.output
+        assert sorted(os.listdir(upload_tree)) == ['kept.jpg', 'originals']
+
+
+class TestRehashCommand:
+    """Test the uploads rehash command"""
+
+    def test_rehash_backfills_cover_photos(self, app, runner, test_user, make_photo):
+        """Test that items from before item_photos get a hashed cover row"""
+        from datetime import datetime, timedelta
+        from app import db
+        from app.models import Item, ItemPhoto
+        
+        with open(os.path.join(app.config['UPLOAD_FOLDER'], 'legacy.jpg'), 'wb') as f:
+            f.write(make_photo(seed=21))
+        old = datetime.utcnow() - timedelta(days=2)
+        with app.app_context():
+            db.session.add(Item(title='Old item', description='Reported before photo table',
+                                category='others', item_type='lost', photo_path='uploads/legacy.jpg',
+                                date=old, location='Library', user_id=test_user.user_id,
+                                created_at=old, updated_at=old))
+            db.session.commit()
+        
+        result = runner.invoke(args=['uploads', 'rehash'])
+        
+        assert result.exit_code == 0
+        assert 'Backfilled 1 cover photos, hashed 1 photos' in result.output
+        photo = ItemPhoto.query.one()
+        assert photo.position == 0
+        assert photo.photo_hash == photo.item.photo_hash
+        # Rollups and other readers of the updated_at watermark must see the new hash
+        assert photo.item.updated_at > old
+
+
+    def test_rehash_bumps_items_of_hashed_photos(self, app, runner, test_user, make_photo):
+        """Test that hashing an item's extra photo moves the item's updated_at too"""
+        from datetime import datetime, timedelta
+        from app import db
+        from app.models import Item, ItemPhoto
+        
+        for name, seed in (('cover.jpg', 22), ('extra.jpg', 23)):
+            with open(os.path.join(app.config['UPLOAD_FOLDER'], name), 'wb') as f:
+                f.write(make_photo(seed=seed))
+        old = datetime.utcnow() - timedelta(days=2)
+        with app.app_context():
+            item = Item(title='Old item', description='Second photo never hashed', category='others',
+                        item_type='lost', photo_path='uploads/cover.jpg', photo_hash='00ff00ff00ff00ff',
+                        date=old, location='Library', user_id=test_user.user_id, created_at=old, updated_at=old)
+            item.photos = [ItemPhoto(path='uploads/cover.jpg', photo_hash='00ff00ff00ff00ff', position=0),
+                           ItemPhoto(path='uploads/extra.jpg', position=1)]
+            db.session.add(item)
+            db.session.commit()
+            item_id = item.item_id
+        
+        result = runner.invoke(args=['uploads', 'rehash'])
+        
+        assert 'hashed 1 photos' in result.output
+        with app.app_context():
+            assert Item.query.get(item_id).updated_at > old
+
+
+class TestStatsCommands:
+    """Test the stats command group"""
+
+    def test_stats_rebuild(self, app, runner, test_item):
+        """Test that rebuild recomputes counters from the tables"""
+        from app import db
+        from app.models import StatCounter
+        from app.utils.stats import read_stats
+        with app.app_context():
+            db.session.query(StatCounter).delete()
+            db.session.commit()
+        
+        result = runner.invoke(args=['stats', 'rebuild'])
+        
+        assert result.exit_code == 0
+        assert 'Rebuilt' in result.output
+        with app.app_context():
+            assert read_stats()['items']['by_status'] == {'pending': 1}
+
+
+class TestArchiveCommand:
+    """Test the archive command group"""
+
+    @pytest.fixture
+    def finished_items(self, app, test_user):
+        """A long-claimed item with a claim and photo, and an old but still pending item"""
+        from datetime import datetime, timedelta
+        from app import db
+        from app.models import Item, ItemPhoto, Claim
+        
+        with open(os.path.join(app.config['UPLOAD_FOLDER'], 'claimed.jpg'), 'wb') as f:
+            f.write(b'data')
+        old = datetime.utcnow() - timedelta(days=400)
+        with app.app_context():
+            claimed = Item(title='Claimed item', description='Item description', category='others',
+                           item_type='found', status='claimed', photo_path='uploads/claimed.jpg', date=old,
+                           location='Library', user_id=test_user.user_id, created_at=old, updated_at=old)
+            claimed.photos = [ItemPhoto(path='uploads/claimed.jpg', position=0)]
+            claimed.claims = [Claim(user_id=test_user.user_id, status='approved', created_at=old, updated_at=old)]
+            pending = Item(title='Pending item', description='Item description', category='others',
+                           item_type='lost', date=old, location='Library', user_id=test_user.user_id,
+                           created_at=old, updated_at=old)
+            db.session.add_all([claimed, pending])
+            db.session.commit()
+            return claimed.item_id, pending.item_id
+
+    def test_archive_moves_finished_items(self, app, runner, finished_items):
+        """Test that finished items move to the archive with their claims and photos"""
+        from app.models import Item, Claim, ItemPhoto, ItemArchive, ClaimArchive, ItemPhotoArchive
+        claimed_id, pending_id = finished_items
+        
+        result = runner.invoke(args=['archive', 'run', '--dry-run'])
+        assert 'Would archive 1 items' in result.output
+        
+        result = runner.invoke(args=['archive', 'run', '--batch-size', '1'])
+        
+        assert result.exit_code == 0
+        assert 'Archived 1 items' in result.output
+        with app.app_context():
+            assert Item.query.get(claimed_id) is None
+            assert Item.query.get(pending_id) is not None
+            assert ItemArchive.query.get(claimed_id).status == 'claimed'
+            assert ClaimArchive.query.filter_by(item_id=claimed_id).count() == 1
+            assert ItemPhotoArchive.query.filter_by(item_id=claimed_id).count() == 1
+            assert Claim.query.filter_by(item_id=claimed_id).count() == 0
+            assert ItemPhoto.query.filter_by(item_id=claimed_id).count() == 0
+
+    def test_archive_skips_ids_already_archived(self, app, runner, test_user, finished_items):
+        """Test that an item whose claim id is already in the archive stays live instead of failing the batch"""
+        from datetime import datetime
+        from app import db
+        from app.models import Item, Claim, ClaimArchive
+        claimed_id, _ = finished_items
+        
+        with app.app_context():
+            # A reused rowid, as plain rowid tables from before migration 2 could hand out
+            claim_id = Claim.query.filter_by(item_id=claimed_id).one().claim_id
+            db.session.add(ClaimArchive(claim_id=claim_id, item_id=999, user_id=test_user.user_id,
+                                        claim_date=datetime.utcnow(), status='approved'))
+            db.session.commit()
+        
+        result = runner.invoke(args=['archive', 'run', '--batch-size', '1'])
+        
+        assert result.exit_code == 0
+        assert f'Skipped items [{claimed_id}]' in result.output
+        assert 'Archived 0 items' in result.output
+        with app.app_context():
+            assert Item.query.get(claimed_id) is not None
+
+    def test_archived_records_stay_visible(self, app, client, runner, admin_headers, finished_items):
+        """Test that stats, claims, exports and reconcile still see archived rows"""
+        from app.utils.stats import read_stats, rebuild_counters
+        claimed_id, _ = finished_items
+        with app.app_context():
+            rebuild_counters()
+            before = read_stats()
+        
+        runner.invoke(args=['archive', 'run'])
+        
+        with app.app_context():
+            rebuild_counters()
+            assert read_stats() == before
+        
+        claims = client.get('/api/admin/claims/all', headers=admin_headers).get_json()['claims']
+        assert [claim['archived'] for claim in claims if claim['item_id'] == claimed_id] == [True]
+        
+        export = client.get('/api/admin/export/items', headers=admin_headers).get_data(as_text=True)
+        assert f'{claimed_id},Claimed item' in export
+        assert export.strip().splitlines()[-1].endswith(',1')
+        
+        result = runner.invoke(args=['uploads', 'reconcile', '--grace-hours', '0'])
+        assert 'Orphaned files: 0' in result.output
+
+
+class TestLifecycleCommand:
+    """Test the lifecycle command group"""
+
+    @pytest.fixture
+    def aged_items(self, app, test_user):
+        """Verified items of different ages, types and categories"""
+        from datetime import datetime, timedelta
+        from app import db
+        from app.models import Item, Claim
+        
+        now = datetime.utcnow()
+        items = {}
+        with app.app_context():
+            for name, item_type, category, days_old in [('old_found', 'found', 'electronics', 100),
+                                                        ('recent_lost', 'lost', 'electronics', 30),
+                                                        ('old_document', 'found', 'documents', 100),
+                                                        ('claimed_found', 'found', 'books', 100)]:
+                item = Item(title=name, description='Item description', category=category,
+                            item_type=item_type, status='verified', is_verified=True,
+                            date=now - timedelta(days=days_old), location='Library', user_id=test_user.user_id)
+                db.session.add(item)
+                db.session.flush()
+                items[name] = item.item_id
+            db.session.add(Claim(item_id=items['claimed_found'], user_id=test_user.user_id, status='pending'))
+            db.session.commit()
+        return items
+
+    def test_lifecycle_expires_stale_items(self, app, runner, aged_items):
+        """Test that only items past their rule's age and without pending claims expire"""
+        from app.models import Item
+        from app.utils.stats import read_stats
+        
+        result = runner.invoke(args=['lifecycle', 'run', '--batch-size', '1'])
+        
+        assert result.exit_code == 0
+        assert 'Total moved: 1' in result.output
+        with app.app_context():
+            statuses = {name: Item.query.get(item_id).status for name, item_id in aged_items.items()}
+            assert statuses == {'old_found': 'expired', 'recent_lost': 'verified',
+                                'old_document': 'verified', 'claimed_found': 'verified'}
+            assert read_stats()['items']['by_status'] == {'verified': 3, 'expired': 1}
+
+    def test_lifecycle_dry_run(self, app, runner, aged_items):
+        """Test that a dry run only counts"""
+        from app.models import Item
+        
+        result = runner.invoke(args=['lifecycle', 'run', '--dry-run'])
+        
+        assert 'Total would move: 1' in result.output
+        with app.app_context():
+            assert Item.query.filter_by(status='expired').count() == 0
+
+    def test_lifecycle_custom_rules(self, app, runner, aged_items):
+        """Test rules from config, and that invalid rules are refused"""
+        app.config['LIFECYCLE_RULES'] = '[{"status": "verified", "category": "electronics", "after_days": 7, "to": "expired"}]'
+        
+        result = runner.invoke(args=['lifecycle', 'run'])
+        assert 'Total moved: 2' in result.output
+        
+        app.config['LIFECYCLE_RULES'] = '[{"status": "verified", "after_days": 7, "to": "gone"}]'
+        result = runner.invoke(args=['lifecycle', 'run'])
+        assert result.exit_code != 0
+        assert 'Unknown status' in result.output
+
+
+class TestDatabaseCommands:
+    """Test the init-db and migrate commands"""
+
+    def test_init_db_stamps_schema_and_creates_admin(self, app, runner):
+        """Test that init-db records the schema version and creates the admin once"""
+        from app.models import User
+        from app.utils.migrations import SCHEMA_VERSION
+        
+        result = runner.invoke(args=['init-db', '--admin-password', 'Setup123'])
+        
+        assert result.exit_code == 0
+        assert f'Schema version: {SCHEMA_VERSION}' in result.output
+        assert 'Admin user created' in result.output
+        admin = User.query.filter_by(email='admin@strathmore.ac.ke').first()
+        assert admin.role == 'admin' and admin.check_password('Setup123')
+        
+        result = runner.invoke(args=['init-db'])
+        assert 'Applied' not in result.output
+        assert 'Admin user already exists' in result.output
+
+    def test_migrate_upgrades_old_database(self, app, runner, test_claim):
+        """Test that migrate adds the tables, columns and indexes an older database lacks"""
+        from sqlalchemy import inspect
+        from app import db
+        
+        # The claims table and indexes as they were before optimistic locking and events
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('DROP TABLE events')
+            connection.exec_driver_sql('DROP TABLE schema_version')
+            connection.exec_driver_sql('DROP INDEX ix_items_status_date')
+            connection.exec_driver_sql('ALTER TABLE claims RENAME TO claims_new')
+            connection.exec_driver_sql(
+                'CREATE TABLE claims (claim_id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, '
+                'user_id INTEGER NOT NULL, claim_date DATETIME, status VARCHAR(50), notes TEXT, '
+                'created_at DATETIME, updated_at DATETIME)')
+            connection.exec_driver_sql('INSERT INTO claims SELECT claim_id, item_id, user_id, claim_date, status, '
+                                       'notes, created_at, updated_at FROM claims_new')
+            connection.exec_driver_sql('DROP TABLE claims_new')
+            # An archived claim whose id the plain rowid table would hand out again
+            connection.exec_driver_sql(f"INSERT INTO claims_archive (claim_id, item_id, user_id, status, version, "
+                                       f"archived_at) VALUES (50, 1, {test_claim.user_id}, 'approved', 1, "
+                                       f"'2020-01-01 00:00:00')")
+        
+        result = runner.invoke(args=['migrate'])
+        
+        assert result.exit_code == 0
+        assert 'claims.version' in result.output
+        assert 'claims AUTOINCREMENT' in result.output
+        inspector = inspect(db.engine)
+        assert inspector.has_table('events')
+        assert 'ix_items_status_date' in {index['name'] for index in inspector.get_indexes('items')}
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql('SELECT version FROM claims').scalar() == 1
+            assert 'AUTOINCREMENT' in connection.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE name = 'claims'").scalar()
+            connection.exec_driver_sql(f"INSERT INTO claims (item_id, user_id, status, version) "
+                                       f"VALUES ({test_claim.item_id}, {test_claim.user_id}, 'pending', 1)")
+            assert connection.exec_driver_sql('SELECT MAX(claim_id) FROM claims').scalar() == 51
+        assert 'ix_claims_created_at' in {index['name'] for index in inspector.get_indexes('claims')}
+        assert 'Applied' not in runner.invoke(args=['migrate']).output
+
+
+class TestAssetsCommand:
+    """Test the assets build and how built pages and assets are served"""
+
+    @pytest.fixture
+    def built(self, app, runner, tmp_path):
+        app.config['ASSET_BUILD_FOLDER'] = str(tmp_path)
+        result = runner.invoke(args=['assets', 'build'])
+        assert result.exit_code == 0
+        with open(tmp_path / 'manifest.json') as f:
+            return json.load(f)
+
+    def test_build_hashes_and_rewrites(self, app, built, tmp_path):
+        """Test that assets get content-hashed names and the pages point at them"""
+        hashed = built['js/api-client.js']
+        
+        assert re.fullmatch(r'js/api-client\.[0-9a-f]{10}\.js', hashed)
+        assert (tmp_path / 'assets' / (hashed + '.gz')).exists()
+        page = (tmp_path / 'browse.html').read_text()
+        assert f'/assets/{hashed}' in page
+        assert '/static/' not in page
+        css = (tmp_path / 'assets' / built['css/style.css']).read_text()
+        assert f"/assets/{built['images/strathmore-bg.svg']}" in css
+
+    def test_built_assets_are_negotiated_and_cached(self, client, built):
+        """Test gzip negotiation, immutable hashed assets and short-lived pages"""
+        url = f"/assets/{built['js/api-client.js']}"
+        
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'immutable' in response.headers['Cache-Control']
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert response.mimetype in ('application/javascript', 'text/javascript')
+        plain = client.get(url)
+        assert 'Content-Encoding' not in plain.headers
+        assert gzip.decompress(response.data) == plain.data
+        
+        page = client.get('/browse', headers={'Accept-Encoding': 'gzip'})
+        assert page.headers['Content-Encoding'] == 'gzip'
+        assert page.headers['Cache-Control'] == 'public, max-age=60'
+        assert client.get('/assets/../browse.html').status_code == 404
+
+    def test_pages_without_build(self, app, client, tmp_path):
+        """Test that pages are served from app/static until a build exists"""
+        app.config['ASSET_BUILD_FOLDER'] = str(tmp_path)
+        
+        response = client.get('/browse', headers={'Accept-Encoding': 'gzip'})
+        
+        assert response.status_code == 200
+        assert b'/static/js/api-client.js' in response.data
+        assert 'Content-Encoding' not in response.headers
@@ -5,6 +5,7 @@ Test item management endpoints
 import pytest
 import json
 import io
+import os
 from datetime import datetime
 from app.models import Item, Claim
 
@@ -36,6 +37,117 @@ class TestItemRoutes:
         assert 'item' in response_data
         assert response_data['item']['title'] == data['title']
 
+    def test_report_item_normalizes_photo(self, client, app, auth_headers):
+        """Test that stored photos are downscaled and stripped of metadata"""
+        from PIL import Image
+        img = Image.new('RGB', (3000, 1500), color='black')
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        buf = io.BytesIO()
+        img.save(buf, format='JPEG', exif=exif.tobytes())
+        buf.seek(0)
+        
+        data = {
+            'title': 'Lost Camera',
+            'description': 'Small black camera with a strap',
+            'category': 'electronics',
+            'item_type': 'lost',
+            'date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
+            'location': 'Library',
+            'photo': (buf, 'camera.jpg')
+        }
+        
+        response = client.post('/api/items/report', data=data, headers=auth_headers)
+        
+        assert response.status_code == 201
+        photo_path = response.get_json()['item']['photo_path']
+        stored = Image.open(os.path.join(app.config['UPLOAD_FOLDER'], os.path.basename(photo_path)))
+        assert max(stored.size) == app.config['IMAGE_MAX_EDGE']
+        assert len(stored.getexif()) == 0
+
+    def test_report_item_warns_about_duplicates(self, client, auth_headers, make_photo):
+        """Test that reporting the same photo twice is flagged"""
+        def report(item_type, size):
+            return client.post('/api/items/report', data={
+                'title': 'Blue Umbrella',
+                'description': 'Blue umbrella with a wooden handle',
+                'category': 'accessories',
+                'item_type': item_type,
+                'date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
+                'location': 'Cafeteria',
+                'photo': (io.BytesIO(make_photo(seed=3, size=size)), 'umbrella.jpg')
+            }, headers=auth_headers)
+        
+        first = report('found', (90, 80)).get_json()
+        assert first['item']['photo_hash']
+        assert first['possible_duplicates'] == []
+        
+        second = report('found', (180, 160)).get_json()
+        assert [d['item_id'] for d in second['possible_duplicates']] == [first['item']['item_id']]
+        
+        third = report('lost', (90, 80)).get_json()
+        assert len(third['possible_matches']) == 2
+
+    def test_report_item_multiple_photos(self, client, app, auth_headers, make_photo):
+        """Test attaching several photos to one report"""
+        data = {
+            'title': 'Red Water Bottle',
+            'description': 'Red metal water bottle with stickers',
+            'category': 'others',
+            'item_type': 'found',
+            'date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
+            'location': 'Gym',
+            'photos': [(io.BytesIO(make_photo(seed=seed)), f'bottle{seed}.jpg') for seed in (11, 12, 13)]
+        }
+        
+        response = client.post('/api/items/report', data=data, headers=auth_headers)
+        
+        assert response.status_code == 201
+        item = response.get_json()['item']
+        assert [photo['position'] for photo in item['photos']] == [0, 1, 2]
+        assert item['photo_path'] == item['photos'][0]['photo_path']
+        
+        detail = client.get(f"/api/items/{item['item_id']}").get_json()
+        assert len(detail['photos']) == 3
+        
+        photo_id = detail['photos'][2]['photo_id']
+        response = client.get(f"/api/items/{item['item_id']}/photos/{photo_id}")
+        assert response.status_code == 200
+        assert response.mimetype == 'image/jpeg'
+
+    def test_report_item_too_many_photos(self, client, app, auth_headers, make_photo):
+        """Test the per-item photo limit"""
+        count = app.config['MAX_PHOTOS_PER_ITEM'] + 1
+        data = {'photos': [(io.BytesIO(make_photo(seed=i)), f'p{i}.jpg') for i in range(count)]}
+        
+        response = client.post('/api/items/report', data=data, headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert 'At most' in response.get_json()['error']
+
+    def test_report_item_query_count(self, client, auth_headers, make_photo, assert_max_queries):
+        """Test that reporting doesn't load the new item or its photos back after the commit"""
+        def report(seed):
+            return client.post('/api/items/report', data={
+                'title': f'Blue umbrella {seed}',
+                'description': 'Blue umbrella with a wooden handle',
+                'category': 'accessories',
+                'item_type': 'found',
+                'date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
+                'location': 'Student Centre',
+                'photos': (io.BytesIO(make_photo(seed=seed)), 'umbrella.jpg')
+            }, headers=auth_headers)
+        
+        assert report(1).status_code == 201  # Builds the photo and text indexes
+        # Counter, item and photo INSERTs, then one catch-up SELECT per index
+        with assert_max_queries(5):
+            response = report(2)
+        
+        assert response.status_code == 201
+        item = response.get_json()['item']
+        assert item['title'] == 'Blue umbrella 2'
+        assert len(item['photos']) == 1 and item['photos'][0]['item_id'] == item['item_id']
+
     def test_report_item_no_auth(self, client, sample_image):
         """Test item reporting without authentication"""
         data = {
@@ -214,4 +326,319 @@ class TestItemRoutes:
             data = response.get_json()
             
             item_ids = [item['item_id'] for item in data['items']]
-            assert unverified_item.item_id not in item_ids
\ No newline at end of file
+            assert unverified_item.item_id not in item_ids
+
+    def test_get_item_matches(self, client, app, test_user, test_item):
+        """Test that matches are verified opposite-type items in the same category and date window"""
+        from datetime import timedelta
+        from app import db
+        
+        with app.app_context():
+            found = {}
+            for name, title, category, item_type, status, days_ago in [
+                ('match', 'Black Samsung phone', 'electronics', 'found', 'verified', 3),
+                ('unrelated', 'Blue umbrella', 'electronics', 'found', 'verified', 3),
+                ('other_category', 'Samsung phone case', 'accessories', 'found', 'verified', 3),
+                ('too_old', 'Samsung Galaxy phone', 'electronics', 'found', 'verified', 200),
+                ('same_type', 'Lost Samsung Galaxy', 'electronics', 'lost', 'verified', 3),
+                ('unverified', 'Samsung Galaxy S21', 'electronics', 'found', 'pending', 3),
+            ]:
+                item = Item(title=title, description=title, category=category,
+                            item_type=item_type, status=status, is_verified=status == 'verified',
+                            date=datetime.utcnow() - timedelta(days=days_ago), location='Sports complex',
+                            user_id=test_user.user_id)
+                db.session.add(item)
+                db.session.flush()
+                found[name] = item.item_id
+            db.session.commit()
+        
+        response = client.get(f'/api/items/{test_item.item_id}/matches')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [match['item_id'] for match in data['matches']] == [found['match']]
+        assert 0 < data['matches'][0]['score'] <= 1
+        
+        assert client.get('/api/items/99999/matches').status_code == 404
+
+
+class TestSavedSearches:
+    """Test saved searches and the alerts they produce"""
+
+    @pytest.fixture
+    def pending_items(self, app, admin_user):
+        """Pending found items reported by another user"""
+        from app import db
+        
+        with app.app_context():
+            item_ids = []
+            for title, category, location in [('Black HP laptop', 'electronics', 'Library'),
+                                              ('HP laptop charger', 'electronics', 'Cafeteria'),
+                                              ('Black umbrella', 'others', 'Library')]:
+                item = Item(title=title, description=f'{title} found on a desk', category=category,
+                            item_type='found', date=datetime.utcnow(), location=location,
+                            user_id=admin_user.user_id)
+                db.session.add(item)
+                db.session.flush()
+                item_ids.append(item.item_id)
+            db.session.commit()
+        return item_ids
+
+    def test_alert_on_verification(self, client, auth_headers, admin_headers, pending_items):
+        """Test that verifying items alerts only the searches they satisfy"""
+        response = client.post('/api/items/searches', headers=auth_headers,
+                               json={'name': 'My laptop', 'query': 'black HP laptop, library', 'item_type': 'found'})
+        assert response.status_code == 201
+        client.post('/api/items/searches', headers=auth_headers, json={'query': 'umbrella', 'category': 'clothing'})
+        
+        client.put(f'/api/admin/items/{pending_items[0]}/verify', headers=admin_headers, json={'action': 'approve'})
+        client.post('/api/admin/items/bulk', headers=admin_headers,
+                    json={'item_ids': pending_items[1:], 'action': 'approve'})
+        
+        response = client.get('/api/items/alerts', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [alert['item']['item_id'] for alert in data['alerts']] == [pending_items[0]]
+        assert data['alerts'][0]['search_name'] == 'My laptop'
+        assert data['unseen'] == 1
+        
+        response = client.post('/api/items/alerts/seen', headers=auth_headers,
+                               json={'up_to_id': data['alerts'][0]['alert_id']})
+        assert response.get_json()['marked'] == 1
+        assert client.get('/api/items/alerts?unseen=1', headers=auth_headers).get_json()['alerts'] == []
+
+    def test_deleted_search_stops_alerts(self, client, auth_headers, admin_headers, pending_items):
+        """Test that a deleted search no longer produces alerts"""
+        search = client.post('/api/items/searches', headers=auth_headers, json={'query': 'laptop'}).get_json()['search']
+        client.put(f'/api/admin/items/{pending_items[0]}/status', headers=admin_headers, json={'status': 'verified'})
+        
+        response = client.delete(f"/api/items/searches/{search['search_id']}", headers=auth_headers)
+        assert response.status_code == 200
+        client.put(f'/api/admin/items/{pending_items[1]}/verify', headers=admin_headers, json={'action': 'approve'})
+        
+        alerts = client.get('/api/items/alerts', headers=auth_headers).get_json()['alerts']
+        assert [alert['item']['item_id'] for alert in alerts] == [pending_items[0]]
+        assert client.get('/api/items/searches', headers=auth_headers).get_json()['total'] == 0
+
+    def test_saved_search_validation(self, client, auth_headers):
+        """Test that empty or invalid searches are refused"""
+        for payload in ({}, {'query': 'a the'}, {'query': 'phone', 'category': 'pets'},
+                        {'query': 'phone', 'item_type': 'stolen'}):
+            response = client.post('/api/items/searches', headers=auth_headers, json=payload)
+            assert response.status_code == 400
+        
+        assert client.get('/api/items/alerts').status_code == 401
+
+
+class TestEventStream:
+    """Test the server-sent events stream"""
+
+    def read_events(self, response, count, max_chunks=50):
+        """Parse (event, data) pairs from a streaming response until `count` arrived"""
+        events = []
+        chunks = iter(response.response)
+        for _ in range(max_chunks):
+            chunk = next(chunks).decode()
+            fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith(':'))
+            if 'event' in fields:
+                events.append((fields['event'], json.loads(fields['data'])))
+                if len(events) == count:
+                    break
+        response.close()
+        return events
+
+    @pytest.fixture
+    def pending_item(self, app, admin_user):
+        from app import db
+        
+        with app.app_context():
+            item = Item(title='Found keys', description='Keys on a red lanyard', category='accessories',
+                        item_type='found', date=datetime.utcnow(), location='Cafeteria', user_id=admin_user.user_id)
+            db.session.add(item)
+            db.session.commit()
+            return item.item_id
+
+    def test_stream_delivers_claim_and_item_events(self, app, client, auth_token, admin_headers,
+                                                   test_claim, pending_item):
+        """Test that a connected user receives their claim change and items they filter for"""
+        app.config['EVENTS_POLL_SECONDS'] = 0.02
+        app.config['EVENTS_HEARTBEAT_SECONDS'] = 0.1
+        response = client.get(f'/api/items/events?token={auth_token}&category=accessories', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        
+        client.put(f'/api/admin/claims/{test_claim.claim_id}/approve', headers=admin_headers)
+        client.put(f'/api/admin/items/{pending_item}/verify', headers=admin_headers, json={'action': 'approve'})
+        
+        events = self.read_events(response, 2)
+        assert events[0] == ('claim_updated', {'claim_id': test_claim.claim_id, 'item_id': test_claim.item_id,
+                                               'status': 'approved', 'version': 2})
+        assert events[1][0] == 'item_verified'
+        assert events[1][1]['item_id'] == pending_item
+
+    def test_stream_replays_missed_events(self, client, admin_headers, test_claim, pending_item):
+        """Test that Last-Event-ID replays public events but not other users' claims"""
+        client.put(f'/api/admin/claims/{test_claim.claim_id}/reject', headers=admin_headers)
+        client.put(f'/api/admin/items/{pending_item}/verify', headers=admin_headers, json={'action': 'approve'})
+        
+        response = client.get('/api/items/events?item_type=found', headers={'Last-Event-ID': '0'}, buffered=False)
+        
+        events = self.read_events(response, 1)
+        assert [(kind, payload['item_id']) for kind, payload in events] == [('item_verified', pending_item)]
+        assert client.get('/api/items/events?token=bogus').status_code == 401
+
+    def wait_for(self, condition, timeout=2.0):
+        """Poll `condition` until it holds; the bridge works in its own thread"""
+        import time
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_subscriber_after_idle_gets_only_new_events(self, app, client, admin_headers, pending_item):
+        """Test that events written while nobody listened aren't delivered to the next subscriber as new"""
+        from app import db
+        from app.models import Event
+        from app.utils.events import get_event_bridge, get_event_broker
+        
+        app.config['EVENTS_POLL_SECONDS'] = 0.02
+        bridge = get_event_bridge()
+        bridge.start()
+        client.put(f'/api/admin/items/{pending_item}/verify', headers=admin_headers, json={'action': 'approve'})
+        with app.app_context():
+            newest = db.session.query(db.func.max(Event.event_id)).scalar()
+        
+        assert self.wait_for(lambda: bridge.last_event_id == newest)
+        subscriber = get_event_broker().subscribe()
+        try:
+            assert subscriber.wait(0.2) == []
+        finally:
+            get_event_broker().unsubscribe(subscriber)
+
+    def test_idle_bridge_prunes(self, app, client, admin_headers, pending_item):
+        """Test that expired events are deleted even while nobody is subscribed"""
+        from datetime import timedelta
+        from app import db
+        from app.models import Event
+        from app.utils.events import get_event_bridge
+        
+        app.config['EVENTS_POLL_SECONDS'] = 0.02
+        client.put(f'/api/admin/items/{pending_item}/verify', headers=admin_headers, json={'action': 'approve'})
+        bridge = get_event_bridge()
+        bridge.retention = timedelta(0)
+        bridge.start()
+        
+        def remaining():
+            with app.app_context():
+                return db.session.query(Event).count()
+        assert self.wait_for(lambda: remaining() == 0)
+
+    def test_idle_replayed_stream_holds_no_connection(self, app, client, admin_headers, pending_item):
+        """Test that a stream returns its pooled connection after the replay, before it waits"""
+        from app import db
+        
+        app.config['EVENTS_HEARTBEAT_SECONDS'] = 0.05
+        client.put(f'/api/admin/items/{pending_item}/verify', headers=admin_headers, json={'action': 'approve'})
+        # Test client requests share the test's app context, so this also ends the session of the PUT
+        db.session.remove()
+        pool = db.engine.pool
+        checked_out = pool.checkedout()
+        
+        response = client.get('/api/items/events', headers={'Last-Event-ID': '0'}, buffered=False)
+        try:
+            chunks = iter(response.response)
+            while next(chunks).decode() != ': keep-alive\n\n':
+                pass  # The retry line, then the replay
+            assert pool.checkedout() == checked_out
+        finally:
+            response.close()
+
+
+class TestReadReplica:
+    """Test routing of read-only endpoints to the replica engine"""
+
+    @pytest.fixture
+    def app(self, monkeypatch):
+        """The test app with a read-only replica on the primary's own SQLite file"""
+        from app import create_app, db
+        
+        monkeypatch.setenv('DB_REPLICA_URI', 'sqlite:///lostnfound.db')
+        app = create_app('testing')
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+        app.extensions['db_replica'].dispose()
+
+    @pytest.fixture
+    def replica_statements(self, app):
+        """SQL statements run on the replica engine"""
+        from sqlalchemy import event
+        
+        statements = []
+        event.listen(app.extensions['db_replica'], 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        return statements
+
+    def test_reads_use_replica(self, app, client, test_item, replica_statements):
+        """Test that browse and item detail query the replica, which refuses writes"""
+        from sqlalchemy.exc import OperationalError
+        
+        assert client.get('/api/items').get_json()['total'] == 1
+        assert client.get(f'/api/items/{test_item.item_id}').status_code == 200
+        assert len(replica_statements) >= 2
+        assert all(statement.lstrip().upper().startswith('SELECT') for statement in replica_statements)
+        
+        with app.extensions['db_replica'].connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql('DELETE FROM items')
+
+    def test_writers_read_from_primary(self, app, client, test_item, replica_statements):
+        """Test that a client that just wrote reads its own writes from the primary"""
+        response = client.post('/api/auth/login', json={'email': 'test@strathmore.ac.ke', 'password': 'TestPass123'})
+        assert response.status_code == 200
+        assert 'db_primary_until' in response.headers.get('Set-Cookie', '')
+        
+        assert client.get(f'/api/items/{test_item.item_id}').status_code == 200
+        assert replica_statements == []
+
+
+class TestResponseCompression:
+    """Test gzip compression of JSON API responses"""
+
+    @pytest.fixture
+    def many_items(self, app, test_user):
+        """Enough verified items for a browse page well above COMPRESS_MIN_BYTES"""
+        from app import db
+        
+        for i in range(20):
+            db.session.add(Item(title=f'Lost umbrella {i}', description='Black umbrella with a wooden handle ' * 5,
+                                category='accessories', item_type='lost', date=datetime.utcnow(),
+                                location='Student Centre', user_id=test_user.user_id, is_verified=True))
+        db.session.commit()
+
+    def test_large_json_is_compressed(self, app, client, many_items):
+        """Test that browse pages are gzipped for clients that accept it, and only for them"""
+        import gzip
+        
+        plain = client.get('/api/items')
+        compressed = client.get('/api/items', headers={'Accept-Encoding': 'gzip'})
+        
+        assert 'Content-Encoding' not in plain.headers
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in compressed.headers['Vary']
+        assert int(compressed.headers['Content-Length']) < len(plain.data) / 4
+        assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+
+    def test_repeat_responses_come_from_cache(self, app, client, many_items):
+        """Test that an unchanged body is compressed once and small bodies are left alone"""
+        client.get('/api/items', headers={'Accept-Encoding': 'gzip'})
+        client.get('/api/items', headers={'Accept-Encoding': 'gzip'})
+        
+        cache = app.extensions['compressed_cache']
+        assert (cache.hits, cache.misses) == (1, 1)
+        
+        small = client.get('/api/items?per_page=1', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in small.headers
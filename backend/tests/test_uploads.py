@@ -0,0 +1,146 @@
+"""
+Test resumable chunked photo uploads
+"""
+
+import pytest
+import os
+from datetime import datetime
+from app.models import Item, PhotoUpload
+
+
+def _start(client, headers, data, filename='photo.jpg'):
+    response = client.post('/api/items/uploads', json={'filename': filename, 'size': len(data)},
+                           headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['upload']['upload_id']
+
+
+def _send(client, headers, upload_id, data, start, end):
+    return client.put(
+        f'/api/items/uploads/{upload_id}',
+        data=data[start:end + 1],
+        headers={**headers, 'Content-Range': f'bytes {start}-{end}/{len(data)}',
+                 'Content-Type': 'application/octet-stream'}
+    )
+
+
+class TestChunkedUploads:
+    """Test the initiate / chunk / finalize protocol"""
+
+    def test_full_upload_and_report(self, client, app, auth_headers, make_photo):
+        """Test uploading in chunks and creating an item from the upload id"""
+        data = make_photo(seed=5, size=(400, 300))
+        upload_id = _start(client, auth_headers, data)
+        middle = len(data) // 2
+        
+        assert _send(client, auth_headers, upload_id, data, 0, middle - 1).status_code == 200
+        response = _send(client, auth_headers, upload_id, data, middle, len(data) - 1)
+        assert response.get_json()['upload']['received_size'] == len(data)
+        
+        response = client.post(f'/api/items/uploads/{upload_id}/finalize', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['upload']['status'] == 'complete'
+        
+        response = client.post('/api/items/report', data={
+            'title': 'Grey Backpack',
+            'description': 'Grey backpack with laptop sleeve',
+            'category': 'accessories',
+            'item_type': 'found',
+            'date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
+            'location': 'Parking lot',
+            'upload_id': upload_id
+        }, headers=auth_headers)
+        
+        assert response.status_code == 201
+        item = response.get_json()['item']
+        assert item['photo_hash']
+        assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], os.path.basename(item['photo_path'])))
+        assert PhotoUpload.query.get(upload_id) is None
+        assert not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], '.partial', f'{upload_id}.part'))
+
+    def test_resume_after_dropped_chunk(self, client, auth_headers, make_photo):
+        """Test that progress can be queried and gaps are refused"""
+        data = make_photo(seed=6)
+        upload_id = _start(client, auth_headers, data)
+        _send(client, auth_headers, upload_id, data, 0, 99)
+        
+        # A chunk past the received offset would leave a hole
+        response = _send(client, auth_headers, upload_id, data, 200, len(data) - 1)
+        assert response.status_code == 416
+        
+        response = client.get(f'/api/items/uploads/{upload_id}', headers=auth_headers)
+        assert response.get_json()['upload']['received_size'] == 100
+        
+        # Retrying an overlapping range is fine
+        response = _send(client, auth_headers, upload_id, data, 50, len(data) - 1)
+        assert response.status_code == 200
+        assert response.get_json()['upload']['received_size'] == len(data)
+
+    def test_finalize_incomplete_upload(self, client, auth_headers, make_photo):
+        """Test that an upload can't be finalized before all bytes arrive"""
+        data = make_photo(seed=7)
+        upload_id = _start(client, auth_headers, data)
+        _send(client, auth_headers, upload_id, data, 0, 9)
+        
+        response = client.post(f'/api/items/uploads/{upload_id}/finalize', headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert 'incomplete' in response.get_json()['error']
+
+    def test_finalize_invalid_image(self, client, auth_headers):
+        """Test that a non-image is rejected once at finalize and discarded"""
+        data = b'this is not really a jpeg' * 10
+        upload_id = _start(client, auth_headers, data)
+        _send(client, auth_headers, upload_id, data, 0, len(data) - 1)
+        
+        response = client.post(f'/api/items/uploads/{upload_id}/finalize', headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert PhotoUpload.query.get(upload_id) is None
+
+    def test_initiate_rejects_bad_files(self, client, auth_headers):
+        """Test extension and size checks when starting an upload"""
+        response = client.post('/api/items/uploads', json={'filename': 'doc.pdf', 'size': 10},
+                               headers=auth_headers)
+        assert response.status_code == 400
+        
+        response = client.post('/api/items/uploads', json={'filename': 'big.jpg', 'size': 64 * 1024 * 1024},
+                               headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_report_with_unfinished_upload(self, client, auth_headers, make_photo):
+        """Test that an item can't reference an upload that wasn't finalized"""
+        upload_id = _start(client, auth_headers, make_photo(seed=8))
+        
+        response = client.post('/api/items/report', data={'upload_id': upload_id}, headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert 'not finalized' in response.get_json()['error']
+
+    def test_repeated_upload_id_counts_once(self, client, app, auth_headers, make_photo):
+        """Test that an upload id sent more than once counts once against the photo limit"""
+        data = make_photo(seed=10)
+        upload_id = _start(client, auth_headers, data)
+        assert _send(client, auth_headers, upload_id, data, 0, len(data) - 1).status_code == 200
+        assert client.post(f'/api/items/uploads/{upload_id}/finalize', headers=auth_headers).status_code == 200
+        
+        response = client.post('/api/items/report', data={
+            'title': 'Blue Umbrella',
+            'description': 'Blue umbrella with a wooden handle',
+            'category': 'accessories',
+            'item_type': 'found',
+            'date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
+            'location': 'Student Centre',
+            'upload_id': [upload_id] * (app.config['MAX_PHOTOS_PER_ITEM'] + 1)
+        }, headers=auth_headers)
+        
+        assert response.status_code == 201
+        assert len(response.get_json()['item']['photos']) == 1
+
+    def test_upload_belongs_to_user(self, client, auth_headers, admin_headers, make_photo):
+        """Test that another user can't see or write an upload"""
+        data = make_photo(seed=9)
+        upload_id = _start(client, auth_headers, data)
+        
+        assert client.get(f'/api/items/uploads/{upload_id}', headers=admin_headers).status_code == 404
+        assert _send(client, admin_headers, upload_id, data, 0, 9).status_code == 404
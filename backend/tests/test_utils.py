@@ -8,6 +8,10 @@ import os
 from io import BytesIO
 from PIL import Image
 from app.utils.validators import validate_email, validate_image, secure_upload_filename
+from app.utils.images import normalize_image
+from app.utils.phash import MultiIndexHashTable, image_hash, parse_hash, hamming_distance
+from app.utils.matching import TextMatchIndex, tokenize
+from app.utils.percolator import SavedSearchIndex, compile_terms
 from app.utils.auth import generate_token, verify_token
 
 
@@ -138,6 +142,448 @@ class TestValidators:
         assert 'exceeds' in message.lower() or 'size' in message.lower()
 
 
+
+class TestImageNormalization:
+    """Test image normalization applied at upload"""
+
+    def _jpeg_with_exif(self, size, orientation):
+        img = Image.new('RGB', size, color='blue')
+        exif = Image.Exif()
+        exif[0x0112] = orientation  # Orientation
+        exif[0x010F] = 'PhoneMaker'  # Make
+        buf = BytesIO()
+        img.save(buf, format='JPEG', exif=exif.tobytes(), quality=95)
+        buf.seek(0)
+        return buf
+
+    def test_normalize_strips_metadata(self):
+        """Test that EXIF metadata is removed"""
+        data, fmt = normalize_image(self._jpeg_with_exif((64, 32), 1))
+        
+        assert fmt == 'JPEG'
+        img = Image.open(BytesIO(data))
+        assert len(img.getexif()) == 0
+
+    def test_normalize_applies_orientation(self):
+        """Test that EXIF rotation is baked into the pixels"""
+        data, _ = normalize_image(self._jpeg_with_exif((64, 32), 6))
+        
+        img = Image.open(BytesIO(data))
+        assert img.size == (32, 64)
+
+    def test_normalize_downscales(self):
+        """Test that the longest edge is capped"""
+        img = Image.new('RGB', (800, 400), color='green')
+        buf = BytesIO()
+        img.save(buf, format='PNG')
+        
+        data, fmt = normalize_image(buf, max_edge=200)
+        
+        assert fmt == 'PNG'
+        assert Image.open(BytesIO(data)).size == (200, 100)
+
+    def test_normalize_keeps_small_images(self):
+        """Test that images under the cap keep their dimensions"""
+        img = Image.new('RGB', (100, 50), color='red')
+        buf = BytesIO()
+        img.save(buf, format='GIF')
+        
+        data, fmt = normalize_image(buf, max_edge=200)
+        
+        assert fmt == 'GIF'
+        assert Image.open(BytesIO(data)).size == (100, 50)
+
+
+
+class TestPhotoHashing:
+    """Test perceptual hashing and the near-duplicate index"""
+
+    def test_image_hash_stable_across_reencoding(self, make_photo):
+        """Test that re-encoding and resizing barely changes the hash"""
+        original = make_photo(seed=1, size=(90, 80))
+        resized = make_photo(seed=1, size=(450, 400), fmt='PNG')
+        
+        distance = hamming_distance(parse_hash(image_hash(original)), parse_hash(image_hash(resized)))
+        assert distance <= 4
+
+    def test_image_hash_differs_for_different_photos(self, make_photo):
+        """Test that unrelated photos are far apart"""
+        a = parse_hash(image_hash(make_photo(seed=1)))
+        b = parse_hash(image_hash(make_photo(seed=2)))
+        
+        assert hamming_distance(a, b) > 8
+
+    def test_image_hash_invalid_data(self):
+        """Test that undecodable data yields no hash"""
+        assert image_hash(b'not an image') is None
+
+    def test_index_matches_linear_scan(self):
+        """Test that radius searches return exactly what a linear scan finds"""
+        import random
+        rng = random.Random(7)
+        values = [rng.getrandbits(64) for _ in range(2000)]
+        # Plant near-duplicates of the first value
+        for bits in (1, 3, 8, 9):
+            values.append(values[0] ^ ((1 << bits) - 1))
+        
+        table = MultiIndexHashTable()
+        for payload, value in enumerate(values):
+            table.add(value, payload)
+        
+        for radius in (0, 4, 8, 12):
+            for query in values[:20] + values[-4:]:
+                expected = sorted(i for i, v in enumerate(values) if hamming_distance(query, v) <= radius)
+                found = sorted(payload for _, payload in table.search(query, radius))
+                assert found == expected
+
+
+class TestTextMatching:
+    """Test the TF-IDF lost/found matching index"""
+
+    def build_index(self, vectorized):
+        index = TextMatchIndex(vectorized=vectorized)
+        reports = [
+            (1, 'found', 'Black Dell laptop', 'Dell laptop with charger', 'Library'),
+            (2, 'found', 'Laptop charger', 'Dell charger', 'Cafeteria'),
+            (3, 'found', 'Water bottle', 'Blue bottle', 'Library'),
+            (4, 'lost', 'Dell laptop', 'Black laptop', 'Library'),
+        ]
+        for item_id, item_type, title, description, location in reports:
+            index.add(item_id, 'electronics', item_type, 1000,
+                      {'title': title, 'description': description, 'location': location})
+        # Added after the others, so it lands in a later segment with a wider vocabulary
+        index.add(5, 'electronics', 'found', 1000,
+                  {'title': 'Dell laptop sleeve', 'description': 'Grey sleeve', 'location': 'Library'})
+        return index
+
+    def test_tokenize(self):
+        """Test that tokens are lowercased words without stopwords"""
+        assert tokenize('The black Dell-laptop, in a bag!') == ['black', 'dell', 'laptop', 'bag']
+        assert tokenize(None) == []
+
+    def test_search_ranks_opposite_type(self):
+        """Test that the closest found report ranks first and unrelated ones are left out"""
+        index = self.build_index(vectorized=False)
+        query = {'title': 'Lost Dell laptop', 'description': 'Black Dell laptop', 'location': 'Library'}
+        
+        results = index.search('electronics', 'lost', 1010, query, window=30, exclude=4)
+        
+        assert [item_id for _, item_id in results][:2] == [1, 5]
+        assert 4 not in [item_id for _, item_id in results]
+        assert index.search('electronics', 'lost', 1100, query, window=30) == []
+
+    def test_vectorized_scores_match(self):
+        """Test that the sparse-matrix scorer agrees with the pure-Python one"""
+        pytest.importorskip('scipy')
+        query = {'title': 'Dell laptop', 'description': 'Black laptop charger', 'location': 'Library'}
+        
+        expected = self.build_index(vectorized=False).search('electronics', 'lost', 1000, query)
+        results = self.build_index(vectorized=True).search('electronics', 'lost', 1000, query)
+        
+        assert [item_id for _, item_id in results] == [item_id for _, item_id in expected]
+        assert [round(score, 9) for score, _ in results] == [round(score, 9) for score, _ in expected]
+
+
+class TestSavedSearchIndex:
+    """Test the saved search percolator index"""
+
+    def test_index_matches_linear_scan(self):
+        """Test that the inverted index finds exactly the searches a full scan finds"""
+        import random
+        rng = random.Random(11)
+        words = ['black', 'hp', 'dell', 'laptop', 'phone', 'wallet', 'blue', 'library', 'keys', 'card']
+        categories = ['electronics', 'documents', None]
+        item_types = ['lost', 'found', None]
+        
+        index = SavedSearchIndex()
+        searches = {}
+        for search_id in range(500):
+            search = (search_id % 7, ' '.join(rng.sample(words, rng.randint(0, 3))),
+                      rng.choice(categories), rng.choice(item_types))
+            searches[search_id] = search
+            index.add(search_id, *search)
+        for search_id in range(0, 500, 5):
+            index.remove(search_id)
+            del searches[search_id]
+        
+        for _ in range(50):
+            category, item_type = rng.choice(categories[:2]), rng.choice(item_types[:2])
+            fields = {'title': ' '.join(rng.sample(words, 3)), 'description': ' '.join(rng.sample(words, 3))}
+            tokens = set(tokenize(fields['title'])) | set(tokenize(fields['description']))
+            expected = sorted(
+                search_id for search_id, (user_id, query, search_category, search_type) in searches.items()
+                if compile_terms(query) <= tokens and search_category in (category, None)
+                and search_type in (item_type, None) and user_id != 3
+            )
+            found = sorted(search_id for search_id, _ in index.match(category, item_type, fields, exclude_user=3))
+            assert found == expected
+
+
+class TestDatabaseEngine:
+    """Test the SQLite connection profile"""
+
+    def test_pragmas_applied_on_connect(self, app):
+        """Test that new connections get the configured pragmas"""
+        from app import db
+        
+        with db.engine.connect() as connection:
+            pragma = lambda name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == app.config['SQLITE_BUSY_TIMEOUT_MS']
+            assert pragma('cache_size') == -app.config['SQLITE_CACHE_SIZE_KB']
+            assert pragma('temp_store') == 2  # MEMORY
+
+    def test_invalid_pragma_setting(self, app):
+        """Test that settings outside the accepted values are refused"""
+        from app.utils.database import sqlite_pragmas
+        
+        config = dict(app.config, SQLITE_JOURNAL_MODE='wal; DROP TABLE items')
+        with pytest.raises(ValueError):
+            sqlite_pragmas(config)
+        assert sqlite_pragmas(dict(app.config, SQLITE_JOURNAL_MODE='delete'))['journal_mode'] == 'DELETE'
+
+    def test_statement_timeout(self, app):
+        """Test that SQLite statements running past DB_STATEMENT_TIMEOUT_MS are interrupted"""
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.exc import OperationalError
+        from app.utils.database import configure_engine
+        
+        engine = create_engine('sqlite://')
+        configure_engine(engine, dict(app.config, DB_STATEMENT_TIMEOUT_MS=50))
+        with engine.connect() as connection:
+            with pytest.raises(OperationalError, match='interrupted'):
+                connection.execute(text('WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) '
+                                        'SELECT count(*) FROM n'))
+            assert connection.execute(text('SELECT 1')).scalar() == 1
+        engine.dispose()
+
+
+class TestConfig:
+    """Test loading settings from config.py and the environment"""
+
+    def test_env_overrides_cast_to_setting_type(self):
+        """Test that environment values take the type of the setting they override"""
+        from config import ProductionConfig, env_overrides
+        
+        overrides = env_overrides(ProductionConfig, {
+            'DB_POOL_SIZE': '20', 'DB_POOL_PRE_PING': 'false', 'EVENTS_POLL_SECONDS': '0.5',
+            'ARCHIVE_STATUSES': 'claimed, returned', 'DATABASE_URL': 'sqlite:////tmp/other.db', 'UNRELATED': 'x'
+        })
+        assert overrides == {
+            'DB_POOL_SIZE': 20, 'DB_POOL_PRE_PING': False, 'EVENTS_POLL_SECONDS': 0.5,
+            'ARCHIVE_STATUSES': ('claimed', 'returned'), 'SQLALCHEMY_DATABASE_URI': 'sqlite:////tmp/other.db'
+        }
+        with pytest.raises(ValueError, match='DB_POOL_SIZE'):
+            env_overrides(ProductionConfig, {'DB_POOL_SIZE': 'many'})
+
+    def test_invalid_settings_fail_at_startup(self, monkeypatch):
+        """Test that create_app refuses out-of-range settings and names each one"""
+        from app import create_app
+        
+        monkeypatch.setenv('DB_POOL_SIZE', '0')
+        monkeypatch.setenv('LOG_LEVEL', 'LOUD')
+        with pytest.raises(ValueError) as excinfo:
+            create_app('testing')
+        assert 'DB_POOL_SIZE' in str(excinfo.value)
+        assert 'LOG_LEVEL' in str(excinfo.value)
+
+    def test_pool_settings_reach_engine(self, monkeypatch):
+        """Test that pool settings from the environment configure the engine"""
+        from app import create_app, db
+        
+        monkeypatch.setenv('DB_POOL_SIZE', '3')
+        monkeypatch.setenv('RATELIMIT_DEFAULT', '7')
+        app = create_app('testing')
+        with app.app_context():
+            assert db.engine.pool.size() == 3
+        assert app.extensions['rate_limiter'].max_requests['default'] == 7
+
+
+class TestRateLimiter:
+    """Test the rate limiter's counts and the suspicious activity check built on them"""
+
+    def test_recent_requests_in_memory(self):
+        """Test that requests of every limit type count, and only within the window"""
+        import time
+        from app.utils.security import RateLimiter
+        
+        limiter = RateLimiter(window_size=60)
+        for limit_type in ('default', 'upload', 'auth'):
+            limiter.is_allowed('client', limit_type)
+        limiter.requests['client'].appendleft(time.time() - 120)
+        
+        assert limiter.recent_requests('client') == 3
+        assert limiter.recent_requests('other') == 0
+
+    def test_suspicious_activity_with_shared_storage(self, app):
+        """Test that detection reads the counts from the limiter's storage, not the in-memory deques"""
+        from limits.storage import MemoryStorage
+        from app.utils.security import RateLimiter, detect_suspicious_activity, get_client_identifier
+        
+        limiter = RateLimiter(window_size=60, storage=MemoryStorage())
+        app.extensions['rate_limiter'] = limiter
+        with app.test_request_context('/api/items/report', method='POST'):
+            client_id = get_client_identifier()
+            for _ in range(20):
+                limiter.is_allowed(client_id, 'upload')
+            assert not detect_suspicious_activity()
+            
+            limiter.is_allowed(client_id, 'default')
+            assert limiter.recent_requests(client_id) == 21
+            assert not limiter.requests
+            assert detect_suspicious_activity()
+
+
+class TestWorkers:
+    """Test worker sizing and the state reset after a fork"""
+
+    def test_worker_and_thread_counts(self, monkeypatch):
+        """Test worker count follows cores unless WEB_CONCURRENCY and WEB_THREADS are set"""
+        from app.utils.workers import worker_count, thread_count
+        
+        monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+        monkeypatch.delenv('WEB_THREADS', raising=False)
+        assert worker_count(cpu_count=4) == 9
+        assert thread_count() == 4
+        
+        monkeypatch.setenv('WEB_CONCURRENCY', '3')
+        monkeypatch.setenv('WEB_THREADS', '0')
+        assert worker_count(cpu_count=4) == 3
+        assert thread_count() == 1
+
+    def test_reset_process_state(self, app):
+        """Test that a worker gets its own rate limiter, token cache and thread pools"""
+        from app.utils import auth
+        from app.utils.workers import reset_process_state
+        
+        limiter = app.extensions['rate_limiter']
+        app.extensions['photo_executor'] = object()
+        auth.TOKEN_STORE['inherited'] = 1
+        
+        reset_process_state(app)
+        
+        assert app.extensions['rate_limiter'] is not limiter
+        assert 'photo_executor' not in app.extensions
+        assert auth.TOKEN_STORE == {}
+        with app.app_context():
+            from app import db
+            assert db.session.execute(db.text('SELECT 1')).scalar() == 1
+
+    def test_pooled_server_serves_requests(self, app):
+        """Test that the launcher's pooled server answers on its thread pool"""
+        import threading
+        import urllib.request
+        from serve import PooledWSGIServer
+        
+        server = PooledWSGIServer('127.0.0.1', 0, app, threads=2)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/api/items') as response:
+                assert response.status == 200
+        finally:
+            server.shutdown()
+            server.executor.shutdown()
+
+
+class TestMetrics:
+    """Test the Prometheus metrics hooks and their aggregation across workers"""
+
+    def test_metrics_endpoint(self, client, test_item):
+        """Test that requests show up by endpoint, status and latency bucket"""
+        client.get('/api/items')
+        client.get('/api/items')
+        client.get('/no-such-page')
+        
+        response = client.get('/metrics')
+        
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        text = response.get_data(as_text=True)
+        assert 'http_requests_total{endpoint="items.get_items",method="GET",status="200"} 2' in text
+        assert 'http_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in text
+        assert 'http_request_duration_seconds_count{endpoint="items.get_items",method="GET"} 2' in text
+        assert 'http_request_duration_seconds_bucket{endpoint="items.get_items",method="GET",le="+Inf"} 2' in text
+        assert 'http_response_size_bytes_count{endpoint="items.get_items",method="GET"} 2' in text
+        assert 'http_requests_in_flight 1' in text
+
+    def test_metrics_add_up_worker_files(self, app, client, tmp_path):
+        """Test that /metrics sums other workers' files and drops in-flight requests of exited ones"""
+        import json
+        import subprocess
+        import sys
+        
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        other = {'pid': exited.pid, 'in_flight': 5, 'requests': [['items.get_items', 'GET', 200, 4]],
+                 'latency': [['items.get_items', 'GET', [4] + [0] * 11 + [0.01]]],
+                 'request_size': [], 'response_size': []}
+        (tmp_path / f'{exited.pid}.json').write_text(json.dumps(other))
+        app.extensions['metrics'].directory = str(tmp_path)
+        
+        client.get('/api/items')
+        text = client.get('/metrics').get_data(as_text=True)
+        
+        assert 'http_requests_total{endpoint="items.get_items",method="GET",status="200"} 5' in text
+        assert 'http_request_duration_seconds_count{endpoint="items.get_items",method="GET"} 5' in text
+        assert 'http_requests_in_flight 1' in text
+        assert (tmp_path / f'{os.getpid()}.json').exists()
+
+
+class TestQueryStats:
+    """Test per-request SQL statistics"""
+
+    def test_server_timing_and_n_plus_one_warning(self, app, client, test_user, caplog):
+        """Test the Server-Timing header and that a SELECT repeated in a loop is reported"""
+        from datetime import datetime
+        from app import db
+        from app.models import Item
+        
+        ids = []
+        for i in range(6):
+            item = Item(title=f'Lost Pen {i}', description='Blue pen', category='others', item_type='lost',
+                        date=datetime.utcnow(), location='Library', user_id=test_user.user_id)
+            db.session.add(item)
+            db.session.flush()
+            ids.append(item.item_id)
+        db.session.commit()
+        db.session.remove()
+        
+        def titles():
+            return {'titles': [db.session.get(Item, item_id).title for item_id in ids]}
+        app.add_url_rule('/test-n-plus-one', 'test_n_plus_one', titles)
+        app.config['SQL_SERVER_TIMING'] = True
+        
+        with caplog.at_level('WARNING', logger='app.utils.queries'):
+            response = client.get('/test-n-plus-one')
+        
+        assert response.status_code == 200
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+        assert response.headers['Server-Timing'].endswith('desc="6 queries"')
+        assert 'Probable N+1 query in GET /test-n-plus-one (test_n_plus_one): ran 6 times' in caplog.text
+        
+        caplog.clear()
+        app.config['SQL_SERVER_TIMING'] = False
+        response = client.get('/api/items')
+        assert 'Server-Timing' not in response.headers
+        assert 'N+1' not in caplog.text
+
+    def test_slow_query_log(self, caplog):
+        """Test that statements over the threshold are logged with their parameters"""
+        from sqlalchemy import create_engine, text
+        from app.utils.queries import instrument_engine
+        
+        engine = create_engine('sqlite://')
+        instrument_engine(engine, {'SQL_SLOW_QUERY_MS': 0.000001})
+        with caplog.at_level('WARNING', logger='app.utils.queries'):
+            with engine.connect() as connection:
+                connection.execute(text('SELECT :value'), {'value': 'needle'})
+        
+        assert 'Slow query' in caplog.text
+        assert 'SELECT ?' in caplog.text and 'needle' in caplog.text
+
+
 class TestAuthUtils:
     """Test authentication utility functions"""
 
@@ -206,4 +652,45 @@ class TestErrorHandling:
     def test_secure_filename_none(self):
         """Test secure filename with None input"""
         result = secure_upload_filename(None)
-        assert result == 'upload'
\ No newline at end of file
+        assert result == 'upload'
+
+class TestStartup:
+    """Test that creating the app stays cheap"""
+
+    def test_create_app_does_no_database_work(self, app):
+        """Test that create_app opens no connection and the first request still works"""
+        from sqlalchemy import event
+        from sqlalchemy.pool import Pool
+        from app import create_app
+        
+        connections = []
+        record = lambda *args: connections.append(args)
+        event.listen(Pool, 'connect', record)
+        try:
+            fresh = create_app('testing')
+            assert connections == []
+            response = fresh.test_client().get('/api/items')
+        finally:
+            event.remove(Pool, 'connect', record)
+        
+        assert response.status_code == 200
+
+    def test_create_app_import_budget(self):
+        """Test that create_app leaves heavy optional dependencies unimported, per `python -X importtime`"""
+        import subprocess
+        import sys
+        
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                 "from app import create_app; create_app('testing')"],
+                                cwd=backend, capture_output=True, text=True, check=True)
+        
+        imported = {}
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line and 'self [us]' not in line:
+                self_us, _, name = line[len('import time:'):].split('|')
+                imported[name.strip()] = int(self_us)
+        
+        heavy = {'PIL', 'bleach', 'numpy', 'scipy'} & {name.split('.')[0] for name in imported}
+        assert heavy == set()
+        assert sum(imported.values()) < 1_500_000  # Microseconds; about 0.6 s on a laptop
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Run `flask --app wsgi.py init-db` once before the first start.
+"""
+
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))